@@ -0,0 +1,196 @@
+"""
+Benchmark suite for contentctl, run over synthetic content packs from generate_corpus.
+
+Each benchmark is run against a pack of every requested size:
+    validate_cold: Validate.execute with an empty .contentctl_cache
+    validate_warm: Validate.execute again, reusing the .contentctl_cache from validate_cold
+    build_app_cold: Build.execute, building only the app, with no stanza cache or previous build
+    build_app: Build.execute again, reusing the stanza cache and the app from build_app_cold
+    build_api: Build.execute, building only the API
+    git_changes: GitService.getChanges against the commit of the pack
+    test_summary: DetectionTestingView.getSummaryObject, after a result is set for every test
+
+The results are written as JSON, so that the results of two commits can be compared with
+--compare. The packs are kept in --corpus-path and reused, since they are always generated
+the same way.
+
+Usage:
+    python -m benchmarks.bench_contentctl [--detections 100 1000] [--repeat 3]
+        [--output results.json] [--compare previous_results.json]
+"""
+import io
+import sys
+import json
+import time
+import shutil
+import tempfile
+import pathlib
+import argparse
+import platform
+import datetime
+import contextlib
+import importlib.metadata
+from typing import Any, Callable
+
+from splunklib.data import Record
+
+from contentctl.actions.validate import Validate
+from contentctl.actions.build import Build, BuildInputDto
+from contentctl.actions.detection_testing.GitService import GitService
+from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructure import DetectionTestingManagerOutputDto
+from contentctl.actions.detection_testing.views.DetectionTestingViewFile import DetectionTestingViewFile
+from contentctl.enrichments.enrichment_snapshot import EnrichmentSnapshot
+from contentctl.input.director import DirectorOutputDto
+from contentctl.objects.base_test_result import TestResultStatus
+from contentctl.objects.config import build, test, Container
+from contentctl.objects.unit_test_result import UnitTestResult
+from contentctl.objects.constants import CACHE_DIRECTORY
+
+from benchmarks.generate_corpus import generateCorpus, TARGET_BRANCH
+
+
+DEFAULT_CORPUS_PATH = pathlib.Path(tempfile.gettempdir())/"contentctl_benchmark_corpus"
+TEST_STATUSES = [TestResultStatus.PASS, TestResultStatus.PASS, TestResultStatus.PASS,
+                 TestResultStatus.FAIL, TestResultStatus.SKIP]
+
+
+def timeBenchmark(run: Callable[[], Any], repeat: int, setup: Callable[[], Any] = lambda: None,
+                  verbose: bool = False) -> list[float]:
+    times: list[float] = []
+    for _ in range(repeat):
+        setup()
+        # contentctl prints a lot of progress, which would swamp the results
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def setTestResults(director_output_dto: DirectorOutputDto) -> None:
+    # The results that a test run would have set, with a mix of statuses
+    container = Container(instance_name="benchmark")
+    for index, detection in enumerate(director_output_dto.detections):
+        for test_index, detection_test in enumerate(detection.tests):
+            result = UnitTestResult()
+            status = TEST_STATUSES[(index + test_index) % len(TEST_STATUSES)]
+            content = None if status == TestResultStatus.SKIP else Record({"sid": f"benchmark.{index}.{test_index}",
+                                                                           "resultCount": 1,
+                                                                           "runDuration": 0.5})
+            result.set_job_content(content, container, status, duration=1.5)
+            detection_test.result = result
+
+
+def benchmarkCorpus(corpus_path: pathlib.Path, repeat: int, verbose: bool) -> dict[str, list[float]]:
+    results: dict[str, list[float]] = {}
+    # Like the command line, everything is run from the root of the content pack. GitService
+    # only matches changed files to content when the path to the pack is relative.
+    with contextlib.chdir(corpus_path):
+        validate_config = build.model_validate({"path": pathlib.Path("."), "build_app": False, "build_api": False})
+        build_app_config = build.model_validate({"path": pathlib.Path("."), "build_app": True, "build_api": False})
+        build_api_config = build.model_validate({"path": pathlib.Path("."), "build_app": False, "build_api": True})
+        clearCache = lambda: shutil.rmtree(CACHE_DIRECTORY, ignore_errors=True)
+
+        results["validate_cold"] = timeBenchmark(lambda: Validate().execute(validate_config), repeat,
+                                                 setup=clearCache, verbose=verbose)
+        results["validate_warm"] = timeBenchmark(lambda: Validate().execute(validate_config), repeat,
+                                                 verbose=verbose)
+
+        # Building the app adds content to the DirectorOutputDto, so every build starts from
+        # a freshly validated one
+        validated: list[DirectorOutputDto] = []
+        def revalidate() -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                validated[:] = [Validate().execute(validate_config)]
+        def revalidateAndClearBuild() -> None:
+            revalidate()
+            shutil.rmtree(build_app_config.cache_path/"stanzas", ignore_errors=True)
+            shutil.rmtree(build_app_config.getPackageDirectoryPath(), ignore_errors=True)
+        results["build_app_cold"] = timeBenchmark(lambda: Build().execute(BuildInputDto(validated[0], build_app_config)),
+                                                  repeat, setup=revalidateAndClearBuild, verbose=verbose)
+        results["build_app"] = timeBenchmark(lambda: Build().execute(BuildInputDto(validated[0], build_app_config)),
+                                             repeat, setup=revalidate, verbose=verbose)
+        results["build_api"] = timeBenchmark(lambda: Build().execute(BuildInputDto(validated[0], build_api_config)),
+                                             repeat, setup=revalidate, verbose=verbose)
+        director_output_dto = validated[0]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            test_config = test.model_validate({"path": pathlib.Path(".")})
+        git_service = GitService(director=director_output_dto, config=test_config)
+        results["git_changes"] = timeBenchmark(lambda: git_service.getChanges(TARGET_BRANCH), repeat, verbose=verbose)
+
+        setTestResults(director_output_dto)
+        view = DetectionTestingViewFile(config=test_config,
+                                        sync_obj=DetectionTestingManagerOutputDto(outputQueue=director_output_dto.detections))
+        results["test_summary"] = timeBenchmark(view.getSummaryObject, repeat, verbose=verbose)
+    return results
+
+
+def getCorpus(corpus_root: pathlib.Path, detections: int) -> pathlib.Path:
+    corpus_path = corpus_root/f"detections_{detections}"
+    if not corpus_path.is_dir():
+        print(f"Generating a content pack with [{detections}] detections in {corpus_path}...", flush=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generateCorpus(corpus_path, detections)
+    return corpus_path
+
+
+def compareResults(results: dict[str, Any], previous: dict[str, Any]) -> None:
+    previous_best = {(result["benchmark"], result["detections"]): result["best"] for result in previous["results"]}
+    print(f"\nCompared to {previous.get('commit')} ({previous.get('timestamp')}):")
+    for result in results["results"]:
+        before = previous_best.get((result["benchmark"], result["detections"]))
+        if before is None:
+            continue
+        print(f"  {result['benchmark']:<14} [{result['detections']:>6} detections] "
+              f"{before:8.3f}s -> {result['best']:8.3f}s  ({result['best'] / before:5.2f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark contentctl over synthetic content packs")
+    parser.add_argument("--detections", type=int, nargs="+", default=[100, 1000],
+                        help="The number of detections in each content pack to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of times to run each benchmark")
+    parser.add_argument("--corpus-path", type=pathlib.Path, default=DEFAULT_CORPUS_PATH,
+                        help="Directory to generate the content packs in, or reuse them from")
+    parser.add_argument("--output", type=pathlib.Path, default=None,
+                        help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=pathlib.Path, default=None,
+                        help="A JSON file written by a previous run, to compare the results against")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of contentctl")
+    args = parser.parse_args()
+
+    try:
+        version = importlib.metadata.version("contentctl")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    results: dict[str, Any] = {
+        "contentctl_version": version,
+        "commit": EnrichmentSnapshot.getRepoHead(pathlib.Path(__file__).parent.parent),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": [],
+    }
+
+    for detections in args.detections:
+        corpus_path = getCorpus(args.corpus_path, detections).absolute()
+        for benchmark, times in benchmarkCorpus(corpus_path, args.repeat, args.verbose).items():
+            result = {"benchmark": benchmark, "detections": detections, "best": min(times),
+                      "mean": sum(times) / len(times), "times": times}
+            results["results"].append(result)
+            print(f"{benchmark:<14} [{detections:>6} detections] best {result['best']:8.3f}s  mean {result['mean']:8.3f}s")
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Wrote the results to {args.output}")
+
+    if args.compare is not None:
+        compareResults(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
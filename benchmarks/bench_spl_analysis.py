@@ -0,0 +1,138 @@
+"""
+Benchmark of the SPL analysis performed while validating and building detections.
+
+The legacy functions below are copies of the scans that each validator and computed field
+used to perform on its own. They are kept here to check that analyzeSpl returns exactly the
+same results, and to measure the difference, over a synthetic corpus of detection searches.
+
+Usage:
+    python -m benchmarks.bench_spl_analysis [--detections 10000] [--accesses 5]
+"""
+import re
+import time
+import random
+import argparse
+from typing import Callable
+
+from contentctl.objects.enums import DataModel, ProvidingTechnology
+from contentctl.objects.spl_analysis import analyzeSpl
+
+
+SEARCH_TEMPLATES = [
+    "| tstats `security_content_summariesonly` count min(_time) as firstTime max(_time) as lastTime "
+    "from datamodel=Endpoint.Processes where Processes.process_name={process} by Processes.dest "
+    "Processes.user Processes.parent_process_name Processes.process_name Processes.process "
+    "| `drop_dm_object_name(Processes)` | `security_content_ctime(firstTime)` "
+    "| `security_content_ctime(lastTime)` | `{name}_filter`",
+
+    "`sysmon` EventCode=1 process_name={process} ```look for `{process}` spawning children```"
+    "| stats count min(_time) as firstTime max(_time) as lastTime by dest user parent_process_name "
+    "| lookup {lookup} process_name OUTPUT is_suspicious | where is_suspicious=1 "
+    "| `security_content_ctime(firstTime)` | `{name}_filter`",
+
+    "`cloudtrail` eventName=ConsoleLogin errorMessage=\"Failed authentication\" "
+    "| iplocation src_ip | stats dc(src_ip) as distinct_ips values(City) as cities by user "
+    "| where distinct_ips > {threshold} | inputlookup append=t {lookup} "
+    "| `aws_login_thresholds(user,{threshold})` | `{name}_filter`",
+
+    "| tstats `security_content_summariesonly` count from datamodel=Network_Traffic.All_Traffic "
+    "where All_Traffic.dest_port={port} by All_Traffic.src_ip All_Traffic.dest_ip "
+    "| `drop_dm_object_name(\"All_Traffic\")` | outputlookup {lookup} ```comment ending in `a_macro````"
+    "| `{name}_filter`",
+]
+
+
+def generateSearches(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    searches: list[str] = []
+    for index in range(count):
+        template = SEARCH_TEMPLATES[index % len(SEARCH_TEMPLATES)]
+        searches.append(template.format(name=f"synthetic_detection_{index}",
+                                        process=rng.choice(["7z.exe", "rundll32.exe", "powershell.exe", "cmd.exe"]),
+                                        lookup=f"synthetic_lookup_{rng.randint(0, 50)}",
+                                        threshold=rng.randint(1, 20),
+                                        port=rng.choice([22, 445, 3389, 4444])))
+    return searches
+
+
+def legacyMacros(search: str) -> set[str]:
+    search = re.sub(r"\`\`\`\`", r"` ```", search)
+    search = re.sub(r"\`\`\`.*?\`\`\`", " ", search)
+    macros = re.findall(r'`([^\s]+)`', search)
+    return set([macro[:macro.find('(')] if macro.find('(') != -1 else macro for macro in macros])
+
+
+def legacyLookups(search: str) -> set[str]:
+    return set(re.findall(r'[^output]lookup (?:update=true)?(?:append=t)?\s*([^\s]*)', search))
+
+
+def legacyDatamodels(search: str) -> list[DataModel]:
+    return [dm for dm in DataModel if dm.value in search]
+
+
+def legacyMissingFields(search: str, fields: list[str]) -> set[str]:
+    return set([field for field in fields if field not in search.lower()])
+
+
+OBSERVABLE_FIELDS = ["dest", "user", "parent_process_name", "process_name", "src_ip", "dest_ip"]
+
+
+def runLegacy(searches: list[str], accesses: int) -> None:
+    for search in searches:
+        legacyMacros(search)
+        legacyLookups(search)
+        legacyMissingFields(search, OBSERVABLE_FIELDS)
+        for _ in range(accesses):
+            # Computed fields are evaluated again every time that the detection is serialized
+            legacyDatamodels(search)
+            ProvidingTechnology.getProvidingTechFromSearch(search)
+
+
+def runAnalyzer(searches: list[str], accesses: int) -> None:
+    for search in searches:
+        analyzeSpl(search).macros
+        analyzeSpl(search).lookups
+        search_lower = analyzeSpl(search).search_lower
+        set([field for field in OBSERVABLE_FIELDS if field not in search_lower])
+        for _ in range(accesses):
+            analyzeSpl(search).datamodels
+            analyzeSpl(search).providing_technologies
+
+
+def checkEquivalence(searches: list[str]) -> None:
+    for search in searches:
+        analysis = analyzeSpl(search)
+        assert analysis.macros == legacyMacros(search), search
+        assert analysis.lookups == legacyLookups(search), search
+        assert list(analysis.datamodels) == legacyDatamodels(search), search
+        assert set(analysis.providing_technologies) == set(ProvidingTechnology.getProvidingTechFromSearch(search)), search
+
+
+def timeRun(run: Callable[[list[str], int], None], searches: list[str], accesses: int) -> float:
+    start = time.perf_counter()
+    run(searches, accesses)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SPL analysis over a synthetic corpus of detection searches")
+    parser.add_argument("--detections", type=int, default=10000, help="Number of synthetic detection searches")
+    parser.add_argument("--accesses", type=int, default=5,
+                        help="Number of times the computed fields of each detection are evaluated")
+    args = parser.parse_args()
+
+    searches = generateSearches(args.detections)
+    checkEquivalence(searches)
+    analyzeSpl.cache_clear()
+
+    legacy = timeRun(runLegacy, searches, args.accesses)
+    cold = timeRun(runAnalyzer, searches, args.accesses)
+    warm = timeRun(runAnalyzer, searches, args.accesses)
+    print(f"SPL analysis of [{args.detections}] synthetic detections, computed fields evaluated [{args.accesses}] times each")
+    print(f"  legacy per-validator scans : {legacy:8.3f}s")
+    print(f"  analyzeSpl (cold cache)    : {cold:8.3f}s  ({legacy / cold:5.1f}x)")
+    print(f"  analyzeSpl (warm cache)    : {warm:8.3f}s  ({legacy / warm:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Generate a synthetic content pack for benchmarking contentctl.
+
+The pack is created exactly like 'contentctl init' creates one, and is then scaled up by
+deriving detections, stories, macros, lookups, and baselines from the templates shipped with
+contentctl. The detections reference the macros, lookups, and stories, and the baselines
+reference the detections, so that every validator and every conf file has realistic work to do.
+The same arguments always generate exactly the same pack.
+
+The pack is also committed to a new git repo, on the branch 'main', and a small fraction of the
+detections and macros are then modified in the working tree. This gives GitService.getChanges
+something to find.
+
+Usage:
+    python -m benchmarks.generate_corpus PATH [--detections 1000] [--seed 0]
+"""
+import uuid
+import random
+import pathlib
+import argparse
+import contextlib
+from typing import Any
+
+import yaml
+import pygit2
+
+from contentctl.actions.initialize import Initialize
+from contentctl.objects.config import init, test
+
+
+TEMPLATES_PATH = pathlib.Path(__file__).parent.parent/"contentctl"/"templates"
+DETECTION_TEMPLATE = TEMPLATES_PATH/"detections"/"endpoint"/"anomalous_usage_of_7zip.yml"
+STORY_TEMPLATE = TEMPLATES_PATH/"stories"/"cobalt_strike.yml"
+MACRO_TEMPLATE = TEMPLATES_PATH/"macros"/"security_content_ctime.yml"
+
+# The fractions of each other type of content, relative to the number of detections
+DETECTIONS_PER_STORY = 25
+DETECTIONS_PER_MACRO = 10
+DETECTIONS_PER_LOOKUP = 50
+DETECTIONS_PER_BASELINE = 100
+DETECTIONS_PER_BASELINE_REFERENCE = 5
+LOOKUP_ROWS = 200
+
+DETECTION_DIRECTORIES = ["endpoint", "network", "cloud", "application", "web"]
+DETECTION_TYPES = ["Anomaly", "TTP", "Hunting"]
+PROCESS_NAMES = ["7z.exe", "rundll32.exe", "powershell.exe", "cmd.exe", "regsvr32.exe", "mshta.exe"]
+
+# The fraction of detections modified, after the commit, for GitService.getChanges to find
+MODIFIED_FRACTION = 0.01
+TARGET_BRANCH = "main"
+
+# Any content UUIDs must be stable across runs, so they are derived from the name of the content
+CORPUS_NAMESPACE = uuid.UUID("9f3c1d62-5a0e-4c6b-8a0c-5f4e2b7d9e11")
+
+
+def contentId(name: str) -> str:
+    return str(uuid.uuid5(CORPUS_NAMESPACE, name))
+
+
+def writeYml(path: pathlib.Path, obj: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(obj, sort_keys=False))
+
+
+def loadTemplate(path: pathlib.Path) -> dict[str, Any]:
+    with open(path, "r") as template:
+        return yaml.safe_load(template)
+
+
+def storyName(index: int) -> str:
+    return f"Synthetic Story {index}"
+
+
+def macroName(index: int) -> str:
+    return f"synthetic_macro_{index}"
+
+
+def lookupName(index: int) -> str:
+    return f"synthetic_lookup_{index}"
+
+
+def detectionName(index: int) -> str:
+    return f"Synthetic Detection {index}"
+
+
+def generateStories(path: pathlib.Path, count: int) -> None:
+    template = loadTemplate(STORY_TEMPLATE)
+    for index in range(count):
+        story = dict(template)
+        story["name"] = storyName(index)
+        story["id"] = contentId(story["name"])
+        writeYml(path/"stories"/f"synthetic_story_{index}.yml", story)
+
+
+def generateMacros(path: pathlib.Path, count: int) -> None:
+    template = loadTemplate(MACRO_TEMPLATE)
+    for index in range(count):
+        macro = dict(template)
+        macro["name"] = macroName(index)
+        macro["description"] = f"Synthetic macro {index}, derived from {template['name']}"
+        writeYml(path/"macros"/f"{macroName(index)}.yml", macro)
+
+
+def generateLookups(path: pathlib.Path, count: int, rng: random.Random) -> None:
+    for index in range(count):
+        name = lookupName(index)
+        writeYml(path/"lookups"/f"{name}.yml", {"name": name,
+                                                "description": f"Synthetic lookup {index} of suspicious processes",
+                                                "filename": f"{name}.csv",
+                                                "default_match": "false",
+                                                "min_matches": 1,
+                                                "case_sensitive_match": "false"})
+        rows = ["process_name,is_suspicious,comment"]
+        for row in range(LOOKUP_ROWS):
+            rows.append(f"{rng.choice(PROCESS_NAMES).replace('.exe', f'_{row}.exe')},{rng.randint(0, 1)},row {row}")
+        (path/"lookups"/f"{name}.csv").write_text("\n".join(rows) + "\n")
+
+
+def generateDetections(path: pathlib.Path, count: int, stories: int, macros: int, lookups: int,
+                       rng: random.Random) -> None:
+    template = loadTemplate(DETECTION_TEMPLATE)
+    for index in range(count):
+        detection = dict(template)
+        detection["name"] = detectionName(index)
+        detection["id"] = contentId(detection["name"])
+        detection["type"] = DETECTION_TYPES[index % len(DETECTION_TYPES)]
+        filter_macro = f"{detection['name'].lower().replace(' ', '_')}_filter"
+        process_name = rng.choice(PROCESS_NAMES)
+        # Keep the structure of the template search, adding a macro and a lookup, and
+        # replace the filter macro with the one for this detection
+        detection["search"] = (template["search"].replace("*7z*", process_name)
+                                                 .replace("| `anomalous_usage_of_7zip_filter`", "")
+                               + f" | `{macroName(rng.randrange(macros))}(process_name)`"
+                               + f" | lookup {lookupName(rng.randrange(lookups))} process_name OUTPUT is_suspicious"
+                               + f" | `{filter_macro}`")
+        tags = dict(template["tags"])
+        tags["analytic_story"] = sorted({storyName(rng.randrange(stories)) for _ in range(rng.randint(1, 2))})
+        detection["tags"] = tags
+        directory = DETECTION_DIRECTORIES[index % len(DETECTION_DIRECTORIES)]
+        writeYml(path/"detections"/directory/f"synthetic_detection_{index}.yml", detection)
+
+
+def generateBaselines(path: pathlib.Path, count: int, detections: int, stories: int, rng: random.Random) -> None:
+    for index in range(count):
+        name = f"Synthetic Baseline {index}"
+        referenced = [detectionName(rng.randrange(detections)) for _ in range(DETECTIONS_PER_BASELINE_REFERENCE)]
+        writeYml(path/"baselines"/f"synthetic_baseline_{index}.yml", {
+            "name": name,
+            "id": contentId(name),
+            "version": 1,
+            "date": "2024-01-01",
+            "author": "Synthetic Author, Splunk",
+            "type": "Baseline",
+            "datamodel": ["Endpoint"],
+            "description": f"Synthetic baseline {index} of process activity.",
+            "search": "| tstats `security_content_summariesonly` count from datamodel=Endpoint.Processes by Processes.dest",
+            "how_to_implement": "Ingest process data into the Endpoint datamodel.",
+            "known_false_positives": "None, this is a baseline search.",
+            "references": [],
+            "tags": {
+                "analytic_story": [storyName(rng.randrange(stories))],
+                "detections": sorted(set(referenced)),
+                "product": ["Splunk Enterprise", "Splunk Enterprise Security", "Splunk Cloud"],
+                "required_fields": ["_time"],
+                "security_domain": "endpoint",
+            },
+        })
+
+
+def commitCorpus(path: pathlib.Path) -> None:
+    repo = pygit2.init_repository(str(path), initial_head=TARGET_BRANCH)
+    repo.index.add_all()
+    repo.index.write()
+    tree = repo.index.write_tree()
+    signature = pygit2.Signature("contentctl benchmarks", "benchmarks@example.com", 0, 0)
+    repo.create_commit("HEAD", signature, signature, "Synthetic content pack", tree, [])
+
+
+def modifyCorpus(path: pathlib.Path, detections: int, rng: random.Random) -> None:
+    for index in rng.sample(range(detections), max(1, int(detections * MODIFIED_FRACTION))):
+        directory = DETECTION_DIRECTORIES[index % len(DETECTION_DIRECTORIES)]
+        detection_path = path/"detections"/directory/f"synthetic_detection_{index}.yml"
+        detection = loadTemplate(detection_path)
+        detection["description"] += " Modified after the commit."
+        writeYml(detection_path, detection)
+
+    macro_path = path/"macros"/f"{macroName(0)}.yml"
+    macro = loadTemplate(macro_path)
+    macro["description"] += ", modified after the commit"
+    writeYml(macro_path, macro)
+
+
+def generateCorpus(path: pathlib.Path, detections: int, seed: int = 0) -> pathlib.Path:
+    """
+    Generate a synthetic content pack.
+
+    Args:
+        path (pathlib.Path): The directory to create the pack in. It must not already exist.
+        detections (int): The number of detections in the pack. The numbers of every other
+            type of content are derived from this.
+        seed (int, optional): Seed for the choices made while generating content. Defaults to 0.
+
+    Returns:
+        pathlib.Path: The path to the generated content pack
+    """
+    if detections < 1:
+        raise ValueError(f"A corpus must have at least 1 detection, not [{detections}]")
+    path.mkdir(parents=True, exist_ok=False)
+    rng = random.Random(seed)
+
+    # Initialize writes README.md into the current directory, so run it from inside the pack
+    # and merge the init arguments into the test config, just like 'contentctl init' does
+    with contextlib.chdir(path):
+        config = test.model_validate({"path": pathlib.Path(".")})
+        config.__dict__.update(init.model_validate({"path": pathlib.Path(".")}).__dict__)
+        Initialize().execute(config)
+
+    stories = max(1, detections // DETECTIONS_PER_STORY)
+    macros = max(1, detections // DETECTIONS_PER_MACRO)
+    lookups = max(1, detections // DETECTIONS_PER_LOOKUP)
+    generateStories(path, stories)
+    generateMacros(path, macros)
+    generateLookups(path, lookups, rng)
+    generateDetections(path, detections, stories, macros, lookups, rng)
+    generateBaselines(path, max(1, detections // DETECTIONS_PER_BASELINE), detections, stories, rng)
+
+    commitCorpus(path)
+    modifyCorpus(path, detections, rng)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic content pack for benchmarking contentctl")
+    parser.add_argument("path", type=pathlib.Path, help="The directory to create the content pack in")
+    parser.add_argument("--detections", type=int, default=1000, help="Number of synthetic detections")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the choices made while generating content")
+    args = parser.parse_args()
+
+    generateCorpus(args.path, args.detections, args.seed)
+    print(f"Generated a content pack with [{args.detections}] detections in {args.path.absolute()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,11 @@ from contentctl.objects.enums import SecurityContentProduct, SecurityContentType
 from contentctl.input.director import Director, DirectorOutputDto
 from contentctl.output.conf_output import ConfOutput
 from contentctl.output.conf_writer import ConfWriter
+from contentctl.output.stanza_cache import StanzaCache
 from contentctl.output.api_json_output import ApiJsonOutput
 from contentctl.output.data_source_writer import DataSourceWriter
 from contentctl.objects.lookup import Lookup
+from contentctl.helper.profiler import PROFILER
 import pathlib
 import json
 import datetime
@@ -32,32 +34,51 @@ class Build:
         if input_dto.config.build_app:
 
             updated_conf_files:set[pathlib.Path] = set()
-            conf_output = ConfOutput(input_dto.config)
+            stanza_cache = StanzaCache.fromConfig(input_dto.config, input_dto.director_output_dto)
+            conf_output = ConfOutput(input_dto.config, input_dto.director_output_dto.file_index, stanza_cache)
 
             # Construct a special lookup whose CSV is created at runtime and
             # written directly into the output folder. It is created with model_construct,
             # not model_validate, because the CSV does not exist yet.
             data_sources_lookup_csv_path = input_dto.config.getPackageDirectoryPath() / "lookups" / "data_sources.csv"
             DataSourceWriter.writeDataSourceCsv(input_dto.director_output_dto.data_sources, data_sources_lookup_csv_path)
+            # When the same content is built again, replace the lookup added by the previous build
+            previous_lookup = input_dto.director_output_dto.name_to_content_map.get("data_sources")
+            if isinstance(previous_lookup, Lookup) and previous_lookup.file_path is None:
+                input_dto.director_output_dto.removeContent(previous_lookup)
             input_dto.director_output_dto.addContentToDictMappings(Lookup.model_construct(description= "A lookup file that will contain the data source objects for detections.", 
                                                                         filename=data_sources_lookup_csv_path, 
                                                                         name="data_sources"))
 
-            updated_conf_files.update(conf_output.writeHeaders())
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.detections, SecurityContentType.detections))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.stories, SecurityContentType.stories))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.baselines, SecurityContentType.baselines))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.investigations, SecurityContentType.investigations))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.lookups, SecurityContentType.lookups))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.macros, SecurityContentType.macros))
-            updated_conf_files.update(conf_output.writeObjects(input_dto.director_output_dto.dashboards, SecurityContentType.dashboards))
-            updated_conf_files.update(conf_output.writeAppConf())
+            with PROFILER.phase("writeHeaders"):
+                updated_conf_files.update(conf_output.writeHeaders())
+            for output_objects, output_type in [(input_dto.director_output_dto.detections, SecurityContentType.detections),
+                                                (input_dto.director_output_dto.stories, SecurityContentType.stories),
+                                                (input_dto.director_output_dto.baselines, SecurityContentType.baselines),
+                                                (input_dto.director_output_dto.investigations, SecurityContentType.investigations),
+                                                (input_dto.director_output_dto.lookups, SecurityContentType.lookups),
+                                                (input_dto.director_output_dto.macros, SecurityContentType.macros),
+                                                (input_dto.director_output_dto.dashboards, SecurityContentType.dashboards)]:
+                with PROFILER.phase(f"writeObjects: {output_type.name}"):
+                    updated_conf_files.update(conf_output.writeObjects(output_objects, output_type))
+            with PROFILER.phase("writeAppConf"):
+                updated_conf_files.update(conf_output.writeAppConf())
+            with PROFILER.phase("writeFiles"):
+                conf_output.writeFiles()
+            if stanza_cache is not None:
+                # Keep the stanzas of this build, so that the next build only renders what has changed
+                with PROFILER.phase("save stanza cache"):
+                    stanza_cache.save()
+            with PROFILER.phase("removeStaleFiles"):
+                conf_output.removeStaleFiles([data_sources_lookup_csv_path])
             
             #Ensure that the conf file we just generated/update is syntactically valid
-            for conf_file in updated_conf_files:
-                ConfWriter.validateConfFile(conf_file) 
+            with PROFILER.phase("validate conf files"):
+                for conf_file in updated_conf_files:
+                    ConfWriter.validateConfFile(conf_file) 
                 
-            conf_output.packageApp()
+            with PROFILER.phase("packageApp"):
+                conf_output.packageApp()
 
             print(f"Build of '{input_dto.config.app.title}' APP successful to {input_dto.config.getPackageFilePath()}")
         
@@ -73,7 +94,8 @@ class Build:
                                                 (input_dto.director_output_dto.lookups, SecurityContentType.lookups),
                                                 (input_dto.director_output_dto.macros, SecurityContentType.macros),
                                                 (input_dto.director_output_dto.deployments, SecurityContentType.deployments)]:
-                api_json_output.writeObjects(output_objects, input_dto.config.getAPIPath(), input_dto.config.app.label, output_type )
+                with PROFILER.phase(f"API writeObjects: {output_type.name}"):
+                    api_json_output.writeObjects(output_objects, input_dto.config.getAPIPath(), input_dto.config.app.label, output_type )
             
            
             
@@ -30,6 +30,10 @@ class GitService(BaseModel):
     director: DirectorOutputDto
     config: test_common
     gitHash: Optional[str] = None
+
+    class Config:
+        # The DirectorOutputDto holds objects, such as its FileIndex, which are not pydantic models
+        arbitrary_types_allowed = True
     
     def getHash(self)->str:
         if self.gitHash is None:
@@ -65,8 +69,7 @@ class GitService(BaseModel):
         #Combine the uncommitted changes with the committed changes
         all_diffs = list(diffs) + list(diffs2)
 
-        #Make a filename to content map
-        filepath_to_content_map = { obj.file_path:obj for (_,obj) in self.director.name_to_content_map.items()} 
+        filepath_to_content_map = self.director.file_path_to_content_map
         updated_detections:List[Detection] = []
         updated_macros:List[Macro] = []
         updated_lookups:List[Lookup] =[]
@@ -137,17 +140,14 @@ class GitService(BaseModel):
         # If a detection has at least one dependency on changed content,
         # then we must test it again
         changed_macros_and_lookups = updated_macros + updated_lookups
-        
-        for detection in self.director.detections:
-            if detection in updated_detections:
-                # we are already planning to test it, don't need 
-                # to add it again
-                continue
+        impacted_content: set[SecurityContentObject] = set()
+        for obj in changed_macros_and_lookups:
+            impacted_content.update(self.director.dependency_graph.getDependents(obj))
 
-            for obj in changed_macros_and_lookups:
-                if obj in detection.get_content_dependencies():
-                   updated_detections.append(detection)
-                   break
+        # Walk the detections in order so that the output is deterministic
+        for detection in self.director.detections:
+            if detection in impacted_content and detection not in updated_detections:
+                updated_detections.append(detection)
 
         #Print out the names of all modified/new content
         modifiedAndNewContentString = "\n - ".join(sorted([d.name for d in updated_detections]))
@@ -156,9 +156,7 @@ class GitService(BaseModel):
         return updated_detections
 
     def getSelected(self, detectionFilenames: List[FilePath]) -> List[Detection]:
-        filepath_to_content_map: dict[FilePath, SecurityContentObject] = {
-        obj.file_path: obj for (_, obj) in self.director.name_to_content_map.items() if obj.file_path is not None
-    }
+        filepath_to_content_map = self.director.file_path_to_content_map
         errors = []
         detections: List[Detection] = []
         for name in detectionFilenames:
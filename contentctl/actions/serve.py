@@ -0,0 +1,141 @@
+"""
+A long running validation server for editors and pre-commit hooks. The content pack is
+validated once, and the DirectorOutputDto is then kept in memory. Clients send JSON-RPC 2.0
+requests, one JSON object per line, over a Unix socket, and receive one JSON response per line.
+
+The content is held by a ContentServer, which validates again only the objects affected by a
+changed file, and keeps the previous version of the content if the change does not validate.
+
+Methods:
+    validate {"path": str}: Validate a file which has been created, modified, or deleted
+    dependents {"name": str, "transitive": bool}: The content which depends on the named content
+    dependencies {"name": str}: The content which the named content depends on
+    render {"name": str}: The conf file stanzas that a build writes for the named content
+    reload {}: Validate the whole pack again
+    status {}: The amount of each type of content that is loaded
+    shutdown {}: Stop the server
+"""
+from __future__ import annotations
+import json
+import time
+import socket
+import pathlib
+import socketserver
+from typing import Any, Optional
+
+from contentctl.input.content_server import ContentServer
+from contentctl.objects.config import serve
+
+
+class ServeRequestHandler(socketserver.StreamRequestHandler):
+    server: ServeSocketServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if len(line.strip()) == 0:
+                continue
+            start = time.perf_counter()
+            response = self.server.content_server.handleRequest(line.decode("utf-8"))
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                self.logResponse(response, time.perf_counter() - start)
+            if self.server.shutdown_requested:
+                # shutdown() blocks until serve_forever returns, so it must be called from a
+                # thread other than the one running serve_forever
+                self.server.shutdown()
+                return
+
+    def logResponse(self, response: dict[str, Any], seconds: float) -> None:
+        if "error" in response:
+            status = f"error: {response['error']['message']}"
+        elif isinstance(response["result"], dict) and "valid" in response["result"]:
+            status = "valid" if response["result"]["valid"] else f"{len(response['result']['errors'])} error(s)"
+        else:
+            status = "ok"
+        print(f"Request {response['id']}: {status} [{seconds * 1000:.1f}ms]", flush=True)
+
+
+# socketserver only defines the Unix socket servers on platforms with Unix sockets, so the server
+# is only defined where it can run, and Serve.execute explains why it cannot run everywhere else
+if hasattr(socket, "AF_UNIX"):
+    class ServeSocketServer(socketserver.ThreadingUnixStreamServer):
+        # Each client gets its own connection thread, but requests are handled one at a time
+        daemon_threads = True
+
+        def __init__(self, socket_path: pathlib.Path, content_server: ContentServer):
+            self.content_server = content_server
+            self.shutdown_requested = False
+            content_server.methods["shutdown"] = self.requestShutdown
+            super().__init__(str(socket_path), ServeRequestHandler)
+
+        def requestShutdown(self, params: dict[str, Any]) -> dict[str, Any]:
+            self.shutdown_requested = True
+            return {"shutting_down": True}
+
+
+def requestServer(socket_path: pathlib.Path, method: str, params: Optional[dict[str, Any]] = None) -> Any:
+    """
+    Send a single request to a running 'contentctl serve'.
+
+    Args:
+        socket_path (pathlib.Path): The socket that the server is listening on
+        method (str): The method to call
+        params (Optional[dict[str, Any]], optional): The params of the method. Defaults to None.
+
+    Raises:
+        Exception: The server returned an error
+
+    Returns:
+        Any: The result of the request
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with client.makefile("rb") as responses:
+            response = json.loads(responses.readline())
+    if "error" in response:
+        raise Exception(f"contentctl serve returned an error for '{method}': {response['error']['message']}")
+    return response["result"]
+
+
+class Serve:
+
+    def execute(self, input_dto: serve) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise Exception("'contentctl serve' requires Unix socket support, which is not available on this platform")
+
+        socket_path = input_dto.getSocketPath()
+        input_dto.ensureCachePathExists()
+        self.removeStaleSocket(socket_path)
+
+        start = time.perf_counter()
+        content_server = ContentServer(input_dto)
+        print(f"Loaded the content pack in {time.perf_counter() - start:.1f}s")
+
+        try:
+            server = ServeSocketServer(socket_path, content_server)
+        except OSError as e:
+            raise Exception(f"Failed to listen on {socket_path}: {str(e)}. Use --socket to listen on a different path.")
+        try:
+            print(f"Listening for JSON-RPC requests on {socket_path}", flush=True)
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            socket_path.unlink(missing_ok=True)
+        print("contentctl serve stopped")
+
+    def removeStaleSocket(self, socket_path: pathlib.Path) -> None:
+        # A server that did not stop cleanly leaves its socket behind, which would prevent binding to it
+        if not socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(str(socket_path))
+            except OSError:
+                socket_path.unlink()
+                return
+        raise Exception(f"Another 'contentctl serve' is already listening on {socket_path}")
@@ -10,6 +10,10 @@ from contentctl.helper.utils import Utils
 from contentctl.objects.data_source import DataSource
 from contentctl.helper.splunk_app import SplunkApp
 
+# The files which lookups are made of. Any other file in the lookups directory is an error.
+LOOKUP_FILE_EXTENSIONS = frozenset([".csv", ".mlmodel"])
+LOOKUPS_DIRECTORY_ALLOWED_EXTENSIONS = LOOKUP_FILE_EXTENSIONS | {".yml"}
+
 
 class Validate:
     def execute(self, input_dto: validate) -> DirectorOutputDto:
@@ -29,6 +33,13 @@ class Validate:
             []
         )
 
+        # The enrichments are only used by detections, which are validated last. Load them in the
+        # background while the rest of the content is parsed. Incremental runs often validate few
+        # or no detections, so they leave the enrichments to be loaded on first use, if at all.
+        if not input_dto.incremental:
+            director_output_dto.atomic_enrichment.warm()
+            director_output_dto.attack_enrichment.warm()
+
         director = Director(director_output_dto)
         director.execute(input_dto)
         self.ensure_no_orphaned_files_in_lookups(input_dto.path, director_output_dto)
@@ -62,15 +73,21 @@ class Validate:
             the app when it is built (which can cause appinspect errors or larger app size.)
         """        
         lookupsDirectory = repo_path/"lookups"
-        
+        file_index = director_output_dto.file_index
+        if not file_index.hasDirectory(lookupsDirectory):
+            raise Exception(f"Unable to get security_content files, required directory '{str(lookupsDirectory)}' does not exist or is not a directory")
+
         # Get all of the files referneced by Lookups
-        usedLookupFiles:list[pathlib.Path] = [lookup.filename for lookup in director_output_dto.lookups if lookup.filename is not None] + [lookup.file_path for lookup in director_output_dto.lookups if lookup.file_path is not None]
+        usedLookupFiles:set[pathlib.Path] = {lookup.filename for lookup in director_output_dto.lookups if lookup.filename is not None} | {lookup.file_path for lookup in director_output_dto.lookups if lookup.file_path is not None}
+
+        # Only .yml, .csv, and .mlmodel files are allowed in the lookups directory
+        lookupsFiles = [filePath for filePath in file_index.getFiles(lookupsDirectory) if "." in filePath.name]
+        erroneousFiles = [filePath for filePath in lookupsFiles if filePath.suffix not in LOOKUPS_DIRECTORY_ALLOWED_EXTENSIONS]
+        if len(erroneousFiles) > 0:
+            raise Exception(f"The following files are not allowed in the directory '{lookupsDirectory}'. Only files with the extensions {sorted(LOOKUPS_DIRECTORY_ALLOWED_EXTENSIONS)} are allowed:{[str(filePath) for filePath in erroneousFiles]}")
 
-        # Get all of the mlmodel and csv files in the lookups directory
-        csvAndMlmodelFiles  = Utils.get_security_content_files_from_directory(lookupsDirectory, allowedFileExtensions=[".yml",".csv",".mlmodel"], fileExtensionsToReturn=[".csv",".mlmodel"])
-        
         # Generate an exception of any csv or mlmodel files exist but are not used
-        unusedLookupFiles:list[pathlib.Path] = [testFile for testFile in csvAndMlmodelFiles if testFile not in usedLookupFiles]
+        unusedLookupFiles:list[pathlib.Path] = [testFile for testFile in lookupsFiles if testFile.suffix in LOOKUP_FILE_EXTENSIONS and testFile not in usedLookupFiles]
         if len(unusedLookupFiles) > 0:
             raise Exception(f"The following .csv or .mlmodel files exist in '{lookupsDirectory}', but are not referenced by a lookup file: {[str(path) for path in unusedLookupFiles]}")
         return
@@ -0,0 +1,96 @@
+import time
+import pathlib
+from typing import Any, Optional
+
+from contentctl.actions.build import Build, BuildInputDto
+from contentctl.input.content_server import ContentServer, ServeRequestError
+from contentctl.input.dependency_graph import SECURITY_CONTENT_TYPE_DEPENDENCIES, getTopologicalOrder
+from contentctl.objects.config import validate, build
+from contentctl.helper.file_watcher import FileWatcher
+
+# Changed files are validated in the same order as a full validation, so that, for example, a
+# new macro is validated before a new detection which uses it
+CONTENT_DIRECTORY_ORDER = {contentType.name: index for index, contentType in
+                           enumerate(getTopologicalOrder(SECURITY_CONTENT_TYPE_DEPENDENCIES))}
+
+
+class Watch:
+    # Files whose latest version did not validate. They are validated again along with every
+    # change, since a change to other content (such as a macro they use) may fix them.
+    failed_files: set[pathlib.Path]
+
+    def execute(self, input_dto: validate) -> None:
+        self.failed_files = set()
+        root = input_dto.path.resolve()
+        watcher = FileWatcher(root/contentType.name for contentType in SECURITY_CONTENT_TYPE_DEPENDENCIES)
+        content_server = self.load(input_dto)
+        try:
+            while True:
+                print("\nWatching the content directories for changes (press Ctrl+C to stop)...", flush=True)
+                changes = watcher.waitForChanges()
+                start = time.perf_counter()
+                if content_server is None:
+                    # Nothing has validated successfully yet, so there is nothing to update
+                    content_server = self.load(input_dto)
+                    continue
+                if self.validateChanges(content_server, root, changes | self.failed_files):
+                    print(f"Validated the changes to [{len(changes)}] file(s) in {time.perf_counter() - start:.2f}s")
+                    self.build(content_server, input_dto)
+        except KeyboardInterrupt:
+            print("\nStopped watching for changes")
+
+    def load(self, input_dto: validate) -> Optional[ContentServer]:
+        try:
+            content_server = ContentServer(input_dto)
+        except Exception as e:
+            print(f"{str(e)}\n\nFix the errors above, and the content will be validated again when it is saved.")
+            return None
+        self.build(content_server, input_dto)
+        return content_server
+
+    def build(self, content_server: ContentServer, input_dto: validate) -> None:
+        if not isinstance(input_dto, build):
+            return
+        start = time.perf_counter()
+        Build().execute(BuildInputDto(content_server.output_dto, input_dto))
+        print(f"Built the app in {time.perf_counter() - start:.2f}s")
+
+    def validateChanges(self, content_server: ContentServer, path: pathlib.Path, changes: set[pathlib.Path]) -> bool:
+        """
+        Validate every changed file, and the content which depends on it. The last version of any
+        content which does not validate is kept, so the app is not built again until every error
+        has been fixed.
+
+        Args:
+            content_server (ContentServer): The validated content, which is updated
+            path (pathlib.Path): The absolute path to the root of the content pack
+            changes (set[pathlib.Path]): The files which changed
+
+        Returns:
+            bool: Whether every change validated successfully
+        """
+        def contentOrder(file: pathlib.Path) -> tuple[int, str]:
+            return (CONTENT_DIRECTORY_ORDER.get(file.relative_to(path).parts[0], len(CONTENT_DIRECTORY_ORDER)), str(file))
+
+        errors: list[dict[str, Any]] = []
+        for file in sorted(changes, key=contentOrder):
+            try:
+                result = content_server.validate({"path": str(file)})
+            except ServeRequestError as e:
+                result = {"valid": False, "errors": [{"file": str(file), "error": e.message}], "reloaded": False}
+            errors.extend(result["errors"])
+            if result["reloaded"]:
+                # All of the content was validated again, including any other changes
+                self.failed_files = set() if result["valid"] else {file}
+                break
+            if result["valid"]:
+                self.failed_files.discard(file)
+            else:
+                self.failed_files.add(file)
+
+        if len(errors) > 0:
+            errors_string = "\n\n".join(f"File: {error['file']}\nError: {error['error']}" if error["file"] is not None
+                                        else error["error"] for error in errors)
+            print(f"The following {len(errors)} error(s) were found during validation:\n\n{errors_string}\n\nVALIDATION FAILED")
+            return False
+        return True
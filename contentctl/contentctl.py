@@ -1,25 +1,21 @@
+from __future__ import annotations
 import traceback
 import sys
 import warnings
 import pathlib
+from typing import TYPE_CHECKING
 import tyro
 
-from contentctl.actions.initialize import Initialize
-from contentctl.objects.config import init, validate, build,  new, deploy_acs, test, test_servers, inspect, report, test_common, release_notes
-from contentctl.actions.validate import Validate
-from contentctl.actions.new_content import NewContent
-from contentctl.actions.detection_testing.GitService import GitService
-from contentctl.actions.build import (
-     BuildInputDto,
-     DirectorOutputDto,
-     Build,
-)
-from contentctl.actions.test import Test
-from contentctl.actions.test import TestInputDto
-from contentctl.actions.reporting import ReportingInputDto, Reporting
-from contentctl.actions.inspect import Inspect
+from contentctl.objects.config import init, validate, build,  new, deploy_acs, test, test_servers, inspect, report, test_common, release_notes, serve
 from contentctl.input.yml_reader import YmlReader
-from contentctl.actions.release_notes import ReleaseNotes
+from contentctl.helper.profiler import PROFILER, ProfileSnapshot
+
+# The actions are imported by the function for each subcommand, rather than here, so that
+# starting contentctl only loads the modules needed by the subcommand that is run. Several
+# of them (docker, splunklib, attackcti, questionary, pygit2...) are slow to import.
+# tests/test_import_time.py fails if any of them are imported by this module again.
+if TYPE_CHECKING:
+    from contentctl.input.director import DirectorOutputDto
 
 # def print_ascii_art():
 #     print(
@@ -55,18 +51,30 @@ from contentctl.actions.release_notes import ReleaseNotes
 
 
 def init_func(config:test):    
+    from contentctl.actions.initialize import Initialize
     Initialize().execute(config)
 
 
 def validate_func(config:validate)->DirectorOutputDto:
+    from contentctl.actions.validate import Validate
     validate = Validate()
-    return validate.execute(config)
+    with PROFILER.phase("validate"):
+        return validate.execute(config)
+
+def watch_func(config:validate)->None:
+    from contentctl.actions.watch import Watch
+    Watch().execute(config)
+
+def serve_func(config:serve)->None:
+    from contentctl.actions.serve import Serve
+    Serve().execute(config)
 
 def report_func(config:report)->None:
     # First, perform validation. Remember that the validate
     # configuration is actually a subset of the build configuration
     director_output_dto = validate_func(config)
     
+    from contentctl.actions.reporting import ReportingInputDto, Reporting
     r = Reporting() 
     return r.execute(ReportingInputDto(director_output_dto=director_output_dto, 
                                        config=config))
@@ -76,20 +84,26 @@ def build_func(config:build)->DirectorOutputDto:
     # First, perform validation. Remember that the validate
     # configuration is actually a subset of the build configuration
     director_output_dto = validate_func(config)
+    from contentctl.actions.build import BuildInputDto, Build
     builder = Build()
-    return builder.execute(BuildInputDto(director_output_dto, config))
+    with PROFILER.phase("build"):
+        return builder.execute(BuildInputDto(director_output_dto, config))
 
 def inspect_func(config:inspect)->str:
     #Make sure that we have built the most recent version of the app
     _ = build_func(config)
-    inspect_token = Inspect().execute(config)
+    from contentctl.actions.inspect import Inspect
+    with PROFILER.phase("inspect"):
+        inspect_token = Inspect().execute(config)
     return inspect_token
     
 
 def release_notes_func(config:release_notes)->None:
+    from contentctl.actions.release_notes import ReleaseNotes
     ReleaseNotes().release_notes(config)
 
 def new_func(config:new):
+    from contentctl.actions.new_content import NewContent
     NewContent().execute(config)
 
 
@@ -105,6 +119,8 @@ def test_common_func(config:test_common):
         #otherwise, they have already been passed as servers
 
     director_output_dto = build_func(config)
+    from contentctl.actions.detection_testing.GitService import GitService
+    from contentctl.actions.test import Test, TestInputDto
     gitServer = GitService(director=director_output_dto,config=config)
     detections_to_test = gitServer.getContent()
 
@@ -120,7 +136,8 @@ def test_common_func(config:test_common):
         config.dumpCICDPlanAndQuit(gitServer.getHash(),test_input_dto.detections)
         return 
     
-    success = t.execute(test_input_dto)
+    with PROFILER.phase("test"):
+        success = t.execute(test_input_dto)
     
     if success:
         #Everything passed!
@@ -128,7 +145,14 @@ def test_common_func(config:test_common):
         return
     raise Exception("There was at least one unsuccessful test")
 
+def writeProfile(config:validate)->None:
+    config.ensureCachePathExists()
+    trace_path, summary_path = PROFILER.writeReport(config.profile_path)
+    print(f"\n{PROFILER.getSummary()}\n\n"
+          f"Wrote the profile to {summary_path} and the Chrome trace to {trace_path}")
+
 def main():
+    config_load_start = ProfileSnapshot.now()
     try:
         configFile = pathlib.Path("contentctl.yml")
         
@@ -146,7 +170,6 @@ def main():
             # It will be used during init workflow
 
             t = test()
-            config_obj = t.model_dump()
             
         else:
             #The file exists, so load it up!
@@ -161,26 +184,26 @@ def main():
     # of an object from default values WITHOUT requiring all fields to be declared
     # with defaults OR in the config file. As such, we construct the model rather
     # than model_validating it so that validation does not run on missing required fields.
-    # Note that we HAVE model_validated the test object fields already above
-
+    # Every other subcommand's fields are either a subset of test's, which has already been
+    # validated above, or are left at their defaults. tyro validates the model of the
+    # subcommand that is actually selected when it creates it from the command line, so
+    # contentctl.yml is not validated again for each subcommand.
     models = tyro.extras.subcommand_type_from_defaults(
         {
-            "init":init.model_validate(config_obj),
-            "validate": validate.model_validate(config_obj),
-            "report": report.model_validate(config_obj),
-            "build":build.model_validate(config_obj),
+            "init":init.model_construct(**t.__dict__),
+            "validate": validate.model_construct(**t.__dict__),
+            "serve": serve.model_construct(**t.__dict__),
+            "report": report.model_construct(**t.__dict__),
+            "build":build.model_construct(**t.__dict__),
             "inspect": inspect.model_construct(**t.__dict__),
-            "new":new.model_validate(config_obj),
-            "test":test.model_validate(config_obj),
+            "new":new.model_construct(**t.__dict__),
+            "test":t,
             "test_servers":test_servers.model_construct(**t.__dict__),
-            "release_notes": release_notes.model_construct(**config_obj),
+            "release_notes": release_notes.model_construct(**t.__dict__),
             "deploy_acs": deploy_acs.model_construct(**t.__dict__)
         }
     )
     
-
-
-   
     config = None
     try:
         # Since some model(s) were constructed and not model_validated, we have to catch
@@ -188,12 +211,19 @@ def main():
         with warnings.catch_warnings(action="ignore"):
             config = tyro.cli(models)
 
+        if isinstance(config, validate) and config.profile:
+            PROFILER.enable()
+            PROFILER.recordPhase("config load", config_load_start)
         
         if type(config) == init:
             t.__dict__.update(config.__dict__)
             init_func(t)
+        elif type(config) in (validate, build) and config.watch:
+            watch_func(config)
         elif type(config) == validate:
             validate_func(config)
+        elif type(config) == serve:
+            serve_func(config)
         elif type(config) == report:
             report_func(config)
         elif type(config) == build:
@@ -229,6 +259,10 @@ def main():
             print(e)
             
         sys.exit(1)
+    finally:
+        # Write the profile even if the command failed, since it shows how far the command got
+        if isinstance(config, validate) and PROFILER.enabled:
+            writeProfile(config)
 
 
 if __name__ == "__main__":
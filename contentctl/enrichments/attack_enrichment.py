@@ -1,32 +1,60 @@
 
 from __future__ import annotations
 import sys
-from attackcti import attack_client
 import logging
-from pydantic import BaseModel
+import functools
+from pydantic import BaseModel, PrivateAttr
 from dataclasses import field
-from typing import Any
+from typing import Any, Optional
 from pathlib import Path
 from contentctl.objects.mitre_attack_enrichment import MitreAttackEnrichment, MitreTactics
 from contentctl.objects.config import validate
 from contentctl.objects.annotated_types import MITRE_ATTACK_ID_TYPE
+from contentctl.enrichments.enrichment_snapshot import EnrichmentSnapshot
+from contentctl.enrichments.enrichment_loader import EnrichmentLoader
 logging.getLogger('taxii2client').setLevel(logging.CRITICAL)
 
 
 class AttackEnrichment(BaseModel):
     data: dict[str, MitreAttackEnrichment] = field(default_factory=dict)
     use_enrichment:bool = True
+    _loader: Optional[EnrichmentLoader] = PrivateAttr(default=None)
     
     @staticmethod
     def getAttackEnrichment(config:validate)->AttackEnrichment:
         enrichment = AttackEnrichment(use_enrichment=config.enrichments)
-        _ = enrichment.get_attack_lookup(config.mitre_cti_repo_path, config.enrichments)
+        if config.enrichments:
+            # Nothing is loaded until the first technique is looked up or warm() is called
+            enrichment._loader = EnrichmentLoader(functools.partial(enrichment.loadAttackData, config), "MITRE ATT&CK")
         return enrichment
+
+    def loadAttackData(self, config:validate)->None:
+        # Parsing the STIX bundles is slow, so the result is saved and reused
+        # until a different commit of the cti repo is checked out
+        snapshot = EnrichmentSnapshot(config.ensureCachePathExists()/"mitre_attack_enrichment.pickle", config.mitre_cti_repo_path)
+        data = None if config.rebuild_enrichment_cache else snapshot.load()
+        if data is not None:
+            print(f"Loaded MITRE Enrichment for the repository at {config.mitre_cti_repo_path} from {snapshot.snapshot_path}")
+            self.data = data
+            return
+
+        _ = self.get_attack_lookup(config.mitre_cti_repo_path, config.enrichments)
+        snapshot.save(self.data)
+
+    def warm(self)->None:
+        # Start loading the enrichment in the background so that it is ready by the time it is needed
+        if self._loader is not None:
+            self._loader.startWarming()
+
+    def ensureLoaded(self)->None:
+        if self._loader is not None:
+            self._loader.ensureLoaded()
     
     def getEnrichmentByMitreID(self, mitre_id:MITRE_ATTACK_ID_TYPE)->MitreAttackEnrichment:
         if not self.use_enrichment:
             raise Exception("Error, trying to add Mitre Enrichment, but use_enrichment was set to False")
         
+        self.ensureLoaded()
         enrichment = self.data.get(mitre_id, None)
         if enrichment is not None:
             return enrichment
@@ -83,6 +111,9 @@ class AttackEnrichment(BaseModel):
                                         f"{[str(enterprise_path),str(mobile_path),str(ics_path)]}. "
                                         f"Please ensure that the {input_path} directory "
                                         "has been git cloned correctly.") 
+            # attackcti (and stix2) are slow to import, so they are only imported when the
+            # enrichment is actually parsed rather than loaded from a snapshot
+            from attackcti import attack_client
             lift = attack_client(
                 local_paths= {
                     "enterprise":str(enterprise_path),
@@ -95,14 +126,23 @@ class AttackEnrichment(BaseModel):
             enterprise_relationships = lift.get_enterprise_relationships(stix_format=False)
             enterprise_groups = lift.get_enterprise_groups(stix_format=False)
             
+            # Index the groups by id and the intrusion-set relationships by the technique they
+            # target, so that each technique is joined with its groups without scanning every
+            # relationship and group. The lists keep the order of the bundle, so the groups of
+            # each technique are found in exactly the same order as a nested scan would find them.
+            groups_by_id:dict[str,list[dict[str,Any]]] = {}
+            for group in enterprise_groups:
+                groups_by_id.setdefault(group['id'], []).append(group)
+
+            group_ids_by_target:dict[str,list[str]] = {}
+            for relationship in enterprise_relationships:
+                if relationship['source_object'].startswith('intrusion-set'):
+                    group_ids_by_target.setdefault(relationship['target_object'], []).append(relationship['source_object'])
+
             for technique in all_enterprise_techniques:
                 apt_groups:list[dict[str,Any]] = []
-                for relationship in enterprise_relationships:
-                    if (relationship['target_object'] == technique['id']) and relationship['source_object'].startswith('intrusion-set'):
-                        for group in enterprise_groups:
-                            if relationship['source_object'] == group['id']:
-                                apt_groups.append(group)
-                                #apt_groups.append(group['group'])
+                for group_id in group_ids_by_target.get(technique['id'], []):
+                    apt_groups.extend(groups_by_id.get(group_id, []))
 
                 tactics = []
                 if ('tactic' in technique):
@@ -0,0 +1,52 @@
+import threading
+from typing import Callable, Optional
+
+from contentctl.helper.profiler import PROFILER
+
+
+class EnrichmentLoader():
+    """
+    Loads the data for an enrichment the first time that it is needed, rather than when the
+    enrichment is constructed. Loading may also be started early in a background thread, with
+    startWarming, so that it overlaps with other work such as parsing content. Either way,
+    the data is only ever loaded once and ensureLoaded blocks until it is available.
+    """
+
+    def __init__(self, load: Callable[[], None], name: str):
+        self.load = load
+        self.name = name
+        self.loaded = False
+        self.error: Optional[Exception] = None
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    def startWarming(self) -> None:
+        if self.loaded or self.thread is not None:
+            return
+        # This is not a daemon thread. If contentctl finishes before the data is needed, the
+        # interpreter waits for the load to finish rather than killing it halfway through
+        # writing an enrichment snapshot.
+        self.thread = threading.Thread(target=self.tryLoad, name="EnrichmentLoader")
+        self.thread.start()
+
+    def tryLoad(self) -> None:
+        try:
+            self.ensureLoaded()
+        except Exception:
+            # Recorded in self.error and raised again by the next call to ensureLoaded
+            pass
+
+    def ensureLoaded(self) -> None:
+        if self.loaded:
+            return
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            if not self.loaded:
+                try:
+                    with PROFILER.phase(f"load enrichment: {self.name}"):
+                        self.load()
+                except Exception as e:
+                    self.error = e
+                    raise
+                self.loaded = True
@@ -0,0 +1,78 @@
+import os
+import pickle
+import pathlib
+import tempfile
+import importlib.metadata
+from typing import Any, Optional
+
+import pygit2
+
+
+class EnrichmentSnapshot():
+    """
+    A compiled copy of the enrichment data parsed from one of the repos in external_repos,
+    such as https://github.com/mitre/cti. The snapshot is keyed by the commit that the repo
+    had checked out (and the version of contentctl) when it was written, so it is only used
+    while the repo is still at that commit. Uncommitted changes to the repo are not detected.
+    """
+
+    def __init__(self, snapshot_path: pathlib.Path, repo_path: pathlib.Path):
+        self.snapshot_path = snapshot_path
+        self.repo_path = repo_path
+
+    @staticmethod
+    def getRepoHead(repo_path: pathlib.Path) -> Optional[str]:
+        try:
+            return str(pygit2.Repository(str(repo_path)).head.target)
+        except Exception:
+            # Not a git repo (for example, it was downloaded as a zip) or HEAD is unborn.
+            # Without a commit to key on, the snapshot can never be trusted.
+            return None
+
+    def getKey(self) -> Optional[str]:
+        head = self.getRepoHead(self.repo_path)
+        if head is None:
+            return None
+        try:
+            contentctl_version = importlib.metadata.version("contentctl")
+        except importlib.metadata.PackageNotFoundError:
+            contentctl_version = "unknown"
+        return f"{contentctl_version}|{head}"
+
+    def load(self) -> Optional[Any]:
+        """
+        Return the data in the snapshot, or None if there is no snapshot or if it was
+        written for a different commit of the repo or version of contentctl.
+
+        Returns:
+            Optional[Any]: The data passed to save, or None
+        """
+        key = self.getKey()
+        if key is None:
+            return None
+        try:
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                snapshot: dict[str, Any] = pickle.load(snapshot_file)
+        except Exception:
+            return None
+        if snapshot.get("key") != key:
+            return None
+        return snapshot["data"]
+
+    def save(self, data: Any) -> None:
+        key = self.getKey()
+        if key is None:
+            return
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.snapshot_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as temp_file:
+                    pickle.dump({"key": key, "data": data}, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.snapshot_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except Exception:
+            # Failing to write the snapshot only means that it will be rebuilt next time
+            pass
@@ -0,0 +1,67 @@
+import time
+import pathlib
+from typing import Iterable
+
+from contentctl.input.file_index import FileIndex
+
+# How often the directories are scanned for changes, in seconds
+POLL_INTERVAL_SECONDS = 0.5
+# Editors often write a file several times when it is saved, and checking out a branch changes
+# many files at once, so changes are only reported once no more have been seen for this long
+DEBOUNCE_SECONDS = 0.3
+# The types of files that content is made of. Anything else, such as the swap and backup files
+# written by editors, is ignored.
+WATCHED_SUFFIXES = frozenset([".yml", ".csv", ".mlmodel"])
+
+
+class FileWatcher():
+    """
+    Detects files which are created, modified, or deleted in a set of directories by polling them.
+    Polling works the same way on every platform and filesystem, including network filesystems
+    and container mounts which do not deliver inotify events, and scanning the directories of
+    even a large content pack takes only a few milliseconds.
+    """
+
+    def __init__(self, directories: Iterable[pathlib.Path], poll_interval: float = POLL_INTERVAL_SECONDS,
+                 debounce: float = DEBOUNCE_SECONDS, suffixes: frozenset[str] = WATCHED_SUFFIXES):
+        self.directories = list(directories)
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.suffixes = suffixes
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[pathlib.Path, tuple[int, int]]:
+        # Maps every watched file to its modification time and size
+        index = FileIndex(self.directories)
+        return {path: (entry.mtime_ns, entry.size) for path, entry in index.entries.items()
+                if path.suffix in self.suffixes and not path.name.startswith(".")}
+
+    def getChanges(self) -> set[pathlib.Path]:
+        # Return the files which changed since the previous call
+        snapshot = self.scan()
+        changes = {path for path, state in snapshot.items() if self.snapshot.get(path) != state}
+        changes.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changes
+
+    def waitForChanges(self) -> set[pathlib.Path]:
+        """
+        Block until at least one file changes, and then until no more files have changed for the
+        debounce period.
+
+        Returns:
+            set[pathlib.Path]: Every file which was created, modified, or deleted
+        """
+        changes: set[pathlib.Path] = set()
+        while len(changes) == 0:
+            time.sleep(self.poll_interval)
+            changes = self.getChanges()
+
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(min(self.poll_interval, self.debounce))
+            more_changes = self.getChanges()
+            if len(more_changes) > 0:
+                changes.update(more_changes)
+                quiet_since = time.monotonic()
+        return changes
@@ -0,0 +1,29 @@
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+# Imported once by the fork server, rather than by every worker that it forks. The director
+# imports every type of content, which workers need to unpickle the objects that they are sent.
+FORKSERVER_PRELOAD = ["contentctl.input.yml_reader",
+                      "contentctl.input.lookup_csv_checker",
+                      "contentctl.input.director",
+                      "contentctl.objects.atomic",
+                      "contentctl.output.conf_writer"]
+
+
+def getProcessPoolContext() -> BaseContext:
+    """
+    The context that every pool of worker processes is started with. Workers are never forked
+    directly from contentctl, since other threads may be running when a pool is started (the
+    enrichment loaders, or the request handlers of 'contentctl serve'), and a child forked while
+    another thread holds a lock, such as an import lock, can deadlock. The fork server is started
+    as a fresh interpreter, and forks the workers from there. Where there is no fork server
+    (Windows), workers are spawned.
+
+    Returns:
+        BaseContext: The context to pass as mp_context to ProcessPoolExecutor
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
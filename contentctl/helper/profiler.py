@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import pathlib
+import threading
+import contextlib
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # The resource module is not available on Windows, so peak memory use is not recorded there
+    resource = None
+
+# The number of files listed in the summary, slowest first
+SLOWEST_FILES_IN_SUMMARY = 20
+
+
+def getPeakRssMb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, but in kilobytes everywhere else
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass(frozen=True)
+class ProfileSnapshot:
+    wall: float
+    cpu: float
+
+    @staticmethod
+    def now() -> "ProfileSnapshot":
+        return ProfileSnapshot(wall=time.perf_counter(), cpu=time.process_time())
+
+
+@dataclass(frozen=True)
+class ProfilePhase:
+    name: str
+    start: float
+    wall_seconds: float
+    # The CPU time of the whole process, across all of its threads, during the phase
+    cpu_seconds: float
+    # The high-water mark of the memory use of the process at the end of the phase
+    peak_rss_mb: Optional[float]
+    depth: int
+    thread_id: int
+    thread_name: str
+
+
+class Profiler():
+    """
+    Records the wall time, CPU time, and peak memory use of each phase of a contentctl command,
+    and the time spent parsing and validating each file. Nothing is recorded unless the profiler
+    has been enabled (with --profile), so phases may be marked unconditionally.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = ProfileSnapshot.now()
+        self.phases: list[ProfilePhase] = []
+        self.file_seconds: dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = ProfileSnapshot.now()
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.local.depth = depth
+            self.recordPhase(name, start, depth)
+
+    def recordPhase(self, name: str, start: ProfileSnapshot, depth: int = 0) -> None:
+        """
+        Record a phase which started at start and ends now. This is used for phases which
+        began before the profiler could be enabled, such as loading the config.
+
+        Args:
+            name (str): The name of the phase
+            start (ProfileSnapshot): The snapshot taken when the phase started
+            depth (int, optional): How deeply the phase is nested in other phases. Defaults to 0.
+        """
+        if not self.enabled:
+            return
+        end = ProfileSnapshot.now()
+        thread = threading.current_thread()
+        phase = ProfilePhase(name=name,
+                             start=start.wall - self.origin.wall,
+                             wall_seconds=end.wall - start.wall,
+                             cpu_seconds=end.cpu - start.cpu,
+                             peak_rss_mb=getPeakRssMb(),
+                             depth=depth,
+                             thread_id=thread.ident or 0,
+                             thread_name=thread.name)
+        with self.lock:
+            self.phases.append(phase)
+
+    def recordFile(self, file_path: pathlib.Path, seconds: float) -> None:
+        # Parsing and validating a file are recorded separately, so the times are summed
+        if not self.enabled:
+            return
+        with self.lock:
+            self.file_seconds[str(file_path)] = self.file_seconds.get(str(file_path), 0) + seconds
+
+    def getChromeTrace(self) -> dict[str, Any]:
+        pid = os.getpid()
+        events: list[dict[str, Any]] = []
+        for thread_id, thread_name in sorted({(phase.thread_id, phase.thread_name) for phase in self.phases}):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                           "args": {"name": thread_name}})
+        for phase in self.phases:
+            events.append({"name": phase.name, "cat": "contentctl", "ph": "X", "pid": pid, "tid": phase.thread_id,
+                           "ts": round(phase.start * 1_000_000), "dur": round(phase.wall_seconds * 1_000_000),
+                           "args": {"cpu_seconds": round(phase.cpu_seconds, 6), "peak_rss_mb": phase.peak_rss_mb}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def getSummary(self) -> str:
+        lines = [f"{'Phase':<60} {'Wall (s)':>10} {'CPU (s)':>10} {'Peak RSS (MB)':>14}"]
+        # Phases are recorded as they end, so order them by when they started
+        for phase in sorted(self.phases, key=lambda phase: (phase.start, phase.depth)):
+            name = "  " * phase.depth + phase.name
+            if phase.thread_name != threading.main_thread().name:
+                name += f" [{phase.thread_name}]"
+            peak_rss = f"{phase.peak_rss_mb:14.1f}" if phase.peak_rss_mb is not None else f"{'-':>14}"
+            lines.append(f"{name:<60} {phase.wall_seconds:10.3f} {phase.cpu_seconds:10.3f} {peak_rss}")
+
+        slowest = sorted(self.file_seconds.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_FILES_IN_SUMMARY]
+        if len(slowest) > 0:
+            lines.append("")
+            lines.append(f"Slowest {len(slowest)} of {len(self.file_seconds)} files to parse and validate:")
+            for file_path, seconds in slowest:
+                lines.append(f"{seconds:10.4f}s  {file_path}")
+        return "\n".join(lines)
+
+    def writeReport(self, output_path: pathlib.Path) -> tuple[pathlib.Path, pathlib.Path]:
+        """
+        Write the Chrome trace, which can be opened in chrome://tracing or https://ui.perfetto.dev,
+        and the text summary of everything that has been recorded.
+
+        Args:
+            output_path (pathlib.Path): The directory to write the trace and summary to
+
+        Returns:
+            tuple[pathlib.Path, pathlib.Path]: The paths to the trace and the summary
+        """
+        output_path.mkdir(parents=True, exist_ok=True)
+        trace_path = output_path/"trace.json"
+        summary_path = output_path/"summary.txt"
+        with open(trace_path, "w") as trace_file:
+            json.dump(self.getChromeTrace(), trace_file)
+        summary_path.write_text(self.getSummary() + "\n")
+        return trace_path, summary_path
+
+
+# There is one profile for each run of contentctl, shared by everything that it runs
+PROFILER = Profiler()
@@ -1,20 +1,18 @@
+from __future__ import annotations
 import os
-import git
 import shutil
-import requests
 import random
 import string
 from timeit import default_timer
 import pathlib
 
 from typing import Union, Tuple
-import tqdm
 from math import ceil
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
+    import tqdm
     from contentctl.objects.security_content_object import SecurityContentObject
-from contentctl.objects.security_content_object import SecurityContentObject
 
 
 TOTAL_BYTES = 0
@@ -126,6 +124,7 @@ class Utils:
     ) -> bool:
 
         # Get a list of all branches
+        import git
         repo = git.Repo(repo_path)
         if commit_hash is None:
             # No need to validate the hash, it was not supplied
@@ -172,6 +171,7 @@ class Utils:
         # to be the name of the branch that is the HEAD of the repo.
         # This means that it should work for ANY repo with a remote.
 
+        import git
         repo = git.Repo(repo_path)
 
         # Only works for remotes!
@@ -188,6 +188,7 @@ class Utils:
     @staticmethod
     def validate_git_branch_name(repo_path: str, repo_url: str, name: str) -> bool:
         # Get a list of all branches
+        import git
         repo = git.Repo(repo_path)
 
         all_branches = [branch.name for branch in repo.refs]
@@ -215,6 +216,7 @@ class Utils:
     @staticmethod
     def validate_git_pull_request(repo_path: str, pr_number: int) -> str:
         # Get a list of all branches
+        import git
         repo = git.Repo(repo_path)
         # List of all remotes that match this format.  If the PR exists, we
         # should find exactly one in the format SHA_HASH\tpull/pr_number/head
@@ -275,7 +277,8 @@ class Utils:
 
         # Try to make a head request to verify existence of the file
         try:
-            
+            import requests
+
             req = requests.head(
                 file_path, timeout=timeout_seconds, verify=True, allow_redirects=True
             )
@@ -345,6 +348,7 @@ class Utils:
         destinationPath = pathlib.Path(destination_file)
 
         if input_pbar is None:
+            import tqdm
             pbar = tqdm.tqdm(
                 total=100,
                 desc="Downloading File",
@@ -389,6 +393,9 @@ class Utils:
                 )
             )
 
+        # Imported here, rather than at the top of the module, because it is slow to import
+        # and most commands never download anything
+        import requests
         try:
             download_start_time = default_timer()
             bytes_written = 0
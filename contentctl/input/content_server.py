@@ -0,0 +1,406 @@
+"""
+The validated content of a pack, kept in memory and updated as files change, for 'contentctl
+serve' and for the --watch mode of validate and build. Nothing here uses sockets, so watch mode
+works on every platform.
+
+When a file changes, only the objects affected by it are validated again: a detection is
+validated on its own, and a macro or lookup is validated along with the detections which use
+it. Any other change (a story, a baseline, a deleted macro...) can affect too much content to
+track, so the whole pack is validated again. In every case, if the change does not validate,
+the previous version of the content is kept.
+"""
+from __future__ import annotations
+import json
+import time
+import pathlib
+import threading
+from typing import Any, Callable, Optional
+
+from pydantic import ValidationError
+
+from contentctl.actions.validate import Validate
+from contentctl.input.director import Director, DirectorOutputDto
+from contentctl.input.yml_reader import YmlReader
+from contentctl.input.dependency_graph import SECURITY_CONTENT_TYPE_DEPENDENCIES
+from contentctl.objects.config import validate
+from contentctl.objects.enums import SecurityContentType
+from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.detection import Detection
+from contentctl.objects.story import Story
+from contentctl.objects.baseline import Baseline
+from contentctl.objects.investigation import Investigation
+from contentctl.objects.macro import Macro
+from contentctl.objects.lookup import Lookup
+from contentctl.output.conf_writer import ConfWriter
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# The conf files, and the templates which write them, that a build writes each type of content to
+CONF_TEMPLATES: dict[type, list[tuple[str, str]]] = {
+    Detection: [("default/savedsearches.conf", "savedsearches_detections.j2"),
+                ("default/analyticstories.conf", "analyticstories_detections.j2")],
+    Story: [("default/analyticstories.conf", "analyticstories_stories.j2")],
+    Baseline: [("default/savedsearches.conf", "savedsearches_baselines.j2")],
+    Investigation: [("default/savedsearches.conf", "savedsearches_investigations.j2"),
+                    ("default/analyticstories.conf", "analyticstories_investigations.j2")],
+    Lookup: [("default/collections.conf", "collections.j2"),
+             ("default/transforms.conf", "transforms.j2")],
+    Macro: [("default/macros.conf", "macros.j2")],
+}
+
+
+class ServeRequestError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def placeInFileOrder(objects: list[SecurityContentObject], content: SecurityContentObject) -> None:
+    """
+    Move content to where a full validation would have put it. Content is validated in the
+    order of its file paths, and content generated at runtime, which has no file, comes after it.
+    Objects are compared by identity, since == raises for different versions of the same object.
+
+    Args:
+        objects (list[SecurityContentObject]): The list to move content within
+        content (SecurityContentObject): The content, which may or may not already be in objects
+    """
+    objects[:] = [obj for obj in objects if obj is not content]
+    index = len(objects)
+    if content.file_path is not None:
+        file_path = pathlib.Path(content.file_path)
+        for position, obj in enumerate(objects):
+            if obj.file_path is None or pathlib.Path(obj.file_path) > file_path:
+                index = position
+                break
+    objects.insert(index, content)
+
+
+def describeContent(content: SecurityContentObject) -> dict[str, Any]:
+    return {"name": content.name,
+            "type": type(content).__name__,
+            "file_path": str(content.file_path) if content.file_path is not None else None}
+
+
+class ContentServer():
+    """
+    Holds the validated content of the pack and answers requests about it. Requests are
+    handled one at a time, since they modify the DirectorOutputDto.
+    """
+
+    def __init__(self, config: validate):
+        self.config = config
+        self.root = config.path.resolve()
+        self.lock = threading.Lock()
+        self.methods: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "validate": self.validate,
+            "dependents": self.dependents,
+            "dependencies": self.dependencies,
+            "render": self.render,
+            "reload": self.reload,
+            "status": self.status,
+        }
+        self.setOutputDto(Validate().execute(config))
+
+    def setOutputDto(self, output_dto: DirectorOutputDto) -> None:
+        self.output_dto = output_dto
+        self.director = Director(output_dto)
+        self.director.input_dto = self.config
+        # Maps the absolute path of every file to the content defined by it
+        self.path_to_content: dict[pathlib.Path, SecurityContentObject] = {}
+        for content in output_dto.name_to_content_map.values():
+            self.addPath(content)
+
+    def addPath(self, content: SecurityContentObject) -> None:
+        if content.file_path is not None:
+            self.path_to_content[pathlib.Path(content.file_path).resolve()] = content
+        if isinstance(content, Lookup) and content.filename is not None:
+            self.path_to_content[pathlib.Path(content.filename).resolve()] = content
+
+    def removePath(self, content: SecurityContentObject) -> None:
+        for path in [path for path, obj in self.path_to_content.items() if obj is content]:
+            del self.path_to_content[path]
+
+    def handleRequest(self, line: str) -> Optional[dict[str, Any]]:
+        """
+        Handle one JSON-RPC request.
+
+        Args:
+            line (str): The request, serialized as JSON
+
+        Returns:
+            Optional[dict[str, Any]]: The response, or None if the request was a notification
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ServeRequestError(PARSE_ERROR, f"Failed to parse the request: {str(e)}")
+            if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(request.get("method"), str):
+                raise ServeRequestError(INVALID_REQUEST, "The request must be a JSON-RPC 2.0 request object")
+            request_id = request.get("id")
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise ServeRequestError(INVALID_PARAMS, "params must be an object")
+            method = self.methods.get(request["method"])
+            if method is None:
+                raise ServeRequestError(METHOD_NOT_FOUND, f"Unknown method '{request['method']}'")
+            with self.lock:
+                result = method(params)
+            if "id" not in request:
+                return None
+            return {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except ServeRequestError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+
+    def getParam(self, params: dict[str, Any], name: str, param_type: type) -> Any:
+        value = params.get(name)
+        if not isinstance(value, param_type):
+            raise ServeRequestError(INVALID_PARAMS, f"The '{name}' param must be a {param_type.__name__}")
+        return value
+
+    def getContent(self, params: dict[str, Any]) -> SecurityContentObject:
+        name = self.getParam(params, "name", str)
+        content = self.output_dto.name_to_content_map.get(name)
+        if content is None:
+            raise ServeRequestError(INVALID_PARAMS, f"No content named '{name}' has been loaded")
+        return content
+
+    def status(self, params: dict[str, Any]) -> dict[str, Any]:
+        return {"path": str(self.root),
+                "content": {contentType.name: len(getattr(self.output_dto, contentType.name))
+                            for contentType in SECURITY_CONTENT_TYPE_DEPENDENCIES}}
+
+    def dependents(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        content = self.getContent(params)
+        transitive = params.get("transitive", True)
+        dependents = self.output_dto.dependency_graph.getDependents(content, transitive=bool(transitive))
+        return sorted((describeContent(dependent) for dependent in dependents), key=lambda d: (d["type"], d["name"]))
+
+    def dependencies(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        dependencies = self.output_dto.dependency_graph.getDependencies(self.getContent(params))
+        return sorted((describeContent(dependency) for dependency in dependencies), key=lambda d: (d["type"], d["name"]))
+
+    def render(self, params: dict[str, Any]) -> dict[str, str]:
+        content = self.getContent(params)
+        templates = CONF_TEMPLATES.get(type(content))
+        if templates is None:
+            raise ServeRequestError(INVALID_PARAMS, f"{type(content).__name__} '{content.name}' is not written to any conf file")
+        rendered: dict[str, str] = {}
+        for conf_path, template_name in templates:
+            rendered[conf_path] = rendered.get(conf_path, "") + ConfWriter.renderConfTemplate(template_name, self.config.app, [content])
+        return rendered
+
+    def reload(self, params: dict[str, Any]) -> dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            self.setOutputDto(Validate().execute(self.config))
+            errors: list[dict[str, Any]] = []
+        except Exception as e:
+            # Keep serving the last content that validated successfully
+            errors = [{"file": None, "error": str(e)}]
+        return {"valid": len(errors) == 0, "errors": errors, "reloaded": True,
+                "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+    def validate(self, params: dict[str, Any]) -> dict[str, Any]:
+        start = time.perf_counter()
+        path = pathlib.Path(self.getParam(params, "path", str))
+        if not path.is_absolute():
+            path = self.root/path
+        path = path.resolve()
+        try:
+            relative_path = path.relative_to(self.root)
+        except ValueError:
+            raise ServeRequestError(INVALID_PARAMS, f"{path} is not in the content pack at {self.root}")
+        contentType = SecurityContentType[relative_path.parts[0]] if relative_path.parts[0] in SecurityContentType.__members__ else None
+        if contentType not in SECURITY_CONTENT_TYPE_DEPENDENCIES:
+            raise ServeRequestError(INVALID_PARAMS, f"{relative_path} is not in a content directory")
+        # Keep the index up to date, since the app may be built from this content again
+        self.output_dto.file_index.refresh(self.config.path/relative_path)
+
+        old =self.path_to_content.get(path)
+        if path.suffix != ".yml":
+            if not isinstance(old, Lookup):
+                # Validating the whole pack reports any file which does not belong to content
+                return self.reload(params)
+            # A change to the CSV of a lookup is validated by validating the lookup
+            path = pathlib.Path(old.file_path).resolve()
+            relative_path = path.relative_to(self.root)
+
+        errors: list[dict[str, Any]] = []
+        revalidated: list[str] = []
+        if not path.exists():
+            if isinstance(old, Detection):
+                self.detachDetection(old)
+            elif old is not None:
+                # Other content may still reference the deleted content
+                return self.reload(params)
+        elif contentType == SecurityContentType.detections or (contentType in (SecurityContentType.macros, SecurityContentType.lookups)
+                                                               and self.onlyDetectionsDependOn(old)):
+            try:
+                modelDict = self.loadFile(path)
+                if contentType == SecurityContentType.detections:
+                    self.replaceDetection(old, modelDict)
+                else:
+                    if old is None:
+                        old = self.getGeneratedContent(modelDict)
+                    revalidated = self.replaceReferencedContent(contentType, old, modelDict)
+            except (ValidationError, ValueError) as e:
+                errors.append({"file": str(relative_path), "error": str(e)})
+        else:
+            return self.reload(params)
+
+        return {"valid": len(errors) == 0, "errors": errors, "revalidated": revalidated, "reloaded": False,
+                "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+    def loadFile(self, path: pathlib.Path) -> dict[str, Any]:
+        try:
+            # Use the same form of the path as a full validation, so that file_path is unchanged
+            return YmlReader.load_file(self.config.path/path.relative_to(self.root))
+        except SystemExit:
+            # YmlReader prints the reason and exits when a file cannot be parsed
+            raise ValueError(f"Failed to parse {path}")
+
+    def getGeneratedContent(self, modelDict: dict[str, Any]) -> Optional[SecurityContentObject]:
+        # A new macro may replace a filter macro which was generated at runtime for a detection
+        content = self.output_dto.name_to_content_map.get(modelDict.get("name"))
+        if content is not None and content.file_path is None:
+            return content
+        return None
+
+    def onlyDetectionsDependOn(self, content: Optional[SecurityContentObject]) -> bool:
+        if content is None:
+            return True
+        dependents = self.output_dto.dependency_graph.getDependents(content, transitive=False)
+        return all(isinstance(dependent, Detection) for dependent in dependents)
+
+    def detachDetection(self, detection: Detection) -> None:
+        self.output_dto.removeContent(detection)
+        self.removePath(detection)
+        self.invalidateRelatedContent(detection)
+
+    def attachDetection(self, detection: Detection) -> None:
+        # Add back a detection that was constructed earlier, exactly as constructing it did
+        self.output_dto.addContentToDictMappings(detection)
+        self.output_dto.resolveBaselineDetectionReferences(detection)
+        self.placeDetection(detection)
+
+    def placeDetection(self, detection: Detection) -> None:
+        placeInFileOrder(self.output_dto.detections, detection)
+        for story in detection.tags.analytic_story:
+            placeInFileOrder(story.detections, detection)
+        self.invalidateRelatedContent(detection)
+        self.addPath(detection)
+
+    def invalidateRelatedContent(self, detection: Detection) -> None:
+        # The computed fields of stories and baselines are derived from their detections
+        for content in [*detection.tags.analytic_story, *detection.baselines]:
+            content.invalidateComputedFields()
+
+    def discardUnregisteredDetections(self) -> None:
+        # A detection which fails validation may have added itself to its baselines first
+        def isRegistered(detection: Detection) -> bool:
+            return self.output_dto.name_to_content_map.get(detection.name) is detection
+
+        for baseline in self.output_dto.baselines:
+            for index, reference in enumerate(baseline.tags.detections):
+                if isinstance(reference, Detection) and not isRegistered(reference):
+                    baseline.tags.detections[index] = reference.name
+                    self.output_dto.baseline_detection_references.setdefault(reference.name, []).append((baseline, index))
+
+    def replaceDetection(self, old: Optional[Detection], modelDict: dict[str, Any]) -> Detection:
+        """
+        Validate a new version of a detection, and replace the old version with it. If the new
+        version does not validate, the old version is restored.
+
+        Args:
+            old (Optional[Detection]): The version of the detection to replace, if there is one
+            modelDict (dict[str, Any]): The parsed YML of the new version
+
+        Returns:
+            Detection: The new version of the detection
+        """
+        if old is not None:
+            self.detachDetection(old)
+        try:
+            detection = self.director.constructSecurityContent(SecurityContentType.detections, modelDict)
+            self.output_dto.addContentToDictMappings(detection)
+        except Exception:
+            self.discardUnregisteredDetections()
+            if old is not None:
+                self.attachDetection(old)
+            raise
+        self.placeDetection(detection)
+        detection.freezeComputedFields()
+        return detection
+
+    def replaceReferencedContent(self, contentType: SecurityContentType, old: Optional[SecurityContentObject],
+                                 modelDict: dict[str, Any]) -> list[str]:
+        """
+        Validate a new version of a macro or lookup, and every detection which uses it. If any
+        of them do not validate, the old versions of all of them are restored.
+
+        Args:
+            contentType (SecurityContentType): The type of content to replace
+            old (Optional[SecurityContentObject]): The version of the content to replace, if there is one
+            modelDict (dict[str, Any]): The parsed YML of the new version
+
+        Raises:
+            ValueError: The new version, or one of the detections which use it, did not validate
+
+        Returns:
+            list[str]: The files of the detections which were validated again
+        """
+        dependents: list[Detection] = []
+        if old is not None:
+            dependents = sorted(self.output_dto.dependency_graph.getDependents(old, transitive=False),
+                                key=lambda detection: str(detection.file_path))
+            self.output_dto.removeContent(old)
+            self.removePath(old)
+        try:
+            content = self.director.constructSecurityContent(contentType, modelDict)
+            self.output_dto.addContentToDictMappings(content)
+        except Exception:
+            self.restoreReferencedContent(old, dependents)
+            raise
+        placeInFileOrder(self.output_dto.getContentList(content), content)
+        self.addPath(content)
+        content.freezeComputedFields()
+
+        # Each detection holds the object that it uses, so every one of them is validated again
+        replaced: list[tuple[Detection, Detection]] = []
+        errors: list[str] = []
+        for dependent in dependents:
+            try:
+                replaced.append((dependent, self.replaceDetection(dependent, self.loadFile(pathlib.Path(dependent.file_path).resolve()))))
+            except (ValidationError, ValueError) as e:
+                errors.append(f"File: {dependent.file_path}\nError: {str(e)}")
+
+        if len(errors) > 0:
+            for dependent, detection in reversed(replaced):
+                self.detachDetection(detection)
+                self.attachDetection(dependent)
+            self.output_dto.removeContent(content)
+            self.removePath(content)
+            self.restoreReferencedContent(old, [])
+            raise ValueError(f"{len(errors)} detection(s) which use '{content.name}' failed validation:\n\n" + "\n\n".join(errors))
+        return [str(dependent.file_path) for dependent in dependents]
+
+    def restoreReferencedContent(self, content: Optional[SecurityContentObject], dependents: list[Detection]) -> None:
+        if content is None:
+            return
+        self.output_dto.addContentToDictMappings(content)
+        placeInFileOrder(self.output_dto.getContentList(content), content)
+        self.addPath(content)
+        # Removing the content also removed the edges from the detections which use it
+        for dependent in dependents:
+            self.output_dto.dependency_graph.addContent(dependent)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+import heapq
+from typing import TYPE_CHECKING, Hashable, Iterable, Mapping, TypeVar
+
+from contentctl.objects.enums import SecurityContentType
+
+if TYPE_CHECKING:
+    from contentctl.objects.security_content_object import SecurityContentObject
+
+
+T = TypeVar("T", bound=Hashable)
+
+# The types of content whose objects must already exist before each type of content can be
+# validated, because its validators resolve names to objects through the name_to_content_map.
+# Content is loaded in the order of getTopologicalOrder, which keeps the order of this dict
+# wherever the dependencies allow. This is the order that content has always been loaded in,
+# and it decides which error is reported first when several types of content are invalid.
+SECURITY_CONTENT_TYPE_DEPENDENCIES: dict[SecurityContentType, list[SecurityContentType]] = {
+    SecurityContentType.deployments: [],
+    SecurityContentType.lookups: [],
+    SecurityContentType.macros: [],
+    SecurityContentType.stories: [],
+    SecurityContentType.baselines: [SecurityContentType.deployments,
+                                    SecurityContentType.stories],
+    SecurityContentType.investigations: [SecurityContentType.stories],
+    SecurityContentType.data_sources: [],
+    SecurityContentType.playbooks: [],
+    SecurityContentType.detections: [SecurityContentType.deployments,
+                                     SecurityContentType.lookups,
+                                     SecurityContentType.macros,
+                                     SecurityContentType.stories,
+                                     SecurityContentType.baselines,
+                                     SecurityContentType.data_sources],
+    SecurityContentType.dashboards: [],
+}
+
+
+def getTopologicalLevels(dependencies: Mapping[T, Iterable[T]]) -> list[list[T]]:
+    """
+    Group the nodes of a DAG into levels. Every node in a level only depends on nodes
+    in earlier levels, so the nodes within a single level are independent of each other.
+    Within a level, nodes keep the order in which they appear in dependencies.
+
+    Args:
+        dependencies (Mapping[T, Iterable[T]]): Maps every node to the nodes it depends on
+
+    Raises:
+        ValueError: The graph contains a cycle or depends on a node which is not in the graph
+
+    Returns:
+        list[list[T]]: The nodes, grouped into levels
+    """
+    remaining, dependents = getDependents(dependencies)
+
+    # Kahn's algorithm, peeling off every node whose dependencies have all been placed at once
+    order = {node: index for index, node in enumerate(remaining)}
+    in_degree = {node: len(node_dependencies) for node, node_dependencies in remaining.items()}
+    level = [node for node in remaining if in_degree[node] == 0]
+    levels: list[list[T]] = []
+    while len(level) > 0:
+        levels.append(level)
+        next_level: list[T] = []
+        for node in level:
+            for dependent in dependents[node]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    next_level.append(dependent)
+        level = sorted(next_level, key=lambda node: order[node])
+
+    if sum(len(placed) for placed in levels) != len(remaining):
+        raiseCycleError(in_degree)
+    return levels
+
+
+def getTopologicalOrder(dependencies: Mapping[T, Iterable[T]]) -> list[T]:
+    """
+    Order the nodes of a DAG so that every node comes after the nodes it depends on. Whenever
+    several nodes could come next, the one which appears first in dependencies is chosen, so if
+    dependencies is already in a valid order, that order is kept exactly.
+
+    Args:
+        dependencies (Mapping[T, Iterable[T]]): Maps every node to the nodes it depends on
+
+    Raises:
+        ValueError: The graph contains a cycle or depends on a node which is not in the graph
+
+    Returns:
+        list[T]: Every node, in order
+    """
+    remaining, dependents = getDependents(dependencies)
+
+    # Kahn's algorithm, always placing the earliest node whose dependencies have all been placed
+    nodes = list(remaining)
+    order = {node: index for index, node in enumerate(nodes)}
+    in_degree = {node: len(node_dependencies) for node, node_dependencies in remaining.items()}
+    ready = [order[node] for node in nodes if in_degree[node] == 0]
+    heapq.heapify(ready)
+    placed: list[T] = []
+    while len(ready) > 0:
+        node = nodes[heapq.heappop(ready)]
+        placed.append(node)
+        for dependent in dependents[node]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                heapq.heappush(ready, order[dependent])
+
+    if len(placed) != len(remaining):
+        raiseCycleError(in_degree)
+    return placed
+
+
+def getDependents(dependencies: Mapping[T, Iterable[T]]) -> tuple[dict[T, set[T]], dict[T, list[T]]]:
+    # The dependencies of every node, and the reverse: the nodes which depend on every node
+    remaining: dict[T, set[T]] = {node: set(node_dependencies) for node, node_dependencies in dependencies.items()}
+    unknown = {dependency for node_dependencies in remaining.values() for dependency in node_dependencies} - set(remaining)
+    if len(unknown) > 0:
+        unknown_names = sorted(str(getattr(node, "name", node)) for node in unknown)
+        raise ValueError(f"The dependency graph depends on nodes which are not in the graph: {unknown_names}")
+
+    dependents: dict[T, list[T]] = {node: [] for node in remaining}
+    for node, node_dependencies in remaining.items():
+        for dependency in node_dependencies:
+            dependents[dependency].append(node)
+    return remaining, dependents
+
+
+def raiseCycleError(in_degree: Mapping[T, int]) -> None:
+    # The nodes which could never be placed are those in, or depending on, a cycle
+    cycle = sorted(str(getattr(node, "name", node)) for node, degree in in_degree.items() if degree > 0)
+    raise ValueError(f"The dependency graph contains a cycle between: {cycle}")
+
+
+@dataclass
+class ContentDependencyGraph:
+    """
+    The dependencies between all of the content that has been loaded. An edge is added from
+    every object to each of the objects returned by its get_content_dependencies() as the object
+    is added to the DirectorOutputDto. Since content is loaded in dependency order, every object
+    that is depended on is already in the graph by then.
+    """
+    # Forward adjacency: object -> the objects it depends on
+    dependencies: dict[SecurityContentObject, set[SecurityContentObject]] = field(default_factory=dict)
+    # Reverse adjacency: object -> the objects which depend on it
+    dependents: dict[SecurityContentObject, set[SecurityContentObject]] = field(default_factory=dict)
+
+    def addContent(self, content: SecurityContentObject) -> None:
+        content_dependencies = content.get_content_dependencies()
+        self.dependencies.setdefault(content, set()).update(content_dependencies)
+        self.dependents.setdefault(content, set())
+        for dependency in content_dependencies:
+            # Objects such as filter macros are created at runtime and may not have been added yet
+            self.dependencies.setdefault(dependency, set())
+            self.dependents.setdefault(dependency, set()).add(content)
+
+    def removeContent(self, content: SecurityContentObject) -> None:
+        # Remove every edge to and from content. The objects which depended on content still
+        # reference it, so they must be added again once they have been updated.
+        for dependency in self.dependencies.pop(content, set()):
+            self.dependents.get(dependency, set()).discard(content)
+        for dependent in self.dependents.pop(content, set()):
+            self.dependencies.get(dependent, set()).discard(content)
+
+    def getDependencies(self, content: SecurityContentObject) -> set[SecurityContentObject]:
+        return set(self.dependencies.get(content, set()))
+
+    def getDependents(self, content: SecurityContentObject, transitive: bool = True) -> set[SecurityContentObject]:
+        """
+        Return all of the objects which depend on content. This is the set of objects which
+        may be impacted by a change to content.
+
+        Args:
+            content (SecurityContentObject): The object to find the dependents of
+            transitive (bool, optional): Also include objects that depend on content through
+                another object, for example a detection that uses a baseline that uses content.
+                Defaults to True.
+
+        Returns:
+            set[SecurityContentObject]: Every object which depends on content
+        """
+        found: set[SecurityContentObject] = set()
+        to_visit = list(self.dependents.get(content, set()))
+        while len(to_visit) > 0:
+            dependent = to_visit.pop()
+            if dependent in found:
+                continue
+            found.add(dependent)
+            if transitive:
+                to_visit.extend(self.dependents.get(dependent, set()))
+        return found
+
+    def getLevels(self) -> list[list[SecurityContentObject]]:
+        """
+        Group all content into topological levels. The objects within a level do not
+        depend on each other, so they may be validated at the same time.
+
+        Returns:
+            list[list[SecurityContentObject]]: All content, grouped into levels
+        """
+        return getTopologicalLevels(self.dependencies)
@@ -1,10 +1,21 @@
 import os
 import sys
+import time
+import itertools
+import threading
+import contextlib
 from pathlib import Path
 from dataclasses import dataclass, field
+from typing import Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import ValidationError
 from uuid import UUID
 from contentctl.input.yml_reader import YmlReader
+from contentctl.input.yml_cache import YmlCache
+from contentctl.input.validation_manifest import ValidationManifest, FileState, DetectionRecord
+from contentctl.input.file_index import FileIndex
+from contentctl.input.lookup_csv_checker import LookupCsvChecker, CSV_CHECK_VERSION
+from contentctl.input.dependency_graph import ContentDependencyGraph, SECURITY_CONTENT_TYPE_DEPENDENCIES, getTopologicalOrder
 
 from contentctl.objects.detection import Detection
 from contentctl.objects.story import Story
@@ -24,7 +35,21 @@ from contentctl.enrichments.cve_enrichment import CveEnrichment
 
 from contentctl.objects.config import validate
 from contentctl.objects.enums import SecurityContentType
-from contentctl.helper.utils import Utils
+from contentctl.helper.profiler import PROFILER
+
+# The content objects refer to each other (a Story lists its Detections, which list their
+# Stories...), so those references are only annotations until every content type has been
+# imported. They are all imported by now, so complete the models here rather than relying on
+# some other module happening to do it before the first piece of content is validated.
+for model in (Story, Detection, Baseline, Investigation, Playbook):
+    model.model_rebuild()
+
+
+def canConstructConcurrently() -> bool:
+    # Validating content is pure Python, so constructing it on several threads is only faster
+    # when the interpreter is free-threaded and the GIL has not been re-enabled
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled() and (os.cpu_count() or 1) > 1
 
 
 @dataclass
@@ -47,8 +72,33 @@ class DirectorOutputDto:
     data_sources: list[DataSource]
     name_to_content_map: dict[str, SecurityContentObject] = field(default_factory=dict)
     uuid_to_content_map: dict[UUID, SecurityContentObject] = field(default_factory=dict)
+    file_path_to_content_map: dict[Path, SecurityContentObject] = field(default_factory=dict)
+    # Every file in the content directories, scanned once when the content is loaded
+    file_index: FileIndex = field(default_factory=FileIndex)
+    # The size, mtime and sha256 of each content file when the content was last validated, keyed by str(path)
+    file_states: dict[str, FileState] = field(default_factory=dict)
+    lookup_csv_checker: LookupCsvChecker = field(default_factory=LookupCsvChecker)
+    dependency_graph: ContentDependencyGraph = field(default_factory=ContentDependencyGraph)
+    # Maps the name of each detection to the baselines which reference it, along with the
+    # position of the reference in baseline.tags.detections. Entries are removed as the
+    # detections are constructed and the references are replaced with the Detection objects.
+    baseline_detection_references: dict[str, list[tuple[Baseline, int]]] = field(default_factory=dict)
+    # Held for every change to the content above, so that content may be constructed and added
+    # from several threads at once
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    # While registration is deferred, the content that has been added, keyed by where it belongs in the final order
+    deferred_registrations: Optional[list[tuple[tuple[int, int], SecurityContentObject]]] = field(default=None, repr=False)
+    registration_order: threading.local = field(default_factory=threading.local, repr=False)
+    registration_sequence: Iterator[int] = field(default_factory=itertools.count, repr=False)
 
     def addContentToDictMappings(self, content: SecurityContentObject):
+        with self.lock:
+            if self.deferred_registrations is not None:
+                self.addDeferredRegistration(content)
+            else:
+                self.addRegistration(content)
+
+    def addRegistration(self, content: SecurityContentObject) -> None:
         content_name = content.name
         
         
@@ -66,55 +116,226 @@ class DirectorOutputDto:
                 f" - {self.uuid_to_content_map[content.id].file_path}"
             )
 
+        self.getContentList(content).append(content)
+        if isinstance(content, Baseline):
+            self.addBaselineDetectionReferences(content)
+        elif isinstance(content, Detection):
+            for story in content.tags.analytic_story:
+                story.detections.append(content)
+
+        self.name_to_content_map[content_name] = content
+        self.uuid_to_content_map[content.id] = content
+        if content.file_path is not None:
+            self.file_path_to_content_map[content.file_path] = content
+        self.dependency_graph.addContent(content)
+
+    def addDeferredRegistration(self, content: SecurityContentObject) -> None:
+        order = getattr(self.registration_order, "order", None)
+        if order is None:
+            raise Exception(f"'{content.name}' was added while registration was deferred, but not inside registrationOrder")
+        self.deferred_registrations.append(((order, next(self.registration_sequence)), content))
+        # Make the content visible straight away, since other content may be looked up by name while it is
+        # validated. A detection uses the filter macro that is generated for it, for example. Duplicates
+        # are left for completeDeferredRegistration to report.
+        self.name_to_content_map.setdefault(content.name, content)
+        self.uuid_to_content_map.setdefault(content.id, content)
+
+    def beginDeferredRegistration(self) -> None:
+        """
+        Defer adding content until completeDeferredRegistration is called, so that a batch of
+        content can be constructed by several threads at once. Each object must be constructed
+        and added inside registrationOrder, which gives its position in the final order.
+        """
+        with self.lock:
+            if self.deferred_registrations is not None:
+                raise Exception("Registration has already been deferred")
+            self.deferred_registrations = []
+
+    @contextlib.contextmanager
+    def registrationOrder(self, order: int) -> Iterator[None]:
+        # All content added by this thread inside the block, such as a detection and the filter macro
+        # generated for it, is placed at this position in the final order
+        self.registration_order.order = order
+        try:
+            yield
+        finally:
+            self.registration_order.order = None
+
+    def completeDeferredRegistration(self) -> list[tuple[int, ValueError]]:
+        """
+        Add all of the content whose registration was deferred, in order, exactly as if it had been
+        added one object at a time. The result does not depend on the order in which the threads
+        finished constructing the content.
+
+        Returns:
+            list[tuple[int, ValueError]]: The registrationOrder of each object which could not be added, such as
+            because of a duplicate name or id, and the reason
+        """
+        with self.lock:
+            if self.deferred_registrations is None:
+                raise Exception("Registration has not been deferred")
+            registrations = sorted(self.deferred_registrations, key=lambda registration: registration[0])
+            self.deferred_registrations = None
+
+            # Remove the mappings that were made as the content was added, so that the first
+            # object in the final order wins, and the others are reported as duplicates
+            for _, content in registrations:
+                if self.name_to_content_map.get(content.name) is content:
+                    del self.name_to_content_map[content.name]
+                if self.uuid_to_content_map.get(content.id) is content:
+                    del self.uuid_to_content_map[content.id]
+
+            errors: list[tuple[int, ValueError]] = []
+            for (order, _), content in registrations:
+                try:
+                    self.addRegistration(content)
+                except ValueError as e:
+                    errors.append((order, e))
+            return errors
+
+    def getContentList(self, content: SecurityContentObject) -> list:
         if isinstance(content, Lookup):
-            self.lookups.append(content)
+            return self.lookups
         elif isinstance(content, Macro):
-            self.macros.append(content)
+            return self.macros
         elif isinstance(content, Deployment):
-            self.deployments.append(content)
+            return self.deployments
         elif isinstance(content, Playbook):
-            self.playbooks.append(content)
+            return self.playbooks
         elif isinstance(content, Baseline):
-            self.baselines.append(content)
+            return self.baselines
         elif isinstance(content, Investigation):
-            self.investigations.append(content)
+            return self.investigations
         elif isinstance(content, Story):
-            self.stories.append(content)
+            return self.stories
         elif isinstance(content, Detection):
-            self.detections.append(content)
+            return self.detections
         elif isinstance(content, Dashboard):
-            self.dashboards.append(content)            
-
+            return self.dashboards
         elif isinstance(content, DataSource):
-            self.data_sources.append(content)
+            return self.data_sources
         else:
             raise Exception(f"Unknown security content type: {type(content)}")
 
-        self.name_to_content_map[content_name] = content
-        self.uuid_to_content_map[content.id] = content
+    def removeContent(self, content: SecurityContentObject) -> None:
+        """
+        Remove content that was added with addContentToDictMappings, so that a new version of it
+        can be added. A detection is also added to its stories, and it adds itself to its
+        baselines when it is constructed. Those references are removed too, and the baselines go
+        back to referencing the detection by name until the new version of it is constructed.
+
+        Args:
+            content (SecurityContentObject): The content to remove
+        """
+        with self.lock:
+            self.removeRegistration(content)
+
+    def removeRegistration(self, content: SecurityContentObject) -> None:
+        if self.name_to_content_map.get(content.name) is content:
+            del self.name_to_content_map[content.name]
+        if self.uuid_to_content_map.get(content.id) is content:
+            del self.uuid_to_content_map[content.id]
+        if content.file_path is not None and self.file_path_to_content_map.get(content.file_path) is content:
+            del self.file_path_to_content_map[content.file_path]
+        # Objects are compared by identity, since == raises for different versions of the same object
+        content_list = self.getContentList(content)
+        content_list[:] = [obj for obj in content_list if obj is not content]
+        self.dependency_graph.removeContent(content)
+
+        if isinstance(content, Detection):
+            for story in content.tags.analytic_story:
+                story.detections[:] = [detection for detection in story.detections if detection is not content]
+            for baseline in content.baselines:
+                for index, reference in enumerate(baseline.tags.detections):
+                    if reference is content:
+                        baseline.tags.detections[index] = content.name
+                        self.baseline_detection_references.setdefault(content.name, []).append((baseline, index))
+
+    def addBaselineDetectionReferences(self, baseline: Baseline) -> None:
+        for index, detection in enumerate(baseline.tags.detections):
+            if isinstance(detection, str):
+                self.baseline_detection_references.setdefault(detection, []).append((baseline, index))
+
+    def getBaselinesReferencingDetection(self, detection_name: str) -> list[Baseline]:
+        baselines: list[Baseline] = []
+        for baseline, _ in self.baseline_detection_references.get(detection_name, []):
+            # A baseline may reference the same detection more than once
+            if baseline not in baselines:
+                baselines.append(baseline)
+        return baselines
+
+    def resolveBaselineDetectionReferences(self, detection: Detection) -> list[Baseline]:
+        """
+        Replace every reference to detection, by name, in baseline.tags.detections
+        with the detection object itself.
+
+        Args:
+            detection (Detection): A detection which has just been constructed
+
+        Returns:
+            list[Baseline]: The baselines which referenced the detection
+        """
+        resolved: list[Baseline] = []
+        with self.lock:
+            references = self.baseline_detection_references.pop(detection.name, [])
+        for baseline, index in references:
+            baseline.tags.detections[index] = detection
+            if baseline not in resolved:
+                resolved.append(baseline)
+        return resolved
 
 
 class Director():
     input_dto: validate
     output_dto: DirectorOutputDto
+    yml_cache: YmlCache
+    lookup_csv_cache: YmlCache
+    loaded_files: list[Path]
+    previous_manifest: ValidationManifest | None
+    file_states: dict[str, FileState]
+    skipped_detection_files: list[Path]
 
     def __init__(self, output_dto: DirectorOutputDto) -> None:
         self.output_dto = output_dto
 
     def execute(self, input_dto: validate) -> None:
         self.input_dto = input_dto
-        self.createSecurityContent(SecurityContentType.deployments)
-        self.createSecurityContent(SecurityContentType.lookups)
-        self.createSecurityContent(SecurityContentType.macros)
-        self.createSecurityContent(SecurityContentType.stories)
-        self.createSecurityContent(SecurityContentType.baselines)
-        self.createSecurityContent(SecurityContentType.investigations)
-        self.createSecurityContent(SecurityContentType.data_sources)
-        self.createSecurityContent(SecurityContentType.playbooks)
-        self.createSecurityContent(SecurityContentType.detections)
-        self.createSecurityContent(SecurityContentType.dashboards)
+        self.yml_cache = YmlCache(input_dto.ensureCachePathExists() / "yml")
+        self.lookup_csv_cache = YmlCache(input_dto.cache_path / "lookup_csv", version=f"checkCsvStructure {CSV_CHECK_VERSION}")
+        self.output_dto.lookup_csv_checker = LookupCsvChecker(self.lookup_csv_cache)
+        self.loaded_files = []
+        config_hash = ValidationManifest.getConfigHash(input_dto.path, input_dto.enrichments,
+                                                       [input_dto.mitre_cti_repo_path, input_dto.atomic_red_team_repo_path])
+        self.previous_manifest = ValidationManifest.load(self.getManifestPath(), config_hash)
+        self.file_states = {}
+        self.skipped_detection_files = []
+        with PROFILER.phase("scan content directories"):
+            self.output_dto.file_index = FileIndex(input_dto.path/contentType.name
+                                                   for contentType in SECURITY_CONTENT_TYPE_DEPENDENCIES)
+
+        # Each type of content is loaded after all of the types of content that it references
+        for contentType in getTopologicalOrder(SECURITY_CONTENT_TYPE_DEPENDENCIES):
+            with PROFILER.phase(f"createSecurityContent: {contentType.name}"):
+                self.createSecurityContent(contentType)
+
+        # All content has been validated and every reference between objects has been resolved,
+        # so the computed fields of each object will not change unless it is explicitly modified
+        for content in self.output_dto.name_to_content_map.values():
+            content.freezeComputedFields()
+
+        # Evict the cache entries of any files that have been deleted or renamed
+        self.yml_cache.prune(self.loaded_files)
+        self.lookup_csv_cache.prune(lookup.filename for lookup in self.output_dto.lookups if lookup.filename is not None)
+
+        # Everything validated successfully, so record the state of this run for
+        # the next 'contentctl validate --incremental'. Without a config hash, the
+        # enrichment data could change unnoticed, so there is nothing to record.
+        if config_hash is not None:
+            self.writeValidationManifest(config_hash)
+        self.output_dto.file_states = self.file_states
         
         from contentctl.objects.abstract_security_content_objects.detection_abstract import MISSING_SOURCES
+        MISSING_SOURCES.update(self.getSkippedDetectionMissingDataSources())
         if len(MISSING_SOURCES) > 0:
             missing_sources_string = "\n 🟡 ".join(sorted(list(MISSING_SOURCES)))
             print("WARNING: The following data_sources have been used in detections, but are not yet defined.\n"
@@ -123,22 +344,100 @@ class Director():
         else:
             print("No missing data_sources!")
 
+    def getManifestPath(self) -> Path:
+        return self.input_dto.cache_path / "validation_manifest.json"
+
+    def getFileStates(self, files: list[Path]) -> dict[str, FileState]:
+        previous_files = self.previous_manifest.files if self.previous_manifest is not None else {}
+        for file in files:
+            path = str(file)
+            if path not in self.file_states:
+                entry = self.output_dto.file_index.getEntry(file)
+                previous = previous_files.get(path, None)
+                self.file_states[path] = FileState.fromIndexEntry(entry, previous) if entry is not None else FileState.fromFile(file, previous)
+        return {str(file): self.file_states[str(file)] for file in files}
+
+    def getDetectionsToValidate(self, detection_files: list[Path]) -> list[Path]:
+        if self.previous_manifest is None:
+            print("Incremental validation: no record of a previous successful validation was found, "
+                  "so all detections will be validated.")
+            return detection_files
+
+        # All content that a detection can depend on has been loaded by this point
+        changed_files = self.previous_manifest.getChangedFiles(self.getFileStates(self.loaded_files))
+        to_validate = self.previous_manifest.getDetectionsToValidate(detection_files, changed_files)
+        to_validate_set = set(to_validate)
+        self.skipped_detection_files = [f for f in detection_files if f not in to_validate_set]
+        print(f"Incremental validation: validating [{len(to_validate)}] of [{len(detection_files)}] "
+              "detections which changed or depend on changed content.")
+        return to_validate
+
+    def checkSkippedDetections(self) -> list[tuple[Path, ValueError]]:
+        """
+        Detections which incremental validation skips are never constructed, so they are not
+        registered, and a detection which has been added (or copied) could reuse one of their
+        names or ids. Check the name and id recorded for each of them against all of the content
+        that was registered, and against each other, as addRegistration would have.
+
+        Returns:
+            list[tuple[Path, ValueError]]: The relative path of each skipped detection which is a duplicate, and why
+        """
+        errors: list[tuple[Path, ValueError]] = []
+        if self.previous_manifest is None:
+            return errors
+        skipped_names: dict[str, Path] = {}
+        skipped_ids: dict[UUID, Path] = {}
+        for file in self.skipped_detection_files:
+            record = self.previous_manifest.detections[str(file)]
+            record_id = UUID(record.id)
+            for kind, value, registered, skipped in [("name", record.name, self.output_dto.name_to_content_map, skipped_names),
+                                                     ("id", record_id, self.output_dto.uuid_to_content_map, skipped_ids)]:
+                if value in registered or value in skipped:
+                    other_path = registered[value].file_path if value in registered else skipped[value]
+                    errors.append((file.absolute().relative_to(self.input_dto.path.absolute()),
+                                   ValueError(f"Duplicate {kind} '{value}' with paths:\n"
+                                              f" - {file}\n"
+                                              f" - {other_path}")))
+                else:
+                    skipped[value] = file
+        return errors
+
+    def getSkippedDetectionMissingDataSources(self) -> set[str]:
+        # The data sources are always loaded, so the data sources of skipped detections are checked
+        # against the current data sources rather than reporting what was missing when they were validated
+        if self.previous_manifest is None:
+            return set()
+        return {name for file in self.skipped_detection_files
+                for name in self.previous_manifest.detections[str(file)].data_sources
+                if not isinstance(self.output_dto.name_to_content_map.get(name), DataSource)}
+
+    def getDetectionDependencyPaths(self, detection: Detection) -> list[str]:
+        dependencies = self.output_dto.dependency_graph.getDependencies(detection)
+        # Objects without a file_path, such as filter macros and inline deployments, are
+        # generated at runtime from the detection itself
+        return sorted({str(obj.file_path) for obj in dependencies if obj.file_path is not None})
+
+    def writeValidationManifest(self, config_hash: str) -> None:
+        dependencies: dict[str, list[str]] = {}
+        detections: dict[str, DetectionRecord] = {}
+        if self.previous_manifest is not None:
+            for file in self.skipped_detection_files:
+                dependencies[str(file)] = self.previous_manifest.dependencies[str(file)]
+                detections[str(file)] = self.previous_manifest.detections[str(file)]
+        for detection in self.output_dto.detections:
+            dependencies[str(detection.file_path)] = self.getDetectionDependencyPaths(detection)
+            detections[str(detection.file_path)] = DetectionRecord(name=detection.name, id=str(detection.id),
+                                                                   data_sources=detection.getDataSourceNames())
+
+        manifest = ValidationManifest(config_hash=config_hash,
+                                      files=self.getFileStates(self.loaded_files),
+                                      dependencies=dependencies,
+                                      detections=detections)
+        manifest.save(self.getManifestPath())
+
     def createSecurityContent(self, contentType: SecurityContentType) -> None:
-        if contentType in [
-            SecurityContentType.deployments,
-            SecurityContentType.lookups,
-            SecurityContentType.macros,
-            SecurityContentType.stories,
-            SecurityContentType.baselines,
-            SecurityContentType.investigations,
-            SecurityContentType.playbooks,
-            SecurityContentType.detections,
-            SecurityContentType.data_sources,
-            SecurityContentType.dashboards
-        ]:
-            files = Utils.get_all_yml_files_from_directory(
-                os.path.join(self.input_dto.path, str(contentType.name))
-            )
+        if contentType in SECURITY_CONTENT_TYPE_DEPENDENCIES:
+            files = self.output_dto.file_index.getFiles(self.input_dto.path/contentType.name, suffixes=[".yml"])
             security_content_files = [
                 f for f in files 
             ]
@@ -150,72 +449,57 @@ class Director():
         already_ran = False
         progress_percent = 0
 
-        for index, file in enumerate(security_content_files):
-            progress_percent = ((index + 1) / len(security_content_files)) * 100
-            try:
-                type_string = contentType.name.upper()
-                modelDict = YmlReader.load_file(file)
-
-                if contentType == SecurityContentType.lookups:
-                    lookup = Lookup.model_validate(modelDict, context={"output_dto":self.output_dto, "config":self.input_dto})
-                    self.output_dto.addContentToDictMappings(lookup)
-                
-                elif contentType == SecurityContentType.macros:
-                    macro = Macro.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(macro)
-                
-                elif contentType == SecurityContentType.deployments:
-                    deployment = Deployment.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(deployment)
-
-                elif contentType == SecurityContentType.playbooks:
-                    playbook = Playbook.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(playbook)                  
-                
-                elif contentType == SecurityContentType.baselines:
-                    baseline = Baseline.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(baseline)
-                
-                elif contentType == SecurityContentType.investigations:
-                    investigation = Investigation.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(investigation)
-
-                elif contentType == SecurityContentType.stories:
-                    story = Story.model_validate(modelDict, context={"output_dto":self.output_dto})
-                    self.output_dto.addContentToDictMappings(story)
-            
-                elif contentType == SecurityContentType.detections:
-                    detection = Detection.model_validate(modelDict, context={"output_dto":self.output_dto, "app":self.input_dto.app})
-                    self.output_dto.addContentToDictMappings(detection)
-                
-                elif contentType == SecurityContentType.dashboards:
-                        dashboard = Dashboard.model_validate(modelDict,context={"output_dto":self.output_dto})
-                        self.output_dto.addContentToDictMappings(dashboard)
-
-                elif contentType == SecurityContentType.data_sources:
-                    data_source = DataSource.model_validate(
-                        modelDict, context={"output_dto": self.output_dto}
-                    )
-                    self.output_dto.addContentToDictMappings(data_source)
+        # Reading and parsing the files is independent of all other content, so it is
+        # done in parallel. model_validate depends on previously constructed objects,
+        # so it is still performed in order in this process as the parsed files arrive.
+        self.loaded_files.extend(security_content_files)
+        if contentType == SecurityContentType.detections and self.input_dto.incremental:
+            security_content_files = self.getDetectionsToValidate(security_content_files)
+        if contentType == SecurityContentType.detections and len(security_content_files) > 0:
+            # Wait for the enrichments to finish loading before validating any detections. That way,
+            # a failure to load them is reported once, rather than as a missing MITRE ID or
+            # Atomic Test in every detection.
+            with PROFILER.phase("wait for enrichments"):
+                self.output_dto.atomic_enrichment.ensureLoaded()
+                self.output_dto.attack_enrichment.ensureLoaded()
 
-                else:
-                    raise Exception(f"Unsupported type: [{contentType}]")
-
-                if (
-                    sys.stdout.isatty() and sys.stdin.isatty() and sys.stderr.isatty()
-                ) or not already_ran:
-                    already_ran = True
-                    print(
-                        f"\r{f'{type_string} Progress'.rjust(23)}: [{progress_percent:3.0f}%]...",
-                        end="",
-                        flush=True,
-                    )
+        parsed_files = YmlReader.load_files(security_content_files, cache=self.yml_cache)
+        if contentType == SecurityContentType.lookups:
+            # Check the CSVs of all of the lookups at once, rather than one at a time as each is constructed
+            parsed_files = list(parsed_files)
+            with PROFILER.phase("check lookup CSVs"):
+                self.output_dto.lookup_csv_checker.checkFiles(self.getLookupCsvPaths(parsed_files))
+        if contentType == SecurityContentType.detections and canConstructConcurrently():
+            validation_errors = self.constructConcurrently(contentType, security_content_files, parsed_files)
+            progress_percent = 100 if len(security_content_files) > 0 else 0
+        else:
+            for index, (file, modelDict) in enumerate(zip(security_content_files, parsed_files)):
+                progress_percent = ((index + 1) / len(security_content_files)) * 100
+                validation_start = time.perf_counter()
+                try:
+                    type_string = contentType.name.upper()
 
-            except (ValidationError, ValueError) as e:
-                relative_path = file.absolute().relative_to(
-                    self.input_dto.path.absolute()
-                )
-                validation_errors.append((relative_path, e))
+                    content = self.constructSecurityContent(contentType, modelDict)
+                    self.output_dto.addContentToDictMappings(content)
+                    PROFILER.recordFile(file, time.perf_counter() - validation_start)
+
+                    if (
+                        sys.stdout.isatty() and sys.stdin.isatty() and sys.stderr.isatty()
+                    ) or not already_ran:
+                        already_ran = True
+                        print(
+                            f"\r{f'{type_string} Progress'.rjust(23)}: [{progress_percent:3.0f}%]...",
+                            end="",
+                            flush=True,
+                        )
+
+                except (ValidationError, ValueError) as e:
+                    relative_path = file.absolute().relative_to(
+                        self.input_dto.path.absolute()
+                    )
+                    validation_errors.append((relative_path, e))
+        if contentType == SecurityContentType.detections and len(self.skipped_detection_files) > 0:
+            validation_errors.extend(self.checkSkippedDetections())
 
         print(
             f"\r{f'{contentType.name.upper()} Progress'.rjust(23)}: [{progress_percent:3.0f}%]...",
@@ -238,3 +522,91 @@ class Director():
                 f"The following {len(validation_errors)} error(s) were found during validation:\n\n{errors_string}\n\nVALIDATION FAILED"
             )
 
+    def constructConcurrently(self, contentType: SecurityContentType, files: list[Path],
+                              parsed_files: Iterator[dict]) -> list[tuple[Path, ValueError]]:
+        """
+        Construct content on a pool of threads. Adding the content to the output_dto is deferred
+        until all of it has been constructed, so the content, and any errors, are in the same
+        order as if it had been constructed one file at a time.
+
+        Args:
+            contentType (SecurityContentType): The type of content in files
+            files (list[Path]): The files to construct content from
+            parsed_files (Iterator[dict]): The parsed YML of each file, in the same order
+
+        Returns:
+            list[tuple[Path, ValueError]]: The relative path of each file which did not validate, and why
+        """
+        def construct(order: int, file: Path, modelDict: dict) -> Optional[ValueError]:
+            validation_start = time.perf_counter()
+            try:
+                with self.output_dto.registrationOrder(order):
+                    content = self.constructSecurityContent(contentType, modelDict)
+                    self.output_dto.addContentToDictMappings(content)
+            except (ValidationError, ValueError) as e:
+                return e
+            PROFILER.recordFile(file, time.perf_counter() - validation_start)
+            return None
+
+        errors: dict[int, ValueError] = {}
+        self.output_dto.beginDeferredRegistration()
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [executor.submit(construct, order, file, modelDict)
+                           for order, (file, modelDict) in enumerate(zip(files, parsed_files))]
+                for order, future in enumerate(futures):
+                    error = future.result()
+                    if error is not None:
+                        errors[order] = error
+        finally:
+            registration_errors = self.output_dto.completeDeferredRegistration()
+        for order, error in registration_errors:
+            errors.setdefault(order, error)
+
+        return [(files[order].absolute().relative_to(self.input_dto.path.absolute()), errors[order])
+                for order in sorted(errors)]
+
+    def getLookupCsvPaths(self, parsed_files: list[dict]) -> list[Path]:
+        # The same paths that Lookup.fix_lookup_path gives the lookups when they are constructed
+        return [self.input_dto.path / "lookups" / modelDict["filename"] for modelDict in parsed_files
+                if isinstance(modelDict, dict) and isinstance(modelDict.get("filename"), str)
+                and modelDict["filename"].endswith(".csv")]
+
+    def constructSecurityContent(self, contentType: SecurityContentType, modelDict: dict) -> SecurityContentObject:
+        """
+        Construct and validate a single piece of content from its parsed YML. Objects that it
+        references must already have been added to the output_dto, but the object itself is
+        not added.
+
+        Args:
+            contentType (SecurityContentType): The type of content that modelDict describes
+            modelDict (dict): The parsed YML of the content
+
+        Raises:
+            Exception: contentType is not a supported type of content
+
+        Returns:
+            SecurityContentObject: The validated content
+        """
+        if contentType == SecurityContentType.lookups:
+            return Lookup.model_validate(modelDict, context={"output_dto":self.output_dto, "config":self.input_dto})
+        elif contentType == SecurityContentType.macros:
+            return Macro.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.deployments:
+            return Deployment.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.playbooks:
+            return Playbook.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.baselines:
+            return Baseline.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.investigations:
+            return Investigation.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.stories:
+            return Story.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.detections:
+            return Detection.model_validate(modelDict, context={"output_dto":self.output_dto, "app":self.input_dto.app})
+        elif contentType == SecurityContentType.dashboards:
+            return Dashboard.model_validate(modelDict, context={"output_dto":self.output_dto})
+        elif contentType == SecurityContentType.data_sources:
+            return DataSource.model_validate(modelDict, context={"output_dto": self.output_dto})
+        else:
+            raise Exception(f"Unsupported type: [{contentType}]")
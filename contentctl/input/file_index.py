@@ -0,0 +1,125 @@
+from __future__ import annotations
+import os
+import hashlib
+import pathlib
+from typing import Iterable, Optional
+
+
+class FileIndexEntry():
+    """
+    The size and mtime of a file when it was scanned. The sha256 of the file is only calculated
+    the first time that it is asked for, since most runs never need the hash of most files.
+    """
+
+    def __init__(self, path: pathlib.Path, size: int, mtime_ns: int):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256: Optional[str] = None
+
+    def getHash(self) -> str:
+        if self.sha256 is None:
+            with open(self.path, "rb") as f:
+                self.sha256 = hashlib.sha256(f.read()).hexdigest()
+        return self.sha256
+
+
+class FileIndex():
+    """
+    Every file in a set of directories, scanned once with os.scandir. The content directories
+    are scanned when content is loaded, and everything else that needs to know which files exist
+    (the orphaned lookup file check, copying lookup files into the app, finding the content that
+    a changed file belongs to) asks the index rather than walking the directories again.
+    """
+
+    def __init__(self, directories: Iterable[pathlib.Path] = ()):
+        self.entries: dict[pathlib.Path, FileIndexEntry] = {}
+        # The files and subdirectories directly inside each scanned directory
+        self.directory_files: dict[pathlib.Path, list[pathlib.Path]] = {}
+        self.subdirectories: dict[pathlib.Path, list[pathlib.Path]] = {}
+        for directory in directories:
+            self.scan(directory)
+
+    def scan(self, directory: pathlib.Path) -> None:
+        to_scan = [directory]
+        while len(to_scan) > 0:
+            current = to_scan.pop()
+            try:
+                entries = list(os.scandir(current))
+            except (FileNotFoundError, NotADirectoryError):
+                # The directory does not exist, or was deleted while it was being scanned
+                continue
+            files: list[pathlib.Path] = []
+            subdirectories: list[pathlib.Path] = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(pathlib.Path(entry.path))
+                    elif entry.is_dir():
+                        # Like os.walk, links to directories are neither followed nor indexed,
+                        # so a link cycle cannot recurse forever, and the index stays in the pack
+                        continue
+                    else:
+                        stat = entry.stat()
+                        path = pathlib.Path(entry.path)
+                        self.entries[path] = FileIndexEntry(path, stat.st_size, stat.st_mtime_ns)
+                        files.append(path)
+                except FileNotFoundError:
+                    continue
+            self.directory_files[current] = files
+            self.subdirectories[current] = subdirectories
+            to_scan.extend(subdirectories)
+
+    def __contains__(self, path: pathlib.Path) -> bool:
+        return path in self.entries
+
+    def hasDirectory(self, directory: pathlib.Path) -> bool:
+        return directory in self.directory_files
+
+    def getEntry(self, path: pathlib.Path) -> Optional[FileIndexEntry]:
+        return self.entries.get(path)
+
+    def getFiles(self, directory: pathlib.Path, suffixes: Optional[Iterable[str]] = None,
+                 recursive: bool = True) -> list[pathlib.Path]:
+        """
+        Get the files in a directory which was scanned, or in one of its subdirectories.
+
+        Args:
+            directory (pathlib.Path): The directory, in the same form as it was scanned
+            suffixes (Optional[Iterable[str]], optional): Only return files with one of these suffixes. Defaults to None, which returns every file.
+            recursive (bool, optional): Whether to include files in subdirectories. Defaults to True.
+
+        Returns:
+            list[pathlib.Path]: The matching files, sorted
+        """
+        allowed_suffixes = set(suffixes) if suffixes is not None else None
+        files: list[pathlib.Path] = []
+        to_visit = [directory]
+        while len(to_visit) > 0:
+            current = to_visit.pop()
+            files.extend(path for path in self.directory_files.get(current, [])
+                         if allowed_suffixes is None or path.suffix in allowed_suffixes)
+            if recursive:
+                to_visit.extend(self.subdirectories.get(current, []))
+        return sorted(files)
+
+    def refresh(self, path: pathlib.Path) -> None:
+        """
+        Update the index after a single file has been created, modified, or deleted. The file's
+        directory must already be in the index.
+
+        Args:
+            path (pathlib.Path): The file, in the same form as the directories were scanned
+        """
+        files = self.directory_files.get(path.parent)
+        if files is None:
+            return
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if self.entries.pop(path, None) is not None:
+                files.remove(path)
+            return
+        if path not in self.entries:
+            files.append(path)
+        self.entries[path] = FileIndexEntry(path, stat.st_size, stat.st_mtime_ns)
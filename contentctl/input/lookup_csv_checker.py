@@ -0,0 +1,93 @@
+import os
+import csv
+import pathlib
+import functools
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from contentctl.input.yml_cache import YmlCache
+from contentctl.helper.process_pool import getProcessPoolContext
+
+# Below this many bytes of CSVs to check, the cost of starting a pool of worker
+# processes outweighs the time saved by checking the files in parallel.
+PARALLEL_CHECK_MIN_BYTES = 16 * 1024 * 1024
+# The version of the checks made by checkCsvStructure, which is part of the key of every cached
+# result. It MUST be incremented whenever the checks change, or results of the old checks are reused.
+CSV_CHECK_VERSION = "1"
+
+
+def checkCsvStructure(file_path: pathlib.Path) -> list[str]:
+    """
+    Check that every row of a CSV has the same number of fields as its header. Only the number
+    of fields in each row is counted, so this is much faster than reading the rows into dicts.
+    Like csv.DictReader, blank rows are skipped and are not counted when numbering the rows.
+
+    Args:
+        file_path (pathlib.Path): The CSV to check
+
+    Returns:
+        list[str]: A description of each problem with the CSV. Empty if the CSV is correct.
+    """
+    with open(file_path, "r") as csv_fp:
+        reader = csv.reader(csv_fp)
+        header = next(reader, None)
+        if header is None:
+            return ["Unable to read fieldnames from CSV. Is the CSV empty?"]
+        columns = len(header)
+        errors: list[str] = []
+        blank_rows = 0
+        # Remember that row 1 has the headers. CSVs are typically indexed starting at row 1 for the header.
+        for row_index, field_count in enumerate(map(len, reader), start=2):
+            if field_count == 0:
+                blank_rows += 1
+                continue
+            if field_count == columns:
+                continue
+            errors.append(f"row [{row_index - blank_rows}] should have [{columns}] columns, "
+                          f"but instead had [{field_count}].")
+        return errors
+
+
+def loadCsvErrors(file_path: pathlib.Path, cache: Optional[YmlCache]) -> list[str]:
+    if cache is None:
+        return checkCsvStructure(file_path)
+    return cache.load(file_path, checkCsvStructure)
+
+
+class LookupCsvChecker():
+    """
+    Checks the structure of the CSVs referenced by lookups. The result for each CSV is cached
+    on disk, so a CSV is not read again until its contents change. The CSVs of all lookups can
+    be checked in parallel before the lookups are constructed one at a time.
+    """
+
+    def __init__(self, cache: Optional[YmlCache] = None):
+        self.cache = cache
+
+    def getErrors(self, file_path: pathlib.Path) -> list[str]:
+        return loadCsvErrors(file_path, self.cache)
+
+    def checkFiles(self, file_paths: list[pathlib.Path], max_workers: Optional[int] = None) -> None:
+        """
+        Check every CSV which is not already in the cache, in parallel if there is enough to check.
+        Nothing is returned, since the results are read back from the cache by getErrors.
+
+        Args:
+            file_paths (list[pathlib.Path]): The CSVs to check. Files that do not exist are skipped.
+            max_workers (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+        """
+        if self.cache is None:
+            return
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        to_check = [file_path for file_path in file_paths
+                    if file_path.is_file() and not self.cache.isUnchanged(file_path)]
+        if max_workers < 2 or len(to_check) < 2 or sum(file_path.stat().st_size for file_path in to_check) < PARALLEL_CHECK_MIN_BYTES:
+            # The checks will be done, one at a time, as each lookup is constructed
+            return
+
+        # Start with the largest files so that one large file is not left running by itself at the end
+        to_check.sort(key=lambda file_path: file_path.stat().st_size, reverse=True)
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(to_check)), mp_context=getProcessPoolContext()) as executor:
+            for _ in executor.map(functools.partial(loadCsvErrors, cache=self.cache), to_check):
+                pass
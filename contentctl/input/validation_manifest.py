@@ -0,0 +1,134 @@
+from __future__ import annotations
+import hashlib
+import pathlib
+import importlib.metadata
+from typing import Iterable, Optional
+from pydantic import BaseModel, Field
+from contentctl.input.file_index import FileIndexEntry
+from contentctl.enrichments.enrichment_snapshot import EnrichmentSnapshot
+
+
+class FileState(BaseModel):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    @classmethod
+    def fromFile(cls, file_path: pathlib.Path, previous: Optional[FileState] = None) -> FileState:
+        stat = file_path.stat()
+        return cls.fromIndexEntry(FileIndexEntry(file_path, stat.st_size, stat.st_mtime_ns), previous)
+
+    @classmethod
+    def fromIndexEntry(cls, entry: FileIndexEntry, previous: Optional[FileState] = None) -> FileState:
+        if previous is not None and previous.size == entry.size and previous.mtime_ns == entry.mtime_ns:
+            # Same heuristic as git - if the size and mtime have not changed, the
+            # contents have not changed, so there is no need to hash the file again.
+            return previous.model_copy()
+        return cls(size=entry.size, mtime_ns=entry.mtime_ns, sha256=entry.getHash())
+
+
+class DetectionRecord(BaseModel):
+    # What is needed to check a detection against the rest of the content without validating it again
+    name: str
+    id: str
+    data_sources: list[str] = Field(default_factory=list)
+
+
+class ValidationManifest(BaseModel):
+    """
+    Records the state of every content file and the files that each detection depended on
+    the last time that all content was validated successfully. This allows subsequent runs of
+    'contentctl validate --incremental' to only validate the detections which have changed, or
+    which depend on content that has changed, since that run.
+    """
+    config_hash: str
+    files: dict[str, FileState] = Field(default_factory=dict)
+    # Maps the file_path of each detection to the file_paths of the macros, lookups,
+    # stories, data_sources, deployments, and baselines that it depends on
+    dependencies: dict[str, list[str]] = Field(default_factory=dict)
+    # Maps the file_path of each detection to its name, id, and data sources. Detections which are
+    # not validated again are still checked for duplicate names and ids, and missing data sources.
+    detections: dict[str, DetectionRecord] = Field(default_factory=dict)
+
+    @staticmethod
+    def getConfigHash(path: pathlib.Path, enrichments: bool, enrichment_repo_paths: Iterable[pathlib.Path] = ()) -> Optional[str]:
+        """
+        Hash everything other than the content itself which affects detection validation. If
+        contentctl, the configuration, or the commit of any enrichment repo has changed, then
+        the manifest cannot be reused.
+
+        Args:
+            path (pathlib.Path): The path to the content pack
+            enrichments (bool): Whether enrichments are enabled
+            enrichment_repo_paths (Iterable[pathlib.Path], optional): The repos that enrichment data is read from when enrichments are enabled. Defaults to ().
+
+        Returns:
+            Optional[str]: The hash, or None if enrichments are enabled but the commit of an enrichment repo cannot be found
+        """
+        try:
+            contentctl_version = importlib.metadata.version("contentctl")
+        except importlib.metadata.PackageNotFoundError:
+            contentctl_version = "unknown"
+        key_parts = [contentctl_version, str(path.absolute()), str(enrichments)]
+        if enrichments:
+            for repo_path in enrichment_repo_paths:
+                head = EnrichmentSnapshot.getRepoHead(repo_path)
+                if head is None:
+                    return None
+                key_parts.append(head)
+        return hashlib.sha256("|".join(key_parts).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def load(cls, manifest_path: pathlib.Path, config_hash: Optional[str]) -> Optional[ValidationManifest]:
+        if config_hash is None:
+            return None
+        try:
+            manifest = cls.model_validate_json(manifest_path.read_text())
+        except Exception:
+            # Missing, corrupt, or from an incompatible version of contentctl
+            return None
+        if manifest.config_hash != config_hash:
+            return None
+        return manifest
+
+    def save(self, manifest_path: pathlib.Path) -> None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = manifest_path.with_suffix(".tmp")
+        temp_path.write_text(self.model_dump_json())
+        temp_path.replace(manifest_path)
+
+    def getChangedFiles(self, current_files: dict[str, FileState]) -> set[str]:
+        """
+        Returns every file which has been added, modified, or deleted since the manifest was written.
+
+        Args:
+            current_files (dict[str, FileState]): The current state of all content files
+
+        Returns:
+            set[str]: paths of all added, modified, or deleted files
+        """
+        changed = {path for path, state in current_files.items()
+                   if path not in self.files or self.files[path].sha256 != state.sha256}
+        deleted = set(self.files) - set(current_files)
+        return changed | deleted
+
+    def getDetectionsToValidate(self, detection_files: list[pathlib.Path], changed_files: set[str]) -> list[pathlib.Path]:
+        """
+        Returns the detections which changed or which depend on a changed file. Detections which
+        were not in the manifest (for example, because they were added or renamed) are always returned.
+
+        Args:
+            detection_files (list[pathlib.Path]): All detection files in the repo
+            changed_files (set[str]): The output of getChangedFiles
+
+        Returns:
+            list[pathlib.Path]: The subset of detection_files which must be validated, in the same order
+        """
+        to_validate: list[pathlib.Path] = []
+        for detection_file in detection_files:
+            path = str(detection_file)
+            dependencies = self.dependencies.get(path, None)
+            if (path in changed_files or dependencies is None or path not in self.detections
+                    or not changed_files.isdisjoint(dependencies)):
+                to_validate.append(detection_file)
+        return to_validate
@@ -0,0 +1,116 @@
+import os
+import pickle
+import hashlib
+import pathlib
+import tempfile
+from typing import Any, Callable, Iterable
+
+
+class YmlCache():
+    """
+    An on-disk cache of parsed YML files. Each file gets its own cache entry which records the
+    size, mtime and sha256 of the file it was parsed from, along with the parsed object itself.
+    If the size and mtime of a file have not changed, the entry is used without reading the file.
+    If they have changed, the file is hashed and the entry is still used if the content is the same.
+    The cache works for the result of any function of the contents of a file, and is also used
+    for the results of checking lookup CSVs.
+
+    Every entry is written to a temporary file and then atomically moved into place, so multiple
+    contentctl processes may read and write the same cache at the same time.
+
+    The version is part of the key of every entry. A cache of the results of a function should be
+    given a new version whenever the function changes, so that its old results are not used.
+    """
+
+    def __init__(self, cache_path: pathlib.Path, version: str = ""):
+        self.cache_path = cache_path
+        self.version = version
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+
+        # Make sure that the cache is never accidentally committed to the content repo
+        gitignore_path = self.cache_path / ".gitignore"
+        if not gitignore_path.exists():
+            gitignore_path.write_text("*\n")
+
+    def getEntryPath(self, file_path: pathlib.Path) -> pathlib.Path:
+        key = str(file_path.absolute()) if self.version == "" else f"{self.version}|{file_path.absolute()}"
+        path_hash = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_path / f"{path_hash}.pickle"
+
+    def load(self, file_path: pathlib.Path, loader: Callable[[pathlib.Path], Any]) -> Any:
+        """
+        Return the parsed contents of file_path from the cache, calling loader to parse
+        the file (and updating the cache) if there is no up to date entry for it.
+
+        Args:
+            file_path (pathlib.Path): The YML file to load
+            loader (Callable[[pathlib.Path], Any]): Function that parses the file on a cache miss
+
+        Returns:
+            Any: The parsed contents of the file
+        """
+        entry_path = self.getEntryPath(file_path)
+        file_stat = file_path.stat()
+        entry = self.readEntry(entry_path)
+
+        if entry.get("size") == file_stat.st_size and entry.get("mtime_ns") == file_stat.st_mtime_ns:
+            return entry["data"]
+
+        # The hash is taken BEFORE the file is parsed. If the file is modified while
+        # it is being parsed, the entry will be stale and simply be refreshed next time.
+        with open(file_path, "rb") as raw_file:
+            sha256 = hashlib.sha256(raw_file.read()).hexdigest()
+
+        if entry.get("sha256") == sha256:
+            # The file was touched, but its contents are the same
+            data = entry["data"]
+        else:
+            data = loader(file_path)
+
+        self.store(entry_path, {"path": str(file_path),
+                                "size": file_stat.st_size,
+                                "mtime_ns": file_stat.st_mtime_ns,
+                                "sha256": sha256,
+                                "data": data})
+        return data
+
+    def readEntry(self, entry_path: pathlib.Path) -> dict[str, Any]:
+        try:
+            with open(entry_path, "rb") as entry_file:
+                return pickle.load(entry_file)
+        except Exception:
+            # Missing, unreadable, or from an incompatible version. Treat it as a miss.
+            return {}
+
+    def isUnchanged(self, file_path: pathlib.Path) -> bool:
+        # Whether load would return the cached entry without reading file_path
+        entry = self.readEntry(self.getEntryPath(file_path))
+        file_stat = file_path.stat()
+        return entry.get("size") == file_stat.st_size and entry.get("mtime_ns") == file_stat.st_mtime_ns
+
+    def store(self, entry_path: pathlib.Path, entry: dict[str, Any]) -> None:
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_path, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as temp_file:
+                    pickle.dump(entry, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, entry_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except Exception:
+            # Failing to update the cache must never fail the validation itself
+            pass
+
+    def prune(self, file_paths: Iterable[pathlib.Path]) -> None:
+        """
+        Remove the entries of all files which are not in file_paths, for example
+        because they have been deleted or renamed since they were cached.
+
+        Args:
+            file_paths (Iterable[pathlib.Path]): Every file which should remain in the cache
+        """
+        live_entries = {self.getEntryPath(file_path).name for file_path in file_paths}
+        for entry_path in self.cache_path.glob("*.pickle"):
+            if entry_path.name not in live_entries:
+                entry_path.unlink(missing_ok=True)
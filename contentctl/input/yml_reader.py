@@ -1,15 +1,33 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
 
 import yaml
 
 
+import os
 import sys
+import time
 import pathlib
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from contentctl.input.yml_cache import YmlCache
+from contentctl.helper.profiler import PROFILER
+from contentctl.helper.process_pool import getProcessPoolContext
+
+# Below this number of files, the cost of starting a pool of worker processes
+# outweighs the time saved by parsing the files in parallel.
+PARALLEL_LOAD_MIN_FILES = 64
 
 class YmlReader():
 
     @staticmethod
-    def load_file(file_path: pathlib.Path, add_fields=True, STRICT_YML_CHECKING=False) -> Dict[str,Any]:
+    def load_file(file_path: pathlib.Path, add_fields=True, STRICT_YML_CHECKING=False, cache: Optional[YmlCache] = None) -> Dict[str,Any]:
+        if cache is not None and not STRICT_YML_CHECKING:
+            yml_obj = cache.load(file_path, lambda path: YmlReader.load_file(path, add_fields=False))
+            if add_fields == False:
+                return yml_obj
+            yml_obj['file_path'] = str(file_path)
+            return yml_obj
+
         try:
             file_handler = open(file_path, 'r', encoding="utf-8")
             
@@ -45,3 +63,64 @@ class YmlReader():
     
 
         return yml_obj
+
+    @staticmethod
+    def load_file_timed(file_path: pathlib.Path, add_fields=True, cache: Optional[YmlCache] = None) -> Tuple[Dict[str,Any], float]:
+        # Timed in the worker process, so that the time excludes waiting for a worker
+        start = time.perf_counter()
+        yml_obj = YmlReader.load_file(file_path, add_fields=add_fields, cache=cache)
+        return yml_obj, time.perf_counter() - start
+
+    @staticmethod
+    def load_files(file_paths: list[pathlib.Path], add_fields=True, max_workers: Optional[int] = None, cache: Optional[YmlCache] = None) -> Iterator[Dict[str,Any]]:
+        """
+        Load a list of YML files, yielding each parsed dict in the same order as file_paths.
+        Reading and parsing is fanned out over a pool of worker processes and the results are
+        streamed back as they become available, so that the caller can begin validating the
+        first objects while the rest of the files are still being parsed.
+
+        Args:
+            file_paths (list[pathlib.Path]): The YML files to load
+            add_fields (bool, optional): Passed through to load_file. Defaults to True.
+            max_workers (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+            cache (Optional[YmlCache], optional): Cache of previously parsed files. Defaults to None.
+
+        Yields:
+            Iterator[Dict[str,Any]]: the parsed YML of each file, in the order of file_paths
+        """
+        if not PROFILER.enabled:
+            yield from YmlReader.map_files(YmlReader.load_file, file_paths, add_fields, max_workers, cache)
+            return
+
+        for file_path, (yml_obj, seconds) in zip(file_paths, YmlReader.map_files(YmlReader.load_file_timed, file_paths,
+                                                                                 add_fields, max_workers, cache)):
+            PROFILER.recordFile(file_path, seconds)
+            yield yml_obj
+
+    @staticmethod
+    def map_files(load: Callable[..., Any], file_paths: list[pathlib.Path], add_fields: bool, max_workers: Optional[int],
+                  cache: Optional[YmlCache]) -> Iterator[Any]:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        # Files which are already in the cache are read from it here, since that is much
+        # cheaper than starting a worker process to do the same
+        to_parse = file_paths if cache is None else [file_path for file_path in file_paths
+                                                     if not cache.isUnchanged(file_path)]
+        if max_workers < 2 or len(to_parse) < PARALLEL_LOAD_MIN_FILES:
+            for file_path in file_paths:
+                yield load(file_path, add_fields=add_fields, cache=cache)
+            return
+
+        # Hand out work in a few chunks per worker to amortize the cost of
+        # sending paths and results between processes
+        chunksize = max(1, len(to_parse) // (max_workers * 4))
+        to_parse_set = set(to_parse)
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=getProcessPoolContext()) as executor:
+            parsed = executor.map(functools.partial(load, add_fields=add_fields, cache=cache),
+                                  to_parse, chunksize=chunksize)
+            for file_path in file_paths:
+                if file_path in to_parse_set:
+                    yield next(parsed)
+                else:
+                    yield load(file_path, add_fields=add_fields, cache=cache)
@@ -23,6 +23,7 @@ if TYPE_CHECKING:
     from contentctl.objects.config import CustomApp
     
 from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.abstract_security_content_objects.security_content_object_abstract import cachedWhenFrozen
 from contentctl.objects.enums import AnalyticsType
 from contentctl.objects.enums import DataModel
 from contentctl.objects.enums import DetectionStatus
@@ -39,6 +40,7 @@ from contentctl.objects.base_test_result import TestResultStatus
 
 from contentctl.objects.enums import ProvidingTechnology
 from contentctl.enrichments.cve_enrichment import CveEnrichmentObj
+from contentctl.objects.spl_analysis import analyzeSpl
 import datetime
 from contentctl.objects.constants import (
     ES_MAX_STANZA_LENGTH,
@@ -260,14 +262,16 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def datamodel(self) -> List[DataModel]:
-        return [dm for dm in DataModel if dm.value in self.search]
+        return list(analyzeSpl(self.search).datamodels)
         
             
     
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def source(self) -> str:
         return self.file_path.absolute().parent.name
         
@@ -276,6 +280,7 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def annotations(self) -> dict[str, Union[List[str], int, str]]:
 
         annotations_dict: dict[str, str | list[str] | int] = {}
@@ -303,6 +308,7 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def mappings(self) -> dict[str, List[str]]:
         mappings: dict[str, Any] = {}
         if len(self.tags.cis20) > 0:
@@ -348,6 +354,7 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def nes_fields(self) -> Optional[str]:
         if self.deployment.alert_action.notable is not None:
             return ','.join(self.deployment.alert_action.notable.nes_fields)
@@ -356,12 +363,14 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def providing_technologies(self) -> List[ProvidingTechnology]:
-        return ProvidingTechnology.getProvidingTechFromSearch(self.search)
+        return list(analyzeSpl(self.search).providing_technologies)
 
     # TODO (#247): Refactor the risk property of detection_abstract
     @computed_field
     @property
+    @cachedWhenFrozen
     def risk(self) -> list[dict[str, Any]]:
         risk_objects: list[dict[str, str | int]] = []
         # TODO (#246): "User Name" type should map to a "user" risk object and not "other"
@@ -422,6 +431,7 @@ class Detection_Abstract(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def metadata(self) -> dict[str, str|float]:
         # NOTE: we ignore the type error around self.status because we are using Pydantic's
         # use_enum_values configuration
@@ -502,38 +512,35 @@ class Detection_Abstract(SecurityContentObject):
         # return the model
         return super_fields
 
+    def getDataSourceNames(self) -> list[str]:
+        # Data source may be defined 1 on each line, OR they may be defined as
+        # SOUCE_1 AND ANOTHERSOURCE AND A_THIRD_SOURCE
+        # if more than 1 data source is required for a detection (for example, because it includes a join)
+        # Parse and update the list to resolve individual names and remove potential duplicates
+        updated_data_source_names: set[str] = set()
+
+        for ds in self.data_source:
+            split_data_sources = {d.strip() for d in ds.split('AND')}
+            updated_data_source_names.update(split_data_sources)
+
+        return sorted(list(updated_data_source_names))
+
     def model_post_init(self, __context: Any) -> None:
         super().model_post_init(__context)
         director: Optional[DirectorOutputDto] = __context.get("output_dto", None)
 
         # Ensure that all baselines link to this detection
+        resolved_baselines: list[Baseline] = []
+        if director is not None:
+            resolved_baselines = director.resolveBaselineDetectionReferences(self)
         for baseline in self.baselines:
-            new_detections: list[Detection_Abstract | str] = []
-            replaced = False
-            for d in baseline.tags.detections:
-                if isinstance(d, str) and self.name == d:
-                    new_detections.append(self)
-                    replaced = True
-                else:
-                    new_detections.append(d)
-            if replaced is False:
+            if baseline not in resolved_baselines:
                 raise ValueError(
                     f"Error, failed to replace detection reference in Baseline '{baseline.name}' "
                     f"to detection '{self.name}'"
                 )
-            baseline.tags.detections = new_detections
 
-        # Data source may be defined 1 on each line, OR they may be defined as
-        # SOUCE_1 AND ANOTHERSOURCE AND A_THIRD_SOURCE
-        # if more than 1 data source is required for a detection (for example, because it includes a join)
-        # Parse and update the list to resolve individual names and remove potential duplicates
-        updated_data_source_names: set[str] = set()
-
-        for ds in self.data_source:
-            split_data_sources = {d.strip() for d in ds.split('AND')}
-            updated_data_source_names.update(split_data_sources)
-
-        sources = sorted(list(updated_data_source_names))
+        sources = self.getDataSourceNames()
 
         matched_data_sources: list[DataSource] = []
         missing_sources: list[str] = []
@@ -555,9 +562,6 @@ class Detection_Abstract(SecurityContentObject):
 
         self.data_source_objects = matched_data_sources
 
-        for story in self.tags.analytic_story:
-            story.detections.append(self)     
-
         self.cve_enrichment_func(__context)
 
         # Derive TestGroups and IntegrationTests, adjust for ManualTests, skip as needed
@@ -591,17 +595,10 @@ class Detection_Abstract(SecurityContentObject):
             raise ValueError("ValidationInfo.context unexpectedly null")
 
         director: DirectorOutputDto = info.context.get("output_dto", None)
-        baselines: List[Baseline] = []
-        for baseline in director.baselines:
-            # This matching is a bit strange, because baseline.tags.detections starts as a list of strings, but
-            # is eventually updated to a list of Detections as we construct all of the detection objects.
-            detection_names = [
-                detection_name for detection_name in baseline.tags.detections if isinstance(detection_name, str)
-            ]
-            if name in detection_names:
-                baselines.append(baseline)
-
-        return baselines
+        # baseline.tags.detections starts as a list of strings, but is updated to a list of Detections
+        # as we construct all of the detection objects. The director indexes the references which
+        # are still strings, so there is no need to search every baseline for this detection.
+        return director.getBaselinesReferencingDetection(name)
 
     @field_validator('macros', mode="before")
     @classmethod
@@ -625,18 +622,20 @@ class Detection_Abstract(SecurityContentObject):
             .replace('/', '_')\
             .lower()\
             + '_filter'
-        try:
-            filter_macro = Macro.mapNamesToSecurityContentObjects([filter_macro_name], director)[0]
-        except Exception:
-            # Filter macro did not exist, so create one at runtime
-            filter_macro = Macro.model_validate(
-                {
-                    "name": filter_macro_name,
-                    "definition": 'search *',
-                    "description": 'Update this macro to limit the output results to filter out false positives.'
-                }
-            )
-            director.addContentToDictMappings(filter_macro)
+        # Held so that no other detection, being validated at the same time, creates the same macro
+        with director.lock:
+            try:
+                filter_macro = Macro.mapNamesToSecurityContentObjects([filter_macro_name], director)[0]
+            except Exception:
+                # Filter macro did not exist, so create one at runtime
+                filter_macro = Macro.model_validate(
+                    {
+                        "name": filter_macro_name,
+                        "definition": 'search *',
+                        "description": 'Update this macro to limit the output results to filter out false positives.'
+                    }
+                )
+                director.addContentToDictMappings(filter_macro)
 
         macros_from_search = Macro.get_macros(search, director)
 
@@ -647,6 +646,10 @@ class Detection_Abstract(SecurityContentObject):
         objects: list[SecurityContentObject] = []
         objects += self.macros
         objects += self.lookups
+        objects += self.tags.analytic_story
+        objects += self.data_source_objects
+        objects += self.baselines
+        objects.append(self.deployment)
         return objects
 
     @field_validator("deployment", mode="before")
@@ -753,11 +756,12 @@ class Detection_Abstract(SecurityContentObject):
         # All $field$ fields from the message must appear in the search
         field_match_regex = r"\$([^\s.]*)\$"
 
+        search_lower = analyzeSpl(self.search).search_lower
         missing_fields: set[str]
         if self.tags.message:
             matches = re.findall(field_match_regex, self.tags.message.lower())
             message_fields = [match.replace("$", "").lower() for match in matches]
-            missing_fields = set([field for field in observable_fields if field not in self.search.lower()])
+            missing_fields = set([field for field in observable_fields if field not in search_lower])
         else:
             message_fields = []
             missing_fields = set()
@@ -769,7 +773,7 @@ class Detection_Abstract(SecurityContentObject):
                 f"search: {missing_fields}"
             )
 
-        missing_fields = set([field for field in message_fields if field not in self.search.lower()])
+        missing_fields = set([field for field in message_fields if field not in search_lower])
         if len(missing_fields) > 0:
             error_messages.append(
                 "The following fields are used as fields in the message, but do not exist in "
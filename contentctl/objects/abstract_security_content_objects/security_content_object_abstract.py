@@ -11,6 +11,7 @@ from contentctl.objects.enums import AnalyticsType
 from contentctl.objects.constants import CONTENTCTL_MAX_STANZA_LENGTH
 import abc
 import uuid
+import functools
 import datetime
 import pprint
 from pydantic import (
@@ -22,14 +23,29 @@ from pydantic import (
     HttpUrl,
     NonNegativeInt,
     ConfigDict,
-    model_serializer
+    model_serializer,
+    PrivateAttr
 )
-from typing import Tuple, Optional, List, Union
+from typing import Tuple, Optional, List, Union, Callable, TypeVar
 import pathlib
 
 
 NO_FILE_NAME = "NO_FILE_NAME"
 
+T = TypeVar("T")
+
+
+def cachedWhenFrozen(func: Callable[[Any], T]) -> Callable[[Any], T]:
+    """
+    Decorator for the getter of a computed_field. Once freezeComputedFields has been called on
+    the object, the value is only computed the first time that it is accessed. Until then, or
+    after invalidateComputedFields, it is computed on every access as usual.
+    """
+    @functools.wraps(func)
+    def wrapper(self: SecurityContentObject_Abstract) -> T:
+        return self.cacheWhenFrozen(func.__name__, lambda: func(self))
+    return wrapper
+
 
 # TODO (#266): disable the use_enum_values configuration
 class SecurityContentObject_Abstract(BaseModel, abc.ABC):
@@ -43,10 +59,36 @@ class SecurityContentObject_Abstract(BaseModel, abc.ABC):
     description: str = Field(...,max_length=10000)
     file_path: Optional[FilePath] = None
     references: Optional[List[HttpUrl]] = None
+    _computed_field_cache: Optional[dict[str, Any]] = PrivateAttr(default=None)
 
     def model_post_init(self, __context: Any) -> None:
         self.ensureFileNameMatchesSearchName()
 
+    def freezeComputedFields(self) -> None:
+        # Called once all content has been validated and every reference between objects has
+        # been resolved. From then on, computed fields decorated with cachedWhenFrozen are
+        # served from a cache, since templates and model_dump access them many times.
+        if self._computed_field_cache is None:
+            self._computed_field_cache = {}
+
+    def invalidateComputedFields(self) -> None:
+        # Must be called after modifying a frozen object, so that its computed fields are recomputed
+        if self._computed_field_cache is not None:
+            self._computed_field_cache = {}
+
+    def cacheWhenFrozen(self, key: str, compute: Callable[[], T]) -> T:
+        # The same caching as cachedWhenFrozen, for anything else that is derived only from the
+        # object, such as its rendered conf stanzas
+        cache = self._computed_field_cache
+        if cache is None:
+            return compute()
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def isCachedWhenFrozen(self, key: str) -> bool:
+        return self._computed_field_cache is not None and key in self._computed_field_cache
+
     @model_serializer
     def serialize_model(self):
         return {
@@ -65,6 +107,11 @@ class SecurityContentObject_Abstract(BaseModel, abc.ABC):
             raise ValueError(f"conf stanza may only be {max_stanza_length} characters, "
                              f"but stanza was actually {len(stanza_name)} characters: '{stanza_name}' ")
     
+    def get_content_dependencies(self) -> list[SecurityContentObject]:
+        # The other content that this object references, and which must therefore be loaded
+        # before it. Overridden by the types of content which reference other content.
+        return []
+
     @staticmethod
     def objectListToNameList(objects: list[SecurityContentObject]) -> list[str]:
         return [object.getName() for object in objects]
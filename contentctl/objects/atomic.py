@@ -3,11 +3,17 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from contentctl.objects.config import validate
 
-from contentctl.input.yml_reader import YmlReader
-from pydantic import BaseModel, model_validator, ConfigDict, FilePath, UUID4
+from contentctl.input.yml_reader import YmlReader, PARALLEL_LOAD_MIN_FILES
+from contentctl.enrichments.enrichment_snapshot import EnrichmentSnapshot
+from contentctl.enrichments.enrichment_loader import EnrichmentLoader
+from pydantic import BaseModel, model_validator, ConfigDict, FilePath, UUID4, PrivateAttr
 import dataclasses
+import functools
 from typing import List, Optional, Dict, Union, Self
+import os
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from contentctl.helper.process_pool import getProcessPoolContext
 from enum import StrEnum, auto
 import uuid
 
@@ -107,11 +113,12 @@ class AtomicTest(BaseModel):
 
         atomic_files:List[AtomicFile] = []
         error_messages:List[str] = []
-        for obj_path in atomics_path.glob("**/T*.yaml"):
-            try:
-                atomic_files.append(cls.constructAtomicFile(obj_path))
-            except Exception as e:
-                error_messages.append(f"File [{obj_path}]\n{str(e)}")
+        obj_paths = list(atomics_path.glob("**/T*.yaml"))
+        for result in cls.constructAtomicFiles(obj_paths):
+            if isinstance(result, AtomicFile):
+                atomic_files.append(result)
+            else:
+                error_messages.append(result)
 
         if len(error_messages) > 0:
             exceptions_string = '\n\n'.join(error_messages)
@@ -143,6 +150,30 @@ class AtomicTest(BaseModel):
         atomic_file = AtomicFile.model_validate(yml_dict)
         return atomic_file
 
+    @classmethod
+    def tryConstructAtomicFile(cls, file_path:pathlib.Path)->Union[AtomicFile, str]:
+        # Errors are returned as strings rather than raised, since not every
+        # exception (for example, a ValidationError) can be sent between processes
+        try:
+            return cls.constructAtomicFile(file_path)
+        except Exception as e:
+            return f"File [{file_path}]\n{str(e)}"
+
+    @classmethod
+    def constructAtomicFiles(cls, file_paths:List[pathlib.Path])->List[Union[AtomicFile, str]]:
+        '''
+        Parse and validate every file, in parallel across a pool of worker processes when
+        there are enough files to make that worthwhile. The results are in the same order
+        as file_paths. Files which could not be parsed are returned as an error message.
+        '''
+        max_workers = os.cpu_count() or 1
+        if max_workers < 2 or len(file_paths) < PARALLEL_LOAD_MIN_FILES:
+            return [cls.tryConstructAtomicFile(file_path) for file_path in file_paths]
+
+        chunksize = max(1, len(file_paths) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=getProcessPoolContext()) as executor:
+            return list(executor.map(cls.tryConstructAtomicFile, file_paths, chunksize=chunksize))
+
 
 class AtomicFile(BaseModel):
     model_config = ConfigDict(extra='forbid')
@@ -155,17 +186,40 @@ class AtomicFile(BaseModel):
 class AtomicEnrichment(BaseModel):
     data: dict[uuid.UUID,AtomicTest] = dataclasses.field(default_factory = dict)
     use_enrichment: bool = False
+    _loader: Optional[EnrichmentLoader] = PrivateAttr(default=None)
 
     @classmethod
     def getAtomicEnrichment(cls, config:validate)->AtomicEnrichment:
         enrichment = AtomicEnrichment(use_enrichment=config.enrichments)
         if config.enrichments:
-            enrichment.data = AtomicTest.parseArtRepo(config.atomic_red_team_repo_path)
+            # Nothing is loaded until the first test is looked up or warm() is called
+            enrichment._loader = EnrichmentLoader(functools.partial(enrichment.loadAtomicData, config), "Atomic Red Team")
 
         return enrichment
 
+    def loadAtomicData(self, config:validate)->None:
+        # Reuse the parsed tests until a different commit of the repo is checked out
+        snapshot = EnrichmentSnapshot(config.ensureCachePathExists()/"atomic_red_team_enrichment.pickle", config.atomic_red_team_repo_path)
+        data = None if config.rebuild_enrichment_cache else snapshot.load()
+        if data is not None:
+            print(f"Loaded [{len(data)}] Atomic Red Team Tests from {snapshot.snapshot_path}")
+            self.data = data
+        else:
+            self.data = AtomicTest.parseArtRepo(config.atomic_red_team_repo_path)
+            snapshot.save(self.data)
+
+    def warm(self)->None:
+        # Start loading the enrichment in the background so that it is ready by the time it is needed
+        if self._loader is not None:
+            self._loader.startWarming()
+
+    def ensureLoaded(self)->None:
+        if self._loader is not None:
+            self._loader.ensureLoaded()
+
     def getAtomic(self, atomic_guid: uuid.UUID)->AtomicTest:
         if self.use_enrichment:
+            self.ensureLoaded()
             if atomic_guid in self.data:
                 return self.data[atomic_guid]
             else:
@@ -30,6 +30,12 @@ class Baseline(SecurityContentObject):
         self.check_conf_stanza_max_length(stanza_name)
         return stanza_name
 
+    def get_content_dependencies(self) -> list[SecurityContentObject]:
+        objects: list[SecurityContentObject] = []
+        objects += self.tags.analytic_story
+        objects.append(self.deployment)
+        return objects
+
     @field_validator("deployment", mode="before")
     def getDeployment(cls, v:Any, info:ValidationInfo)->Deployment:
         return Deployment.getDeployment(v,info)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from os import environ
 from datetime import datetime, UTC
-from typing import Optional, Any, List, Union, Self
+from typing import TYPE_CHECKING, Optional, Any, List, Union, Self
 import random
 from enum import StrEnum, auto
 import pathlib
@@ -10,7 +10,6 @@ from urllib.parse import urlparse
 from abc import ABC, abstractmethod
 from functools import partialmethod
 
-import tqdm
 import semantic_version
 from pydantic import (
     BaseModel, Field, field_validator, 
@@ -19,13 +18,16 @@ from pydantic import (
     ValidationInfo
 )
 
-from contentctl.objects.constants import DOWNLOADS_DIRECTORY
+from contentctl.objects.constants import DOWNLOADS_DIRECTORY, CACHE_DIRECTORY
 from contentctl.output.yml_writer import YmlWriter
 from contentctl.helper.utils import Utils
 from contentctl.objects.enums import PostTestBehavior, DetectionTestingMode
-from contentctl.objects.detection import Detection
 from contentctl.objects.annotated_types import APPID_TYPE
-from contentctl.helper.splunk_app import SplunkApp
+
+if TYPE_CHECKING:
+    # Only needed for annotations. Importing the content objects at runtime would load
+    # all of them just to build the command line.
+    from contentctl.objects.detection import Detection
 
 ENTERPRISE_SECURITY_UID = 263
 COMMON_INFORMATION_MODEL_UID = 1621
@@ -196,6 +198,22 @@ class validate(Config_Base):
     build_app: bool = Field(default=True, description="Should an app be built and output in the build_path?")
     build_api: bool = Field(default=False, description="Should api objects be built and output in the build_path?")
     data_source_TA_validation: bool = Field(default=False, description="Validate latest TA information from Splunkbase")
+    incremental: bool = Field(default=False, exclude=True, description="Only validate the detections which have changed, "
+                              "or which depend on content that has changed, since the last successful run of contentctl. "
+                              "All other types of content are always validated. Every detection is validated again when contentctl, the "
+                              "configuration, or (with enrichments) the commit of an enrichment repo changes. This is useful for pre-commit hooks, but "
+                              "is only supported by 'contentctl validate' since every other action requires all detections.")
+    rebuild_enrichment_cache: bool = Field(default=False, exclude=True, description="Enrichment data parsed from the repos in "
+                                           "external_repos is cached and reused until the commit checked out in each repo changes. "
+                                           "Ignore the cached data and parse the repos again.")
+    profile: bool = Field(default=False, exclude=True, description="Record the wall time, CPU time, and peak memory use of each "
+                          "phase of the command, and the time taken to parse and validate each file. A Chrome trace (which "
+                          "can be opened in chrome://tracing or https://ui.perfetto.dev) and a text summary are written to "
+                          "the profile directory in the contentctl cache.")
+    watch: bool = Field(default=False, exclude=True, description="Keep running after the content has been validated (and built), "
+                        "and validate (and build) it again whenever a file in one of the content directories changes. Only the "
+                        "content affected by the change is validated and rendered again. Only supported by 'contentctl validate' "
+                        "and 'contentctl build'.")
 
     @property
     def external_repos_path(self)->pathlib.Path:
@@ -209,6 +227,22 @@ class validate(Config_Base):
     def atomic_red_team_repo_path(self):
         return self.external_repos_path/"atomic-red-team"
 
+    @property
+    def cache_path(self)->pathlib.Path:
+        return self.path/CACHE_DIRECTORY
+
+    @property
+    def profile_path(self)->pathlib.Path:
+        return self.cache_path/"profile"
+
+    def ensureCachePathExists(self)->pathlib.Path:
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        # Make sure that nothing in the cache is ever accidentally committed to the content repo
+        gitignore_path = self.cache_path/".gitignore"
+        if not gitignore_path.exists():
+            gitignore_path.write_text("*\n")
+        return self.cache_path
+
     @model_validator(mode="after")
     def ensureEnrichmentReposPresent(self)->Self:
         '''
@@ -237,6 +271,33 @@ class validate(Config_Base):
             raise FileNotFoundError(msg)
         return self
 
+    @model_validator(mode="after")
+    def ensureIncrementalOnlyUsedByValidate(self)->Self:
+        # Subclasses, like build and report, must see every detection
+        if self.incremental and type(self) is not validate:
+            raise ValueError("incremental may only be used with 'contentctl validate'")
+        return self
+
+    @model_validator(mode="after")
+    def ensureWatchOnlyUsedByValidateOrBuild(self)->Self:
+        if not self.watch:
+            return self
+        if type(self) not in (validate, build):
+            raise ValueError("watch may only be used with 'contentctl validate' or 'contentctl build'")
+        if self.incremental:
+            # Watch mode validates each change against all of the content, so it must all be loaded
+            raise ValueError("watch may not be used with incremental")
+        return self
+
+class serve(validate):
+    socket: Optional[pathlib.Path] = Field(default=None, exclude=True, description="The Unix socket to accept requests on. "
+                                           "Defaults to contentctl.sock in the contentctl cache.")
+
+    def getSocketPath(self)->pathlib.Path:
+        if self.socket is not None:
+            return self.socket
+        return self.cache_path/"contentctl.sock"
+
 class report(validate):
     #reporting takes no extra args, but we define it here so that it can be a mode on the command line    
     def getReportingPath(self)->pathlib.Path:
@@ -365,6 +426,7 @@ class inspect(build):
                 f"Downloading latest {self.app.label} build from Splunkbase to serve as previous "
                 "build during validation..."
             )
+            from contentctl.helper.splunk_app import SplunkApp
             app = SplunkApp(app_uid=self.app.uid)
             previous_build_path = app.download(
                 out=pathlib.Path(DOWNLOADS_DIRECTORY),
@@ -773,6 +835,8 @@ class test_common(build):
     @model_validator(mode='after')
     def suppressTQDM(self)->Self:
         if self.disable_tqdm:
+            # tqdm is only imported by the subcommands which show progress bars
+            import tqdm
             tqdm.tqdm.__init__ = partialmethod(tqdm.tqdm.__init__, disable=True)
             if self.post_test_behavior != PostTestBehavior.never_pause.value:
                 raise ValueError(f"You have disabled tqdm, presumably because you are "
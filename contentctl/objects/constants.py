@@ -143,6 +143,10 @@ RBA_OBSERVABLE_ROLE_MAPPING = {
 # The relative path to the directory where any apps/packages will be downloaded
 DOWNLOADS_DIRECTORY = "downloads"
 
+# The relative path to the directory where intermediate results, such as
+# parsed YML files, are cached between runs of contentctl
+CACHE_DIRECTORY = ".contentctl_cache"
+
 # Maximum length of the name field for a search.
 # This number is derived from a limitation that exists in 
 # ESCU where a search cannot be edited, due to validation
@@ -89,12 +89,8 @@ class Dashboard(SecurityContentObject):
         return pathlib.Path("default/data/ui/views")/filename
     
     
-    def writeDashboardFile(self, j2_env:Environment, config:build):
+    def renderDashboardFile(self, j2_env:Environment, config:build) -> str:
         template = j2_env.from_string(self.j2_template)
-        dashboard_text = template.render(config=config, dashboard=self)
-
-        with open(config.getPackageDirectoryPath()/self.getOutputFilepathRelativeToAppRoot(config), 'a') as f:
-            output_xml = dashboard_text.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output_xml)
+        return template.render(config=config, dashboard=self)
 
 
@@ -3,6 +3,7 @@ import re
 from typing import List, Any
 from pydantic import computed_field, Field, ConfigDict,model_serializer
 from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.abstract_security_content_objects.security_content_object_abstract import cachedWhenFrozen
 from contentctl.objects.enums import DataModel
 from contentctl.objects.investigation_tags import InvestigationTags
 from contentctl.objects.constants import (
@@ -28,6 +29,7 @@ class Investigation(SecurityContentObject):
     # enrichment
     @computed_field
     @property
+    @cachedWhenFrozen
     def inputs(self)->List[str]:
         #Parse out and return all inputs from the searchj
         inputs:List[str] = []
@@ -40,6 +42,7 @@ class Investigation(SecurityContentObject):
 
     @computed_field
     @property
+    @cachedWhenFrozen
     def lowercase_name(self)->str:
         return self.name.replace(' ', '_').replace('-','_').replace('.','_').replace('/','_').lower().replace(' ', '_').replace('-','_').replace('.','_').replace('/','_').lower()
 
@@ -78,6 +81,11 @@ class Investigation(SecurityContentObject):
         return super_fields
 
 
+    def get_content_dependencies(self) -> list[SecurityContentObject]:
+        objects: list[SecurityContentObject] = []
+        objects += self.tags.analytic_story
+        return objects
+
     def model_post_init(self, ctx:dict[str,Any]):
         # Ensure we link all stories this investigation references
         # back to itself
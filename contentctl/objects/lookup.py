@@ -1,14 +1,14 @@
 from __future__ import annotations
 from pydantic import field_validator, ValidationInfo, model_validator, FilePath, model_serializer, Field, NonNegativeInt
 from typing import TYPE_CHECKING, Optional, Any, Union
-import re
-import csv
 import uuid
 import datetime
 if TYPE_CHECKING:
     from contentctl.input.director import DirectorOutputDto
     from contentctl.objects.config import validate
 from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.spl_analysis import analyzeSpl
+from contentctl.input.lookup_csv_checker import checkCsvStructure
 
 # This section is used to ignore lookups that are NOT  shipped with ESCU app but are used in the detections. Adding exclusions here will so that contentctl builds will not fail.
 LOOKUPS_TO_IGNORE = set(["outputlookup"])
@@ -87,30 +87,13 @@ class Lookup(SecurityContentObject):
             # Do not need any additional checks for an mlmodel file
             return
 
-        # https://docs.python.org/3/library/csv.html#csv.DictReader
-        # Column Names (fieldnames) determine by the number of columns in the first row.
-        # If a row has MORE fields than fieldnames, they will be dumped in a list under the key 'restkey' - this should throw an Exception
-        # If a row has LESS fields than fieldnames, then the field should contain None by default. This should also throw an exception.    
-        csv_errors:list[str] = []
-        with open(filenamePath, "r") as csv_fp:
-            RESTKEY = "extra_fields_in_a_row"
-            csv_dict = csv.DictReader(csv_fp, restkey=RESTKEY)            
-            if csv_dict.fieldnames is None:
-                raise ValueError(f"Error validating the CSV referenced by the lookup: {filenamePath}:\n\t"
-                                 "Unable to read fieldnames from CSV. Is the CSV empty?\n"
-                                 "  Please try opening the file with a CSV Editor to ensure that it is correct.")
-            # Remember that row 1 has the headers and we do not iterate over it in the loop below
-            # CSVs are typically indexed starting a row 1 for the header.
-            for row_index, data_row in enumerate(csv_dict):
-                row_index+=2
-                if len(data_row.get(RESTKEY,[])) > 0:
-                    csv_errors.append(f"row [{row_index}] should have [{len(csv_dict.fieldnames)}] columns,"
-                                      f" but instead had [{len(csv_dict.fieldnames) + len(data_row.get(RESTKEY,[]))}].")
-                
-                for column_index, column_name in enumerate(data_row):
-                    if data_row[column_name] is None:
-                        csv_errors.append(f"row [{row_index}] should have [{len(csv_dict.fieldnames)}] columns, "
-                                          f"but instead had [{column_index}].")
+        # Every row must have the same number of columns as the header. The CSVs are usually checked
+        # in parallel, and the results cached, before the lookups are constructed.
+        director: Optional[DirectorOutputDto] = ctx.get("output_dto", None) if ctx is not None else None
+        if director is not None:
+            csv_errors = director.lookup_csv_checker.getErrors(filenamePath)
+        else:
+            csv_errors = checkCsvStructure(filenamePath)
         if len(csv_errors) > 0:
             err_string = '\n\t'.join(csv_errors)
             raise ValueError(f"Error validating the CSV referenced by the lookup: {filenamePath}:\n\t{err_string}\n"
@@ -146,7 +129,7 @@ class Lookup(SecurityContentObject):
     
     @staticmethod
     def get_lookups(text_field: str, director:DirectorOutputDto, ignore_lookups:set[str]=LOOKUPS_TO_IGNORE)->list[Lookup]:
-        lookups_to_get = set(re.findall(r'[^output]lookup (?:update=true)?(?:append=t)?\s*([^\s]*)', text_field))
+        lookups_to_get = set(analyzeSpl(text_field).lookups)
         lookups_to_ignore = set([lookup for lookup in lookups_to_get if any(to_ignore in lookups_to_get for to_ignore in ignore_lookups)])
         lookups_to_get -= lookups_to_ignore
         return Lookup.mapNamesToSecurityContentObjects(list(lookups_to_get), director)
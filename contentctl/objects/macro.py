@@ -2,13 +2,13 @@
 # type Macro as an argument
 from __future__ import annotations
 from typing import TYPE_CHECKING, List
-import re
 from pydantic import Field, model_serializer, NonNegativeInt
 import uuid
 import datetime
 if TYPE_CHECKING:
     from contentctl.input.director import DirectorOutputDto
 from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.spl_analysis import analyzeSpl
 
 
 #The following macros are included in commonly-installed apps.
@@ -51,17 +51,9 @@ class Macro(SecurityContentObject):
     @staticmethod
 
     def get_macros(text_field:str, director:DirectorOutputDto , ignore_macros:set[str]=MACROS_TO_IGNORE)->list[Macro]:
-        #Remove any comments, allowing there to be macros (which have a single backtick) inside those comments
-        #If a comment ENDS in a macro, for example ```this is a comment with a macro `macro_here````
-        #then there is a small edge case where the regex below does not work properly.  If that is 
-        #the case, we edit the search slightly to insert a space
-        text_field = re.sub(r"\`\`\`\`", r"` ```", text_field)
-        text_field = re.sub(r"\`\`\`.*?\`\`\`", " ", text_field)
-        
-
-        macros_to_get = re.findall(r'`([^\s]+)`', text_field)
-        #If macros take arguments, stop at the first argument.  We just want the name of the macro
-        macros_to_get = set([macro[:macro.find('(')] if macro.find('(') != -1 else macro for macro in macros_to_get])
+        #Macros inside of comments are ignored, and if macros take arguments, only
+        #the name of the macro is returned.  See analyzeSpl for details
+        macros_to_get = set(analyzeSpl(text_field).macros)
         
         macros_to_ignore = set([macro for macro in macros_to_get if any(to_ignore in macro for to_ignore in ignore_macros)])
         #remove the ones that we will ignore
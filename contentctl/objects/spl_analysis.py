@@ -0,0 +1,69 @@
+from __future__ import annotations
+import re
+import functools
+from dataclasses import dataclass
+
+from contentctl.objects.enums import DataModel, ProvidingTechnology
+
+
+# Comments are delimited by triple backticks. If a comment ENDS in a macro, for example
+# ```this is a comment with a macro `macro_here````, then the comment regex does not work
+# properly, so a space is inserted before the closing backticks first.
+COMMENT_ENDING_IN_MACRO_REGEX = re.compile(r"\`\`\`\`")
+COMMENT_REGEX = re.compile(r"\`\`\`(.*?)\`\`\`")
+MACRO_REGEX = re.compile(r'`([^\s]+)`')
+LOOKUP_REGEX = re.compile(r'[^output]lookup (?:update=true)?(?:append=t)?\s*([^\s]*)')
+
+# The number of distinct searches whose analysis is kept. This comfortably holds every
+# search in a large content repo, while bounding memory use in long-running processes.
+SPL_ANALYSIS_CACHE_SIZE = 32768
+
+
+@dataclass(frozen=True)
+class SplAnalysis:
+    """
+    Everything that contentctl extracts from a single SPL search. This is computed once per
+    distinct search by analyzeSpl, so the validators and computed fields of every object with
+    the same search share one analysis instead of each re-scanning the search.
+    """
+    search: str
+    # The search, lower cased, for case-insensitive field checks
+    search_lower: str
+    # The text of every `macro` outside of comments, including arguments, e.g. "macro_name(arg1,arg2)"
+    macro_calls: tuple[str, ...]
+    # The names of every macro outside of comments, without arguments
+    macros: frozenset[str]
+    # The names of every lookup used by a lookup/inputlookup command
+    lookups: frozenset[str]
+    # Every datamodel whose name appears in the search, in DataModel order
+    datamodels: tuple[DataModel, ...]
+    providing_technologies: tuple[ProvidingTechnology, ...]
+
+
+@functools.lru_cache(maxsize=SPL_ANALYSIS_CACHE_SIZE)
+def analyzeSpl(search: str) -> SplAnalysis:
+    """
+    Analyze an SPL search. The result is cached, so analyzing the same search again is free.
+
+    Args:
+        search (str): The SPL search
+
+    Returns:
+        SplAnalysis: The macros, lookups, and datamodels in the search
+    """
+    # Strip the comments first, allowing there to be macros (which have a
+    # single backtick) inside those comments
+    without_comments = COMMENT_ENDING_IN_MACRO_REGEX.sub(r"` ```", search)
+    without_comments = COMMENT_REGEX.sub(" ", without_comments)
+
+    macro_calls = tuple(MACRO_REGEX.findall(without_comments))
+    # If macros take arguments, stop at the first argument. We just want the name of the macro
+    macros = frozenset(macro[:macro.find('(')] if macro.find('(') != -1 else macro for macro in macro_calls)
+
+    return SplAnalysis(search=search,
+                       search_lower=search.lower(),
+                       macro_calls=macro_calls,
+                       macros=macros,
+                       lookups=frozenset(LOOKUP_REGEX.findall(search)),
+                       datamodels=tuple(dm for dm in DataModel if dm.value in search),
+                       providing_technologies=tuple(ProvidingTechnology.getProvidingTechFromSearch(search)))
@@ -0,0 +1,88 @@
+import pathlib
+from typing import Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ConfAssembler():
+    """
+    Collects the rendered sections of every file written into the app, in memory, so that each
+    file is written exactly once, with a single write, no matter how many types of content
+    contribute to it. For example, savedsearches.conf is made up of its header, the detections,
+    the baselines, and the investigations. Files are independent of one another, so they are
+    written concurrently once everything has been rendered.
+    """
+
+    def __init__(self, package_path: pathlib.Path, template_files: Iterable[pathlib.Path] = ()):
+        self.package_path = package_path
+        # The files copied into the app from the app template, relative to the root of the app
+        self.template_files = set(template_files)
+        # The sections of each file, in the order that they were added, keyed by their path in the app
+        self.sections: dict[pathlib.Path, list[str]] = {}
+
+    def startFile(self, app_output_path: pathlib.Path, section: str) -> pathlib.Path:
+        """
+        Start a file with its first section, replacing anything collected for it so far.
+
+        Args:
+            app_output_path (pathlib.Path): The path of the file, relative to the root of the app
+            section (str): The first section of the file
+
+        Returns:
+            pathlib.Path: The path that the file will be written to
+        """
+        self.sections[app_output_path] = [section]
+        return self.package_path/app_output_path
+
+    def appendToFile(self, app_output_path: pathlib.Path, section: str) -> pathlib.Path:
+        """
+        Add a section to the end of a file. If the file has not been started, the section is
+        added to the copy of the file from the app template, if there is one.
+
+        Args:
+            app_output_path (pathlib.Path): The path of the file, relative to the root of the app
+            section (str): The section to add
+
+        Returns:
+            pathlib.Path: The path that the file will be written to
+        """
+        sections = self.sections.get(app_output_path)
+        if sections is None:
+            output_path = self.package_path/app_output_path
+            sections = [output_path.read_text(encoding="utf-8")] if app_output_path in self.template_files else []
+            self.sections[app_output_path] = sections
+        sections.append(section)
+        return self.package_path/app_output_path
+
+    def hasFile(self, app_output_path: pathlib.Path) -> bool:
+        # Whether the file has been collected, or will be in the app anyway because it is in the app template
+        return app_output_path in self.sections or app_output_path in self.template_files
+
+    def getContents(self, app_output_path: pathlib.Path) -> str:
+        return "".join(self.sections.get(app_output_path, []))
+
+    def writeFile(self, app_output_path: pathlib.Path) -> pathlib.Path:
+        output_path = self.package_path/app_output_path
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Characters which cannot be encoded as UTF-8 (lone surrogates) are dropped
+        with open(output_path, "w", encoding="utf-8", errors="ignore") as f:
+            f.write(self.getContents(app_output_path))
+        return output_path
+
+    def writeFiles(self, max_workers: Optional[int] = None) -> set[pathlib.Path]:
+        """
+        Write every file that has been collected, each with one write, and forget them.
+
+        Args:
+            max_workers (Optional[int], optional): Number of threads writing files. Defaults to the ThreadPoolExecutor default.
+
+        Returns:
+            set[pathlib.Path]: The paths of the files which were written
+        """
+        app_output_paths = list(self.sections)
+        if len(app_output_paths) < 2:
+            written_files = set(map(self.writeFile, app_output_paths))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                written_files = set(executor.map(self.writeFile, app_output_paths))
+        self.sections.clear()
+        return written_files
@@ -4,7 +4,7 @@ import glob
 import shutil
 import sys
 import tarfile
-from typing import Union
+from typing import Iterable, Optional, Union
 from pathlib import Path
 import pathlib
 import time
@@ -13,26 +13,43 @@ import datetime
 import shutil
 import json
 from contentctl.output.conf_writer import ConfWriter
+from contentctl.output.conf_assembler import ConfAssembler
+from contentctl.output.stanza_cache import StanzaCache
+from contentctl.output.directory_sync import DirectorySync
 from contentctl.objects.enums import SecurityContentType
 from contentctl.objects.config import build
+from contentctl.input.file_index import FileIndex
 from requests import Session, post, get
 from requests.auth import HTTPBasicAuth
 
 class ConfOutput:
     config: build    
+    file_index: FileIndex
+    assembler: ConfAssembler
+    stanza_cache: Optional[StanzaCache]
+    app_sync: DirectorySync
+    # The files written into the app by this build, apart from the copies of the app template
+    written_files: set[pathlib.Path]
 
 
-    def __init__(self, config: build):
+    def __init__(self, config: build, file_index: Optional[FileIndex] = None, stanza_cache: Optional[StanzaCache] = None):
         self.config = config
+        # The index built when the content was loaded. Without one, scan only the directories that are used here.
+        self.file_index = file_index if file_index is not None else FileIndex([config.path/"lookups"])
+        # Stanzas rendered by previous builds. Without a cache, every stanza is rendered.
+        self.stanza_cache = stanza_cache
 
         #Create the build directory if it does not exist
         config.getPackageDirectoryPath().parent.mkdir(parents=True, exist_ok=True)
         
-        #Remove the app path, if it exists
-        shutil.rmtree(config.getPackageDirectoryPath(), ignore_errors=True)
-        
-        #Copy all the template files into the app
-        shutil.copytree(config.getAppTemplatePath(), config.getPackageDirectoryPath())
+        #Copy the template files which have changed into the app. Files left over from the
+        #previous build are removed by removeStaleFiles, once this build has written its files.
+        self.app_sync = DirectorySync(config.getAppTemplatePath(), config.getPackageDirectoryPath())
+        self.app_sync.sync()
+        self.written_files = set()
+
+        # Everything written into the app is collected here, then written by writeFiles
+        self.assembler = ConfAssembler(config.getPackageDirectoryPath(), self.app_sync.template_files)
         
 
     def writeHeaders(self) -> set[pathlib.Path]:
@@ -46,7 +63,7 @@ class ConfOutput:
                                 'default/workflow_actions.conf', 
                                 'default/app.conf',
                                 'default/content-version.conf']:
-            written_files.add(ConfWriter.writeConfFileHeader(pathlib.Path(output_app_path),self.config))
+            written_files.add(ConfWriter.writeConfFileHeader(pathlib.Path(output_app_path),self.config, self.assembler))
             
         return written_files
 
@@ -64,14 +81,37 @@ class ConfOutput:
             written_files.add(ConfWriter.writeConfFile(pathlib.Path(output_app_path),
                                     template_name,
                                     self.config,
-                                    [self.config.app]))
+                                    [self.config.app],
+                                    self.assembler))
         
         written_files.add(ConfWriter.writeManifestFile(pathlib.Path("app.manifest"),
                                               "app.manifest.j2",
                                               self.config,
-                                              [self.config.app]))
+                                              [self.config.app],
+                                              self.assembler))
         return written_files
 
+    def writeFiles(self) -> set[pathlib.Path]:
+        """
+        Write every file collected by writeHeaders, writeObjects, and writeAppConf into the app.
+        Each file is written once, and the files are written concurrently.
+
+        Returns:
+            set[pathlib.Path]: The paths of the files which were written
+        """
+        written_files = self.assembler.writeFiles()
+        self.written_files.update(written_files)
+        return written_files
+
+    def removeStaleFiles(self, written_files: Iterable[pathlib.Path] = ()) -> None:
+        """
+        Remove the files left in the app by the previous build which were not written again by this build.
+
+        Args:
+            written_files (Iterable[pathlib.Path], optional): Files written into the app without ConfOutput. Defaults to ().
+        """
+        self.app_sync.removeStaleFiles(self.written_files.union(written_files))
+
         
     def writeObjects(self, objects: list, type: SecurityContentType = None) -> set[pathlib.Path]:
         written_files:set[pathlib.Path] = set()
@@ -79,17 +119,17 @@ class ConfOutput:
             for output_app_path, template_name in [ ('default/savedsearches.conf', 'savedsearches_detections.j2'),
                                                     ('default/analyticstories.conf', 'analyticstories_detections.j2')]:
                 written_files.add(ConfWriter.writeConfFile(pathlib.Path(output_app_path),
-                                                           template_name, self.config, objects))
+                                                           template_name, self.config, objects, self.assembler, self.stanza_cache))
         
         elif type == SecurityContentType.stories:
             written_files.add(ConfWriter.writeConfFile(pathlib.Path('default/analyticstories.conf'), 
                                     'analyticstories_stories.j2',
-                                    self.config, objects))
+                                    self.config, objects, self.assembler, self.stanza_cache))
 
         elif type == SecurityContentType.baselines:
             written_files.add(ConfWriter.writeConfFile(pathlib.Path('default/savedsearches.conf'),
                                                       'savedsearches_baselines.j2', 
-                                                       self.config, objects))
+                                                       self.config, objects, self.assembler, self.stanza_cache))
 
         elif type == SecurityContentType.investigations:
             for output_app_path, template_name in [ ('default/savedsearches.conf', 'savedsearches_investigations.j2'),
@@ -97,30 +137,35 @@ class ConfOutput:
                 ConfWriter.writeConfFile(pathlib.Path(output_app_path),
                                          template_name,
                                          self.config,
-                                         objects)
+                                         objects,
+                                         self.assembler,
+                                         self.stanza_cache)
                 
             workbench_panels = []
             for investigation in objects:
                 if investigation.inputs:
                     response_file_name_xml = investigation.lowercase_name + "___response_task.xml"
                     workbench_panels.append(investigation)
-                    investigation.search = investigation.search.replace(">","&gt;")
-                    investigation.search = investigation.search.replace("<","&lt;")
+                    # Escape the search for the panel XML without modifying the investigation, which
+                    # may be built again (for example, by 'contentctl build --watch')
+                    escaped_search = investigation.search.replace(">","&gt;").replace("<","&lt;")
                     
                     
                     ConfWriter.writeXmlFileHeader(pathlib.Path(f'default/data/ui/panels/workbench_panel_{response_file_name_xml}'), 
-                                                        self.config)
+                                                        self.config, self.assembler)
                     
                     ConfWriter.writeXmlFile(    pathlib.Path(f'default/data/ui/panels/workbench_panel_{response_file_name_xml}'),
                                                 'panel.j2',
-                                                self.config,[investigation.search])
+                                                self.config,[escaped_search], self.assembler)
 
             for output_app_path, template_name in [ ('default/es_investigations.conf', 'es_investigations_investigations.j2'),
                                                     ('default/workflow_actions.conf', 'workflow_actions.j2')]:
                 written_files.add( ConfWriter.writeConfFile(pathlib.Path(output_app_path),
                                                          template_name,
                                                         self.config,
-                                                        workbench_panels))
+                                                        workbench_panels,
+                                                        self.assembler,
+                                                        self.stanza_cache))
 
         elif type == SecurityContentType.lookups:
             for output_app_path, template_name in [ ('default/collections.conf', 'collections.j2'),
@@ -128,11 +173,13 @@ class ConfOutput:
                 written_files.add(ConfWriter.writeConfFile(pathlib.Path(output_app_path),
                                             template_name,
                                             self.config,
-                                            objects))
+                                            objects,
+                                            self.assembler,
+                                            self.stanza_cache))
             
         
             #we want to copy all *.mlmodel files as well, not just csvs
-            files = list(glob.iglob(str(self.config.path/ 'lookups/*.csv'))) + list(glob.iglob(str(self.config.path / 'lookups/*.mlmodel')))
+            files = self.file_index.getFiles(self.config.path/"lookups", suffixes=[".csv", ".mlmodel"], recursive=False)
             lookup_folder = self.config.getPackageDirectoryPath()/"lookups"
             
             # Make the new folder for the lookups 
@@ -140,20 +187,20 @@ class ConfOutput:
             lookup_folder.mkdir(exist_ok=True)
 
             #Copy each lookup into the folder
-            for lookup_name in files:
-                lookup_path = pathlib.Path(lookup_name)
+            for lookup_path in files:
                 if lookup_path.is_file():
-                    shutil.copy(lookup_path, lookup_folder/lookup_path.name)
+                    DirectorySync.syncFile(lookup_path, lookup_folder/lookup_path.name, self.file_index.getEntry(lookup_path))
+                    self.written_files.add(lookup_folder/lookup_path.name)
                 else:
                     raise(Exception(f"Error copying lookup/mlmodel file.  Path {lookup_path} does not exist or is not a file."))
 
         elif type == SecurityContentType.macros:
             written_files.add(ConfWriter.writeConfFile(pathlib.Path('default/macros.conf'),
                                     'macros.j2',
-                                    self.config, objects))
+                                    self.config, objects, self.assembler, self.stanza_cache))
         
         elif type == SecurityContentType.dashboards:
-            written_files.update(ConfWriter.writeDashboardFiles(self.config, objects))
+            written_files.update(ConfWriter.writeDashboardFiles(self.config, objects, self.assembler))
 
 
         return written_files
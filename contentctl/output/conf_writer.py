@@ -1,17 +1,93 @@
-from typing import Any
+from typing import Any, Optional
 import datetime
 import re
 import os
 import json
+import hashlib
+import functools
 import configparser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from xmlrpc.client import APPLICATION_ERROR
-from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, StrictUndefined, Template
+from jinja2.bccache import Bucket
 import pathlib
 from contentctl.objects.security_content_object import SecurityContentObject
 from contentctl.objects.dashboard import Dashboard
-from contentctl.objects.config import build
+from contentctl.objects.config import build, CustomApp
+from contentctl.output.conf_assembler import ConfAssembler
+from contentctl.output.stanza_cache import StanzaCache
+from contentctl.helper.process_pool import getProcessPoolContext
 import xml.etree.ElementTree as ET
 
+TEMPLATES_PATH = pathlib.Path(os.path.dirname(__file__))/'templates'
+# The loop over every object in a conf template, and the for/endfor tags nested within it
+OBJECTS_LOOP_REGEX = re.compile(r"\{%-?\s*for\s+\w+\s+in\s+objects\s*-?%\}")
+LOOP_TAG_REGEX = re.compile(r"\{%-?\s*(for|endfor)\b.*?%\}", re.DOTALL)
+# The options of an Environment which change the code that a template is compiled to
+COMPILE_OPTIONS = ("block_start_string", "block_end_string", "variable_start_string", "variable_end_string",
+                   "comment_start_string", "comment_end_string", "line_statement_prefix", "line_comment_prefix",
+                   "trim_blocks", "lstrip_blocks", "newline_sequence", "keep_trailing_newline", "optimized")
+# Below this many stanzas to render, the cost of starting a pool of worker processes, and of
+# sending every worker the objects, outweighs the time saved by rendering the stanzas in parallel
+PARALLEL_RENDER_MIN_OBJECTS = 1000
+# The number of stanzas rendered by each task given to a worker process, which lets faster workers
+# take on more of the tasks. It does not bound memory use: the stanzas of every object are kept
+# until the whole conf file has been rendered, and the ConfAssembler keeps every file until it is written.
+RENDER_CHUNK_SIZE = 50
+
+# The template name, app, and objects being rendered by a worker process, which are set once in
+# each worker by initStanzaRenderWorker. Content objects refer to one another, so pickling them
+# in separate chunks would pickle most of the content again for every chunk.
+_stanza_render_job: Optional[tuple[str, CustomApp, list]] = None
+
+
+def initStanzaRenderWorker(template_name: str, app: CustomApp, objects: list) -> None:
+    global _stanza_render_job
+    _stanza_render_job = (template_name, app, objects)
+
+
+def renderStanzaChunk(start: int, end: int) -> list[str]:
+    if _stanza_render_job is None:
+        raise Exception("Stanzas can only be rendered in a worker process started by ConfWriter.renderStanzasInParallel")
+    template_name, app, objects = _stanza_render_job
+    stanza = ConfWriter.getConfTemplateParts(template_name).stanza
+    if stanza is None:
+        raise Exception(f"Template {template_name} has no loop over objects to render stanzas from")
+    return [stanza.render(objects=[obj], app=app) for obj in objects[start:end]]
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """
+    Stores compiled templates on disk, so that each version of a template is compiled once rather
+    than in every run of contentctl. Jinja2 finds the code for a template by its name and checks
+    it against a hash of its source, but the code also depends on the options of the environment
+    that compiled it, so those are made part of the name.
+    """
+
+    def get_bucket(self, environment: Environment, name: str, filename: Optional[str], source: str) -> Bucket:
+        options = "|".join(str(getattr(environment, option)) for option in COMPILE_OPTIONS)
+        return super().get_bucket(environment, f"{name}|{options}", filename, source)
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            # Failing to update the cache must never fail the build itself
+            pass
+
+
+@dataclass(frozen=True)
+class ConfTemplateParts:
+    # A conf template, split around its loop over the objects. Rendering the loop for each object
+    # on its own and joining the stanzas gives exactly the same output as rendering the template.
+    header: Template
+    stanza: Optional[Template]
+    footer: Optional[Template]
+    # A hash of the source of the template, which identifies the version of its stanzas
+    version: str
+
+
 class ConfWriter():
 
     @staticmethod
@@ -44,32 +120,20 @@ class ConfWriter():
 
 
     @staticmethod
-    def writeConfFileHeader(app_output_path:pathlib.Path, config: build) -> pathlib.Path:
+    def writeConfFileHeader(app_output_path:pathlib.Path, config: build, assembler: ConfAssembler) -> pathlib.Path:
         output = ConfWriter.writeFileHeader(app_output_path, config)    
         
-        output_path = config.getPackageDirectoryPath()/app_output_path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            output = output.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output)
-
-        #Ensure that the conf file we just generated/update is syntactically valid
-        ConfWriter.validateConfFile(output_path)        
-        return output_path
+        # The conf file is validated once it has been written, after all of its content has been added
+        return assembler.startFile(app_output_path, output)
 
     @staticmethod
-    def writeManifestFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list) -> pathlib.Path:
+    def writeManifestFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list, assembler: ConfAssembler) -> pathlib.Path:
         j2_env = ConfWriter.getJ2Environment()
         template = j2_env.get_template(template_name)
         
         output = template.render(objects=objects, app=config.app, currentDate=datetime.datetime.now(datetime.UTC).date().isoformat())
         
-        output_path = config.getPackageDirectoryPath()/app_output_path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            output = output.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output)
-        return output_path
+        return assembler.startFile(app_output_path, output)
 
 
     @staticmethod
@@ -77,11 +141,7 @@ class ConfWriter():
         #Do not output microseconds or +00:000 at the end of the datetime string
         utc_time = datetime.datetime.now(datetime.UTC).replace(microsecond=0,tzinfo=None).isoformat()
     
-        j2_env = Environment(
-            loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')), 
-            trim_blocks=True)
-
-        template = j2_env.get_template('header.j2')
+        template = ConfWriter.getJ2Environment().get_template('header.j2')
         output = template.render(time=utc_time, author=' - '.join([config.app.author_name,config.app.author_company]), author_email=config.app.author_email)
         
         return output
@@ -89,7 +149,7 @@ class ConfWriter():
 
 
     @staticmethod
-    def writeXmlFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list) -> None:
+    def writeXmlFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list, assembler: ConfAssembler) -> None:
         
         
         j2_env = ConfWriter.getJ2Environment()
@@ -97,55 +157,52 @@ class ConfWriter():
         
         output = template.render(objects=objects, app=config.app)
         
-        output_path = config.getPackageDirectoryPath()/app_output_path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'a') as f:
-            output = output.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output)
+        output_path = assembler.appendToFile(app_output_path, output)
         
-        #Ensure that the conf file we just generated/update is syntactically valid
-        ConfWriter.validateXmlFile(output_path) 
+        #Ensure that the xml file we just generated/update is syntactically valid
+        ConfWriter.validateXmlString(assembler.getContents(app_output_path), output_path) 
 
     
 
     @staticmethod
-    def writeDashboardFiles(config:build, dashboards:list[Dashboard])->set[pathlib.Path]:
+    def writeDashboardFiles(config:build, dashboards:list[Dashboard], assembler: ConfAssembler)->set[pathlib.Path]:
         written_files:set[pathlib.Path] = set()
         for dashboard in dashboards:
             output_file_path = dashboard.getOutputFilepathRelativeToAppRoot(config)
-            # Check that the full output path does not exist so that we are not having an
-            # name collision with a file in app_template
-            if (config.getPackageDirectoryPath()/output_file_path).exists():
+            # Check that the output path is not in app_template, and has not been written by another
+            # dashboard, so that we are not having an name collision. The app directory is not checked,
+            # since it may still contain the dashboards of the previous build.
+            if assembler.hasFile(output_file_path):
                 raise FileExistsError(f"ERROR: Overwriting Dashboard File {output_file_path}. Does this file exist in {config.getAppTemplatePath()} AND {config.path/'dashboards'}?")
                 
-            ConfWriter.writeXmlFileHeader(output_file_path, config)
-            dashboard.writeDashboardFile(ConfWriter.getJ2Environment(), config)
-            ConfWriter.validateXmlFile(config.getPackageDirectoryPath()/output_file_path)
+            ConfWriter.writeXmlFileHeader(output_file_path, config, assembler)
+            output_path = assembler.appendToFile(output_file_path, dashboard.renderDashboardFile(ConfWriter.getJ2Environment(), config))
+            ConfWriter.validateXmlString(assembler.getContents(output_file_path), output_path)
             written_files.add(output_file_path)
         return written_files
 
 
     @staticmethod
-    def writeXmlFileHeader(app_output_path:pathlib.Path, config: build) -> None:
+    def writeXmlFileHeader(app_output_path:pathlib.Path, config: build, assembler: ConfAssembler) -> None:
         output = ConfWriter.writeFileHeader(app_output_path, config)    
         output_with_xml_comment = f"<!--\n{output}-->\n"
 
-        output_path = config.getPackageDirectoryPath()/app_output_path
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
-            output_with_xml_comment = output_with_xml_comment.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output_with_xml_comment)
+        assembler.startFile(app_output_path, output_with_xml_comment)
         
         # We INTENTIONALLY do not validate the comment we wrote to the header.  This is because right now,
         # the file is an empty XML document (besides the commented header). This means that it will FAIL validation 
 
 
     @staticmethod
+    @functools.cache
     def getJ2Environment()->Environment:
+        # One environment is shared by every writer in the process, so that each template is only
+        # loaded and compiled once. Environments are safe to share between threads.
         j2_env = Environment(
-            loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')), 
+            loader=FileSystemLoader(TEMPLATES_PATH), 
             trim_blocks=True,
-            undefined=StrictUndefined)
+            undefined=StrictUndefined,
+            bytecode_cache=ConfWriter.getBytecodeCache())
         j2_env.globals.update(objectListToNameList=SecurityContentObject.objectListToNameList)
 
 
@@ -154,18 +211,147 @@ class ConfWriter():
         return j2_env
 
     @staticmethod
-    def writeConfFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list) -> pathlib.Path:
-        output_path = config.getPackageDirectoryPath()/app_output_path
+    def getBytecodeCache() -> Optional[TemplateBytecodeCache]:
+        try:
+            # A directory in the system's temporary directory which only the current user can access
+            return TemplateBytecodeCache()
+        except (OSError, RuntimeError):
+            return None
+
+    @staticmethod
+    def compileTemplate(j2_env: Environment, name: str, source: str) -> Template:
+        """
+        Compile a template from a string, like Environment.from_string, but store the compiled code
+        in the bytecode cache of the environment under name.
+
+        Args:
+            j2_env (Environment): The environment to compile the template with
+            name (str): A name which is unique to this template
+            source (str): The source of the template
+
+        Returns:
+            Template: The compiled template
+        """
+        bytecode_cache = j2_env.bytecode_cache
+        if bytecode_cache is None:
+            return j2_env.from_string(source)
+        bucket = bytecode_cache.get_bucket(j2_env, name, None, source)
+        if bucket.code is None:
+            bucket.code = j2_env.compile(source, name)
+            bytecode_cache.set_bucket(bucket)
+        return j2_env.template_class.from_code(j2_env, bucket.code, j2_env.make_globals(None))
+
+    @staticmethod
+    @functools.cache
+    def getConfTemplateParts(template_name : str) -> ConfTemplateParts:
         j2_env = ConfWriter.getJ2Environment()
+        source = (TEMPLATES_PATH/template_name).read_text()
+        version = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        loop_start = OBJECTS_LOOP_REGEX.search(source)
+        if loop_start is None:
+            return ConfTemplateParts(header=j2_env.get_template(template_name), stanza=None, footer=None, version=version)
+
+        depth = 0
+        for tag in LOOP_TAG_REGEX.finditer(source, loop_start.start()):
+            depth += 1 if tag.group(1) == "for" else -1
+            if depth == 0:
+                loop_end = tag.end()
+                break
+        else:
+            raise Exception(f"The loop over objects in template {template_name} is never closed with an endfor")
+        # trim_blocks removes the newline after the endfor, so it belongs to the loop
+        if source.startswith("\n", loop_end):
+            loop_end += 1
+        # Only the newline at the very end of the template is removed when it is rendered
+        inner_env = j2_env.overlay(keep_trailing_newline=True)
+        return ConfTemplateParts(header=ConfWriter.compileTemplate(inner_env, f"{template_name}:header", source[:loop_start.start()]),
+                                 stanza=ConfWriter.compileTemplate(inner_env, f"{template_name}:stanza", source[loop_start.start():loop_end]),
+                                 footer=ConfWriter.compileTemplate(j2_env, f"{template_name}:footer", source[loop_end:]),
+                                 version=version)
+
+    @staticmethod
+    def canRenderInParallel(object_count: int) -> bool:
+        # Rendering is pure Python, so it is only parallel in separate processes
+        return object_count >= PARALLEL_RENDER_MIN_OBJECTS and (os.cpu_count() or 1) > 1
+
+    @staticmethod
+    def renderStanzasInParallel(template_name: str, app: CustomApp, objects: list, max_workers: Optional[int] = None) -> list[str]:
+        """
+        Render a stanza for each object in a pool of worker processes, in chunks of RENDER_CHUNK_SIZE objects.
+        Each worker is sent the objects once, when it starts, and then renders chunks of them.
+
+        Args:
+            template_name (str): The template to render the stanzas from
+            app (CustomApp): The app that the conf file is written for
+            objects (list): The objects to render
+            max_workers (Optional[int], optional): Number of worker processes. Defaults to the number of CPUs.
+
+        Returns:
+            list[str]: The stanza of each object, in the same order as objects
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        starts = range(0, len(objects), RENDER_CHUNK_SIZE)
+        ends = [min(start + RENDER_CHUNK_SIZE, len(objects)) for start in starts]
+        with ProcessPoolExecutor(max_workers=max(1, min(max_workers, len(ends))), mp_context=getProcessPoolContext(),
+                                 initializer=initStanzaRenderWorker, initargs=(template_name, app, objects)) as executor:
+            # map returns the chunks in order, however the work was spread between the workers
+            return [text for chunk in executor.map(renderStanzaChunk, starts, ends) for text in chunk]
+
+    @staticmethod
+    def renderConfTemplate(template_name : str, app: CustomApp, objects : list, stanza_cache: Optional[StanzaCache] = None) -> str:
+        """
+        Render a conf template. Each object is rendered separately, and the stanzas of validated
+        content are cached on the object until it is modified, so rendering the same content
+        again (for example, when rebuilding in watch mode) only renders the content which changed.
+        Stanzas which are not cached on the object are looked up in the stanza cache, which keeps
+        them between runs. When there are enough stanzas left to render, they are rendered in
+        parallel by worker processes.
+
+        Args:
+            template_name (str): The template to render
+            app (CustomApp): The app that the conf file is written for
+            objects (list): The objects to render
+            stanza_cache (Optional[StanzaCache], optional): The cache of stanzas from previous builds. Defaults to None.
+
+        Returns:
+            str: The rendered conf file contents
+        """
+        parts = ConfWriter.getConfTemplateParts(template_name)
+        if parts.stanza is None or parts.footer is None:
+            return parts.header.render(objects=objects, app=app)
+
+        stanza = parts.stanza
+        cache_key = f"conf stanza: {template_name} {app.model_dump_json()}"
+        pending = [obj for obj in objects
+                   if not (isinstance(obj, SecurityContentObject) and obj.isCachedWhenFrozen(cache_key))]
+        rendered: dict[int, str] = {}
+        if stanza_cache is not None:
+            rendered = stanza_cache.getStanzas(template_name, parts.version, pending)
+            pending = [obj for obj in pending if id(obj) not in rendered]
+        if ConfWriter.canRenderInParallel(len(pending)):
+            rendered.update(zip(map(id, pending), ConfWriter.renderStanzasInParallel(template_name, app, pending)))
+
+        stanzas: list[str] = []
+        for obj in objects:
+            if id(obj) in rendered:
+                render = functools.partial(rendered.__getitem__, id(obj))
+            else:
+                render = functools.partial(stanza.render, objects=[obj], app=app)
+            if isinstance(obj, SecurityContentObject):
+                stanzas.append(obj.cacheWhenFrozen(cache_key, render))
+            else:
+                stanzas.append(render())
+        if stanza_cache is not None:
+            stanza_cache.addStanzas(template_name, parts.version, objects, stanzas)
+        return parts.header.render(objects=objects, app=app) + "".join(stanzas) + parts.footer.render(objects=objects, app=app)
+
+    @staticmethod
+    def writeConfFile(app_output_path:pathlib.Path, template_name : str, config: build, objects : list, assembler: ConfAssembler,
+                      stanza_cache: Optional[StanzaCache] = None) -> pathlib.Path:
+        output = ConfWriter.renderConfTemplate(template_name, config.app, objects, stanza_cache)
         
-        template = j2_env.get_template(template_name)
-        output = template.render(objects=objects, app=config.app)
-        
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'a') as f:
-            output = output.encode('utf-8', 'ignore').decode('utf-8')
-            f.write(output)
-        return output_path
+        return assembler.appendToFile(app_output_path, output)
         
         
     @staticmethod
@@ -198,9 +384,20 @@ class ConfWriter():
             path (pathlib.Path): path to the xml file to validate
         """        
         
+        with open(path, 'r') as xmlFile:
+            ConfWriter.validateXmlString(xmlFile.read(), path)
+
+    @staticmethod
+    def validateXmlString(xml:str, path:pathlib.Path):
+        """Ensure that the contents of an XML file, which may not have been written yet, are valid XML.
+
+        Args:
+            xml (str): the contents of the xml file
+            path (pathlib.Path): path to the xml file, for the error message
+        """
+
         try:
-            with open(path, 'r') as xmlFile:
-                _ = ET.fromstring(xmlFile.read())
+            _ = ET.fromstring(xml)
         except Exception as e:
             raise Exception(f"Failed to validate .xml file {str(path)}: {str(e)}")
     
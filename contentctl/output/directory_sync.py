@@ -0,0 +1,109 @@
+import shutil
+import pathlib
+from typing import Iterable, Optional
+from contentctl.input.file_index import FileIndex, FileIndexEntry
+
+
+class DirectorySync():
+    """
+    Makes a directory a copy of a template directory without deleting it and copying the whole
+    template again, as is done for the app template before every build. Only the template files
+    which differ from the copy in the destination are copied. Files which were left in the
+    destination by a previous build are removed by removeStaleFiles, once it is known which
+    files the current build has written.
+
+    Files are always copied, never hard linked, since some of the copies (such as default/app.conf)
+    are overwritten by the build, which would also overwrite the linked file in the template.
+    """
+
+    def __init__(self, source: pathlib.Path, destination: pathlib.Path):
+        self.source = source
+        self.destination = destination
+        # Paths relative to source and destination
+        self.template_files: set[pathlib.Path] = set()
+        self.template_directories: set[pathlib.Path] = set()
+        self.previous_files: set[pathlib.Path] = set()
+        self.previous_directories: set[pathlib.Path] = set()
+
+    @staticmethod
+    def syncFile(source_path: pathlib.Path, destination_path: pathlib.Path,
+                 source_entry: Optional[FileIndexEntry] = None, destination_entry: Optional[FileIndexEntry] = None) -> bool:
+        """
+        Copy a file, unless the destination already has the same contents. Like shutil.copy2, the
+        mtime of the source is kept, so an unchanged file is recognized next time by its size and
+        mtime alone, without hashing it.
+
+        Args:
+            source_path (pathlib.Path): The file to copy
+            destination_path (pathlib.Path): Where to copy it to
+            source_entry (Optional[FileIndexEntry], optional): The source, if it has been scanned. Defaults to None.
+            destination_entry (Optional[FileIndexEntry], optional): The destination, if it has been scanned. Defaults to None.
+
+        Returns:
+            bool: Whether the file was copied
+        """
+        if source_entry is None:
+            stat = source_path.stat()
+            source_entry = FileIndexEntry(source_path, stat.st_size, stat.st_mtime_ns)
+        if destination_entry is None and destination_path.is_file():
+            stat = destination_path.stat()
+            destination_entry = FileIndexEntry(destination_path, stat.st_size, stat.st_mtime_ns)
+
+        if destination_entry is not None and destination_entry.size == source_entry.size:
+            if destination_entry.mtime_ns == source_entry.mtime_ns:
+                return False
+            if destination_entry.getHash() == source_entry.getHash():
+                shutil.copystat(source_path, destination_path)
+                return False
+
+        destination_path.parent.mkdir(parents=True, exist_ok=True)
+        # Replace the file rather than writing into it, in case it is read-only or linked elsewhere
+        destination_path.unlink(missing_ok=True)
+        shutil.copy2(source_path, destination_path)
+        return True
+
+    def sync(self) -> None:
+        source_index = FileIndex([self.source])
+        destination_index = FileIndex([self.destination])
+        self.template_files = {path.relative_to(self.source) for path in source_index.entries}
+        self.template_directories = {path.relative_to(self.source) for path in source_index.directory_files}
+        self.previous_files = {path.relative_to(self.destination) for path in destination_index.entries}
+        self.previous_directories = {path.relative_to(self.destination) for path in destination_index.directory_files}
+
+        for directory in sorted(self.template_directories):
+            if directory in self.previous_files:
+                (self.destination/directory).unlink()
+            (self.destination/directory).mkdir(parents=True, exist_ok=True)
+
+        for relative_path in sorted(self.template_files):
+            destination_path = self.destination/relative_path
+            if relative_path in self.previous_directories:
+                shutil.rmtree(destination_path)
+            DirectorySync.syncFile(self.source/relative_path, destination_path,
+                                   source_index.getEntry(self.source/relative_path),
+                                   destination_index.getEntry(destination_path))
+
+    def removeStaleFiles(self, written_files: Iterable[pathlib.Path]) -> None:
+        """
+        Remove every file which was in the destination before sync, but which is neither in the
+        template nor in written_files, along with any directories that this leaves empty.
+
+        Args:
+            written_files (Iterable[pathlib.Path]): The files written into the destination since sync, in the same form as the destination
+        """
+        keep = self.template_files | {path.relative_to(self.destination) for path in written_files}
+        # A file which the template replaced with a directory was already removed by sync
+        for relative_path in self.previous_files - keep - self.template_directories:
+            try:
+                (self.destination/relative_path).unlink()
+            except (FileNotFoundError, NotADirectoryError):
+                # Already gone, along with its directory, which the template replaced with a file
+                pass
+
+        # Deepest first, so that a directory which only contained empty directories is also removed
+        for directory in sorted(self.previous_directories - self.template_directories, key=lambda path: len(path.parts), reverse=True):
+            try:
+                (self.destination/directory).rmdir()
+            except OSError:
+                # The directory is not empty, since something was written into it by this build
+                pass
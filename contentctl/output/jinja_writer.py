@@ -1,18 +1,24 @@
-import os
+import functools
 from typing import Any
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, Undefined
+from contentctl.output.conf_writer import ConfWriter
 
 
 class JinjaWriter:
 
     @staticmethod
-    def writeObjectsList(template_name : str, output_path : str, objects : list) -> None:
+    @functools.cache
+    def getJ2Environment() -> Environment:
+        # Shares the loader and bytecode cache of the conf writer's environment, but the
+        # documentation templates do not trim blocks, and leave undefined fields empty. An overlay
+        # shares the templates loaded by its parent unless it is given a cache of its own, and a
+        # template loaded by the conf writer was compiled with trim_blocks.
+        return ConfWriter.getJ2Environment().overlay(trim_blocks=False, undefined=Undefined, cache_size=400)
 
-        j2_env = Environment(
-            loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')), 
-            trim_blocks=False)
+    @staticmethod
+    def writeObjectsList(template_name : str, output_path : str, objects : list) -> None:
 
-        template = j2_env.get_template(template_name)
+        template = JinjaWriter.getJ2Environment().get_template(template_name)
         output = template.render(objects=objects)
         with open(output_path, 'w') as f:
             output = output.encode('ascii', 'ignore').decode('ascii')
@@ -22,11 +28,7 @@ class JinjaWriter:
     @staticmethod
     def writeObject(template_name : str, output_path : str, object: dict[str,Any]) -> None:
 
-        j2_env = Environment(
-            loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')), 
-            trim_blocks=False)
-
-        template = j2_env.get_template(template_name)
+        template = JinjaWriter.getJ2Environment().get_template(template_name)
         output = template.render(object=object)
         with open(output_path, 'w') as f:
             output = output.encode('ascii', 'ignore').decode('ascii')
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import os
+import pickle
+import hashlib
+import functools
+import pathlib
+import tempfile
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+if TYPE_CHECKING:
+    from contentctl.input.director import DirectorOutputDto
+
+import contentctl
+from contentctl.objects.security_content_object import SecurityContentObject
+from contentctl.objects.config import build
+from contentctl.input.validation_manifest import ValidationManifest, FileState
+
+
+class StanzaCache():
+    """
+    An on-disk, content-addressed cache of rendered conf stanzas, so that building the app again
+    only renders the stanzas of content which has changed. Each stanza is stored under a hash of
+    everything that it is rendered from: the template, the app, the code of contentctl, the
+    file that the object was loaded from, and the files of the content that it depends on or that
+    depends on it directly (for example, the detections listed in the stanza of a story). Content
+    which was created at runtime, and so has no file, is always rendered.
+
+    The stanzas of each template are kept in one file, which is rewritten by save with only the
+    stanzas used by the latest build, so the cache never grows beyond the size of the content.
+    """
+
+    def __init__(self, cache_path: pathlib.Path, director_output_dto: DirectorOutputDto, build_key: str):
+        self.cache_path = cache_path
+        self.director_output_dto = director_output_dto
+        self.build_key = build_key
+        self.content_keys: dict[SecurityContentObject, Optional[str]] = {}
+        self.file_hashes: dict[pathlib.Path, Optional[str]] = {}
+        # The stanzas of each template read from the cache, and the stanzas used by this build
+        self.loaded_stanzas: dict[str, dict[str, str]] = {}
+        self.used_stanzas: dict[str, dict[str, str]] = {}
+
+    @classmethod
+    def fromConfig(cls, config: build, director_output_dto: DirectorOutputDto) -> Optional[StanzaCache]:
+        """
+        Open the stanza cache of a content pack. There is no cache if the enrichment repos are
+        in use but the commit that they are at cannot be found, since the enrichment data that
+        stanzas were rendered with could then have changed without notice.
+
+        Args:
+            config (build): The configuration of the build
+            director_output_dto (DirectorOutputDto): The validated content which will be built
+
+        Returns:
+            Optional[StanzaCache]: The cache, or None if stanzas cannot be cached
+        """
+        config_hash = ValidationManifest.getConfigHash(config.path, config.enrichments,
+                                                       [config.mitre_cti_repo_path, config.atomic_red_team_repo_path])
+        if config_hash is None:
+            return None
+        build_key = hashlib.sha256(f"{config_hash}|{StanzaCache.getSourceHash()}|{config.app.model_dump_json()}".encode("utf-8")).hexdigest()
+        return cls(config.ensureCachePathExists()/"stanzas", director_output_dto, build_key)
+
+    @staticmethod
+    @functools.cache
+    def getSourceHash() -> str:
+        # The computed fields and filters that stanzas are rendered with are defined by the code of
+        # contentctl, which can change without its version changing, for example in an editable install
+        package_path = pathlib.Path(contentctl.__file__).parent
+        source_hash = hashlib.sha256()
+        for source_path in sorted(package_path.rglob("*.py")):
+            source_hash.update(source_path.relative_to(package_path).as_posix().encode("utf-8"))
+            source_hash.update(source_path.read_bytes())
+        return source_hash.hexdigest()
+
+    def getTemplateCachePath(self, template_name: str) -> pathlib.Path:
+        return self.cache_path/f"{template_name}.pickle"
+
+    def getFileHash(self, file_path: pathlib.Path) -> Optional[str]:
+        if file_path not in self.file_hashes:
+            entry = self.director_output_dto.file_index.getEntry(file_path)
+            if entry is None:
+                self.file_hashes[file_path] = None
+            else:
+                # The index is kept up to date as files change, and the hash recorded when the content
+                # was validated is reused as long as the size and mtime of the file are the same
+                previous = self.director_output_dto.file_states.get(str(file_path))
+                self.file_hashes[file_path] = FileState.fromIndexEntry(entry, previous).sha256
+        return self.file_hashes[file_path]
+
+    def getRelatedContent(self, content: SecurityContentObject) -> set[SecurityContentObject]:
+        graph = self.director_output_dto.dependency_graph
+        related: set[SecurityContentObject] = set()
+        to_visit = list(graph.getDependencies(content))
+        while len(to_visit) > 0:
+            dependency = to_visit.pop()
+            if dependency in related:
+                continue
+            related.add(dependency)
+            to_visit.extend(graph.getDependencies(dependency))
+        related.update(graph.getDependents(content, transitive=False))
+        return related
+
+    def getContentKey(self, content: SecurityContentObject) -> Optional[str]:
+        if content not in self.content_keys:
+            self.content_keys[content] = self.computeContentKey(content)
+        return self.content_keys[content]
+
+    def computeContentKey(self, content: SecurityContentObject) -> Optional[str]:
+        if content.file_path is None:
+            return None
+        # Related content without a file (such as filter macros) is generated from the content
+        # which uses it, so it is covered by the files of that content
+        file_paths = {content.file_path} | {related.file_path for related in self.getRelatedContent(content)
+                                            if related.file_path is not None}
+        key_parts = [type(content).__name__, content.name]
+        for file_path in sorted(file_paths):
+            file_hash = self.getFileHash(file_path)
+            if file_hash is None:
+                return None
+            key_parts.append(f"{file_path}:{file_hash}")
+        return hashlib.sha256("\n".join(key_parts).encode("utf-8")).hexdigest()
+
+    def getStanzaKey(self, template_version: str, content: Any) -> Optional[str]:
+        if not isinstance(content, SecurityContentObject):
+            return None
+        content_key = self.getContentKey(content)
+        if content_key is None:
+            return None
+        return hashlib.sha256(f"{self.build_key}|{template_version}|{content_key}".encode("utf-8")).hexdigest()
+
+    def getLoadedStanzas(self, template_name: str) -> dict[str, str]:
+        if template_name not in self.loaded_stanzas:
+            try:
+                with open(self.getTemplateCachePath(template_name), "rb") as cache_file:
+                    self.loaded_stanzas[template_name] = pickle.load(cache_file)
+            except Exception:
+                # Missing, unreadable, or from an incompatible version. Treat it as empty.
+                self.loaded_stanzas[template_name] = {}
+        return self.loaded_stanzas[template_name]
+
+    def getStanzas(self, template_name: str, template_version: str, objects: Iterable[Any]) -> dict[int, str]:
+        """
+        Find the cached stanzas of objects.
+
+        Args:
+            template_name (str): The template that the stanzas are rendered from
+            template_version (str): A hash of the source of the template
+            objects (Iterable[Any]): The objects to find the stanzas of. Only content can be cached.
+
+        Returns:
+            dict[int, str]: The stanza of each object which was found, keyed by the id of the object
+        """
+        loaded = self.getLoadedStanzas(template_name)
+        found: dict[int, str] = {}
+        for obj in objects:
+            stanza_key = self.getStanzaKey(template_version, obj)
+            if stanza_key is not None and stanza_key in loaded:
+                found[id(obj)] = loaded[stanza_key]
+        return found
+
+    def addStanzas(self, template_name: str, template_version: str, objects: Iterable[Any], stanzas: Iterable[str]) -> None:
+        used = self.used_stanzas.setdefault(template_name, {})
+        for obj, stanza in zip(objects, stanzas):
+            stanza_key = self.getStanzaKey(template_version, obj)
+            if stanza_key is not None:
+                used[stanza_key] = stanza
+
+    def save(self) -> None:
+        # Only the stanzas used by this build are kept, and a file is only written if it has changed
+        for template_name, used in self.used_stanzas.items():
+            if self.getLoadedStanzas(template_name) == used:
+                continue
+            try:
+                self.cache_path.mkdir(parents=True, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.cache_path, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as temp_file:
+                        pickle.dump(used, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(temp_path, self.getTemplateCachePath(template_name))
+                except Exception:
+                    os.unlink(temp_path)
+                    raise
+            except Exception:
+                # Failing to update the cache must never fail the build itself
+                pass
+            self.loaded_stanzas[template_name] = used
+        self.used_stanzas = {}
@@ -0,0 +1,30 @@
+import pytest
+
+from contentctl.input.dependency_graph import SECURITY_CONTENT_TYPE_DEPENDENCIES, getTopologicalOrder
+from contentctl.objects.enums import SecurityContentType
+
+
+def test_content_is_loaded_in_the_original_order():
+    # The order that the director has always loaded content in. Validation stops at the first
+    # type of content with errors, so a different order would report different errors.
+    assert getTopologicalOrder(SECURITY_CONTENT_TYPE_DEPENDENCIES) == [
+        SecurityContentType.deployments,
+        SecurityContentType.lookups,
+        SecurityContentType.macros,
+        SecurityContentType.stories,
+        SecurityContentType.baselines,
+        SecurityContentType.investigations,
+        SecurityContentType.data_sources,
+        SecurityContentType.playbooks,
+        SecurityContentType.detections,
+        SecurityContentType.dashboards,
+    ]
+
+
+def test_order_moves_nodes_after_their_dependencies_only_when_needed():
+    assert getTopologicalOrder({"a": ["c"], "b": [], "c": [], "d": ["a"]}) == ["b", "c", "a", "d"]
+
+
+def test_order_rejects_cycles():
+    with pytest.raises(ValueError, match="cycle"):
+        getTopologicalOrder({"a": ["b"], "b": ["a"], "c": []})
@@ -0,0 +1,50 @@
+import pathlib
+
+from contentctl.output.directory_sync import DirectorySync
+
+
+def writeFiles(root: pathlib.Path, files: dict[str, str]) -> None:
+    for relative_path, contents in files.items():
+        (root/relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (root/relative_path).write_text(contents)
+
+
+def test_sync_removes_stale_files_and_keeps_template_and_written_files(tmp_path: pathlib.Path):
+    template = tmp_path/"template"
+    app = tmp_path/"app"
+    writeFiles(template, {"default/app.conf": "template", "static/logo.png": "logo"})
+    # Left behind by a previous build
+    writeFiles(app, {"default/app.conf": "overwritten by the last build",
+                     "default/savedsearches.conf": "old",
+                     "default/stale.conf": "stale",
+                     "lookups/stale/stale.csv": "stale",
+                     "lookups/kept.csv": "old"})
+
+    sync = DirectorySync(template, app)
+    sync.sync()
+    (app/"default"/"savedsearches.conf").write_text("new")
+    (app/"lookups"/"kept.csv").write_text("new")
+    sync.removeStaleFiles([app/"default"/"savedsearches.conf", app/"lookups"/"kept.csv"])
+
+    assert (app/"default"/"app.conf").read_text() == "template"
+    assert (app/"static"/"logo.png").read_text() == "logo"
+    assert (app/"default"/"savedsearches.conf").read_text() == "new"
+    assert (app/"lookups"/"kept.csv").read_text() == "new"
+    assert not (app/"default"/"stale.conf").exists()
+    assert not (app/"lookups"/"stale").exists()
+
+
+def test_sync_replaces_files_and_directories_that_swapped_type(tmp_path: pathlib.Path):
+    template = tmp_path/"template"
+    app = tmp_path/"app"
+    writeFiles(template, {"README": "now a file", "static/appIcon.png": "icon"})
+    writeFiles(app, {"README/old.md": "was a directory", "static": "was a file"})
+
+    sync = DirectorySync(template, app)
+    sync.sync()
+    sync.removeStaleFiles([])
+
+    assert (app/"README").is_file()
+    assert (app/"README").read_text() == "now a file"
+    assert (app/"static").is_dir()
+    assert (app/"static"/"appIcon.png").read_text() == "icon"
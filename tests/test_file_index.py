@@ -0,0 +1,28 @@
+import pathlib
+
+import pytest
+
+from contentctl.input.file_index import FileIndex
+from contentctl.helper.file_watcher import FileWatcher
+
+
+def test_scan_does_not_follow_links_to_directories(tmp_path: pathlib.Path):
+    detections = tmp_path/"detections"
+    (detections/"endpoint").mkdir(parents=True)
+    (detections/"endpoint"/"detection.yml").write_text("name: detection\n")
+    (tmp_path/"outside").mkdir()
+    (tmp_path/"outside"/"other.yml").write_text("name: other\n")
+    try:
+        # A cycle back to the top of the directory, and a link to a directory outside of it
+        (detections/"endpoint"/"cycle").symlink_to(detections, target_is_directory=True)
+        (detections/"outside").symlink_to(tmp_path/"outside", target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("Symbolic links cannot be created on this platform")
+
+    index = FileIndex([detections])
+    assert set(index.entries) == {detections/"endpoint"/"detection.yml"}
+    assert not index.hasDirectory(detections/"endpoint"/"cycle")
+    assert not index.hasDirectory(detections/"outside")
+
+    watcher = FileWatcher([detections])
+    assert set(watcher.snapshot) == {detections/"endpoint"/"detection.yml"}
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Importing contentctl.contentctl is all that is needed to print the help for any subcommand,
+# so it must stay fast. Each of these modules is slow to import and is only needed by some of
+# the subcommands, so they must be imported by the subcommands that use them instead.
+SUBCOMMAND_ONLY_MODULES = ["docker", "splunklib", "attackcti", "stix2", "questionary", "git",
+                           "pygit2", "bottle", "tqdm", "requests", "contentctl.input.director",
+                           "contentctl.objects.detection", "contentctl.actions.test", "contentctl.actions.serve",
+                           "contentctl.input.content_server", "contentctl.actions.new_content"]
+
+# The cold import of contentctl.contentctl took about 2.5s before the actions were imported
+# lazily, and takes about 0.5s after. Which modules are imported is what keeps it fast, and is
+# checked everywhere. The time itself is only checked on Linux, since a cold interpreter on the
+# shared macOS and Windows CI runners can take longer than this with nothing wrong.
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+IMPORT_TIME_ATTEMPTS = 3
+
+
+def importInFreshInterpreter(code: str) -> tuple[str, str]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import contentctl.contentctl\n{code}"],
+                            capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def test_subcommand_only_modules_are_not_imported():
+    stdout, _ = importInFreshInterpreter("import json, sys\n"
+                                         f"print(json.dumps([m for m in {SUBCOMMAND_ONLY_MODULES!r} if m in sys.modules]))")
+    assert json.loads(stdout) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Import times on shared macOS and Windows CI runners vary too much")
+def test_import_time_budget():
+    # -X importtime reports the cumulative time, in microseconds, of each import. Take the
+    # fastest of a few attempts so that one slow run (a cold disk cache) does not fail the test.
+    fastest = None
+    for _ in range(IMPORT_TIME_ATTEMPTS):
+        _, stderr = importInFreshInterpreter("")
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "contentctl.contentctl":
+                seconds = int(fields[1]) / 1_000_000
+                fastest = seconds if fastest is None else min(fastest, seconds)
+    assert fastest is not None
+    assert fastest < IMPORT_TIME_BUDGET_SECONDS, (f"Importing contentctl.contentctl took {fastest:.2f}s, "
+                                                  f"which is over the budget of {IMPORT_TIME_BUDGET_SECONDS}s")
@@ -0,0 +1,31 @@
+import shutil
+import pathlib
+import subprocess
+import sys
+
+
+def runContentctl(pack_path: pathlib.Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "contentctl.contentctl", *args],
+                          cwd=pack_path, capture_output=True, text=True)
+
+
+def test_incremental_validation_rejects_copy_of_skipped_detection(tmp_path: pathlib.Path):
+    # The original detection is unchanged, so incremental validation skips it, but the copy must
+    # still be reported as a duplicate of it, exactly as a full validation would
+    assert runContentctl(tmp_path, "init").returncode == 0
+    assert runContentctl(tmp_path, "validate").returncode == 0
+
+    detection = tmp_path/"detections"/"endpoint"/"anomalous_usage_of_7zip.yml"
+    (tmp_path/"detections"/"cloud").mkdir(parents=True, exist_ok=True)
+    shutil.copy(detection, tmp_path/"detections"/"cloud"/detection.name)
+
+    full = runContentctl(tmp_path, "validate")
+    assert full.returncode != 0
+    assert "Duplicate name 'Anomalous usage of 7zip'" in full.stdout + full.stderr
+
+    for _ in range(2):
+        # A failed run must not record the content as valid for the next incremental run
+        incremental = runContentctl(tmp_path, "validate", "--incremental")
+        assert "validating [1] of [2]" in incremental.stdout
+        assert incremental.returncode != 0
+        assert "Duplicate name 'Anomalous usage of 7zip'" in incremental.stdout + incremental.stderr
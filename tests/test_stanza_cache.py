@@ -0,0 +1,68 @@
+import os
+import pathlib
+import subprocess
+import sys
+import contextlib
+from typing import Optional
+
+import pytest
+
+from contentctl.actions.validate import Validate
+from contentctl.objects.config import build
+from contentctl.output.stanza_cache import StanzaCache
+
+
+def getContentKeys(pack_path: pathlib.Path) -> dict[str, Optional[str]]:
+    # Every run validates the pack from scratch, as a build would, and keys the content by name
+    with contextlib.chdir(pack_path):
+        config = build.model_validate({"path": pathlib.Path("."), "build_app": False, "build_api": False})
+        director_output_dto = Validate().execute(config)
+        stanza_cache = StanzaCache.fromConfig(config, director_output_dto)
+        assert stanza_cache is not None
+        content = [*director_output_dto.detections, *director_output_dto.stories, *director_output_dto.macros]
+        return {obj.name: stanza_cache.getContentKey(obj) for obj in content}
+
+
+def test_content_key_changes_with_dependencies_and_direct_dependents(tmp_path: pathlib.Path):
+    subprocess.run([sys.executable, "-m", "contentctl.contentctl", "init"], cwd=tmp_path,
+                   capture_output=True, check=True)
+    detection = "Anomalous usage of 7zip"
+    story = "Cobalt Strike"
+    macro = "security_content_summariesonly"
+
+    keys = getContentKeys(tmp_path)
+    assert None not in (keys[detection], keys[story], keys[macro])
+
+    # Touching a file without changing its contents changes no keys
+    detection_path = tmp_path/"detections"/"endpoint"/"anomalous_usage_of_7zip.yml"
+    stat = detection_path.stat()
+    os.utime(detection_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert getContentKeys(tmp_path) == keys
+
+    # The detection is listed in the stanza of its story, so editing it changes both keys
+    with open(detection_path, "a") as detection_file:
+        detection_file.write("\n# edited\n")
+    edited_detection_keys = getContentKeys(tmp_path)
+    assert edited_detection_keys[detection] != keys[detection]
+    assert edited_detection_keys[story] != keys[story]
+
+    # The detection depends on the macro, so editing the macro changes the key of the detection
+    with open(tmp_path/"macros"/f"{macro}.yml", "a") as macro_file:
+        macro_file.write("\n# edited\n")
+    edited_macro_keys = getContentKeys(tmp_path)
+    assert edited_macro_keys[macro] != edited_detection_keys[macro]
+    assert edited_macro_keys[detection] != edited_detection_keys[detection]
+
+
+def test_build_key_changes_with_the_code_of_contentctl(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    subprocess.run([sys.executable, "-m", "contentctl.contentctl", "init"], cwd=tmp_path,
+                   capture_output=True, check=True)
+    with contextlib.chdir(tmp_path):
+        config = build.model_validate({"path": pathlib.Path("."), "build_app": False, "build_api": False})
+        director_output_dto = Validate().execute(config)
+        before = StanzaCache.fromConfig(config, director_output_dto)
+        # As if contentctl were upgraded, or edited in an editable install, without a new version
+        monkeypatch.setattr(StanzaCache, "getSourceHash", staticmethod(lambda: "changed"))
+        after = StanzaCache.fromConfig(config, director_output_dto)
+    assert before is not None and after is not None
+    assert before.build_key != after.build_key
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+# Removes everything that the socket and socketserver modules only define on platforms with
+# Unix sockets, such as Windows, before running the rest of the script
+WITHOUT_UNIX_SOCKETS = """
+import socket
+import socketserver
+del socket.AF_UNIX
+for name in [name for name in dir(socketserver) if "Unix" in name]:
+    delattr(socketserver, name)
+"""
+
+
+def runWithoutUnixSockets(script: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", WITHOUT_UNIX_SOCKETS + script], capture_output=True, text=True)
+
+
+def test_serve_explains_that_it_needs_unix_sockets():
+    result = runWithoutUnixSockets("""
+from contentctl.actions.serve import Serve
+try:
+    Serve().execute(None)
+except Exception as e:
+    print(e)
+""")
+    assert result.returncode == 0, result.stderr
+    assert "requires Unix socket support" in result.stdout
+
+
+def test_watch_does_not_need_unix_sockets():
+    result = runWithoutUnixSockets("""
+from contentctl.actions.watch import Watch
+""")
+    assert result.returncode == 0, result.stderr
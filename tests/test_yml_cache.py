@@ -0,0 +1,41 @@
+import os
+import pathlib
+
+from contentctl.input.yml_cache import YmlCache
+
+
+def test_cache_entry_is_reused_after_touch_but_not_after_edit(tmp_path: pathlib.Path):
+    cache = YmlCache(tmp_path/"cache")
+    file_path = tmp_path/"macro.yml"
+    file_path.write_text("name: first\n")
+    loaded: list[str] = []
+
+    def loader(path: pathlib.Path) -> str:
+        loaded.append(path.read_text())
+        return path.read_text()
+
+    assert cache.load(file_path, loader) == "name: first\n"
+    assert len(loaded) == 1
+
+    # Touched: the mtime changed, but the contents are the same, so the file is not parsed again
+    stat = file_path.stat()
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not cache.isUnchanged(file_path)
+    assert cache.load(file_path, loader) == "name: first\n"
+    assert len(loaded) == 1
+    assert cache.isUnchanged(file_path)
+
+    # Edited to the same size, so only the hash tells the two versions apart
+    file_path.write_text("name: other\n")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    assert cache.load(file_path, loader) == "name: other\n"
+    assert len(loaded) == 2
+
+
+def test_cache_entries_of_another_version_are_not_used(tmp_path: pathlib.Path):
+    file_path = tmp_path/"lookup.csv"
+    file_path.write_text("a,b\n1,2\n")
+
+    assert YmlCache(tmp_path/"cache", version="1").load(file_path, lambda path: "checked by version 1") == "checked by version 1"
+    assert YmlCache(tmp_path/"cache", version="1").load(file_path, lambda path: "checked again") == "checked by version 1"
+    assert YmlCache(tmp_path/"cache", version="2").load(file_path, lambda path: "checked by version 2") == "checked by version 2"